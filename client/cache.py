@@ -0,0 +1,140 @@
+"""
+In this file the local cache of the client is defined
+The last leaderboard and the own highscore are stored on disk with the data version of the server,
+so the app can show them right after the login and the server only has to answer "not modified" if nothing changed
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import os
+import json
+
+
+class LocalCache:
+    """
+    A class to store the last responses of the server on disk (one json file)
+
+    Entries
+    -------
+    highscores : the last UPDATE_HIGHSCORE_TABLE
+    own_highscore:<username> : the last OWN_HIGHSCORE of the user
+
+    ...
+
+    Constants
+    ---------
+    TRANSIENT_KEYS : tuple[str, ...]
+        The keys of a response that are not stored (they only belong to the request)
+
+    Attributes
+    ----------
+    path : str
+        The path of the cache file
+    entries : dict[str, dict]
+        The cached responses with their data version ({"version": int, "data": dict})
+
+    Methods
+    -------
+    get(key: str) -> dict | None
+        Gets a cached response
+    version(key: str) -> int | None
+        Gets the data version of a cached response
+    store(key: str, data: dict) -> None
+        Stores a response with its data version and writes the cache file
+    """
+
+    TRANSIENT_KEYS = ("to", "id", "trace", "version")
+
+    def __init__(self, path: str = "useless_gui_cache.json") -> None:
+        """
+        Initialize a new LocalCache and load the cache file (a missing or broken file is an empty cache)
+
+        Parameters
+        ----------
+        path : str (default: "useless_gui_cache.json")
+            The path of the cache file
+
+        Returns
+        -------
+        None
+        """
+        self.path: str = path
+        try:
+            with open(path) as file:
+                self.entries: dict[str, dict] = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+        if not isinstance(self.entries, dict):
+            self.entries = {}
+
+
+    def get(self, key: str) -> dict | None:
+        """
+        Gets a cached response
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry
+
+        Returns
+        -------
+        : dict
+            The response like it was received (without id, trace and version)
+        : None
+            If there is no entry
+        """
+        entry = self.entries.get(key)
+        return entry.get("data") if isinstance(entry, dict) else None
+
+
+    def version(self, key: str) -> int | None:
+        """
+        Gets the data version of a cached response (is sent as if_version, so the server can answer NOT_MODIFIED)
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry
+
+        Returns
+        -------
+        : int
+            The data version of the server when the response was sent
+        : None
+            If there is no entry
+        """
+        entry = self.entries.get(key)
+        return entry.get("version") if isinstance(entry, dict) else None
+
+
+    def store(self, key: str, data: dict) -> None:
+        """
+        Stores a response with its data version and writes the cache file
+        (responses without a version are not stored, the file is replaced at once so a crash never leaves half a file)
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry
+        data : dict
+            The received response
+
+        Returns
+        -------
+        None
+        """
+        if data.get("version") is None:
+            return
+
+        entry = {"version": data["version"], "data": {k: v for k, v in data.items() if k not in self.TRANSIENT_KEYS}}
+        if self.entries.get(key) == entry:
+            return
+        self.entries[key] = entry
+
+        try:
+            with open(self.path + ".tmp", "w") as file:
+                json.dump(self.entries, file)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            #the cache only makes the start faster, the app works without it
+            print(f"[{'CACHE':<10}] Couldn't write the cache file: {e}")
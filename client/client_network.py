@@ -3,11 +3,29 @@ In this file the Network part of the client is defined
 ~ Hartl Lorenz, Hell Andreas, Holas Christoph
 """
 
+import os
 import json
+import zlib
+import time
+import errno
+import random
+import select
 import socket
+import threading
 import multiprocessing
 
+from concurrent.futures import Future
 from typing import Any
+from tracing import TraceExporter
+
+#the preset dictionary for the compression (has to be the same in the server (server_network.py))
+#the most common parts of the messages are at the end because zlib prefers close matches
+COMPRESSION_DICTIONARY = (b'"reason": "retry_after": "request": "rate_limited", "overloaded", "page_size": "limit": '
+                          b'"missed": "highscore": "averages": "percentiles": "games": [[, "after": null, "after": [, "rank": '
+                          b'{"command": "HEARTBEAT", "from": "id": {"command": "REQUEST_HIGHSCORE_PAGE", "from": '
+                          b'{"command": "GAME_HISTORY", "to": {"command": "OWN_HIGHSCORE", "to": "rating": "score": '
+                          b'"accuracy": "time": 10}{"command": "HIGHSCORE_PAGE", "to": '
+                          b'{"command": "UPDATE_HIGHSCORE_TABLE", "to": "", "id": , "highscores": [["", 100.0, 10], ["')
 
 
 class NetworkClient:
@@ -20,6 +38,20 @@ class NetworkClient:
     ---------
     ENCODING : str -> "utf-8"
         The encoding when sending/receiving data
+    COMPRESSION : str -> "zlib-1"
+        The compression the client supports (the number is the version of the preset dictionary)
+    COMPRESSION_THRESHOLD : int -> 512
+        Messages with less bytes are never compressed
+    COMPRESSED_FLAG : int -> 1 << 127
+        The bit in the length header that marks a compressed message
+    RECONNECT_BASE_DELAY : float -> 0.5
+        The maximum delay before the first reconnect (is doubled with every attempt) [s]
+    RECONNECT_MAX_DELAY : float -> 30
+        The maximum delay between two reconnects [s]
+    NO_RESPONSE : frozenset[str] -> {"GAME_FINISHED", "CLOSE_CONNECTION"}
+        The commands the server only answers if they fail (their futures are not kept in pending and they aren't traced)
+    CANCEL_INTERVAL : float -> 0.1
+        The time between two checks if the running connect was cancelled [s]
 
     Attributes
     ----------
@@ -33,18 +65,82 @@ class NetworkClient:
         If the listener is running or not    
     connected : bool
         If the client is connected to the server or not
+    next_request_id : int
+        The id the next request will get (the server sends it back in the response)
+    pending : dict[int, tuple[Future, float]]
+        The requests that didn't get a response yet with the time they were sent
+    last_rtt : float | None
+        The round trip time of the last answered request [s]
+    heartbeat_interval : float
+        The time between two heartbeats [s] (the server sends it when the client connects)
+    compression : bool
+        If the server accepted the compression (large messages to the server are compressed)
+    tracer : TraceExporter | None
+        Adds a trace to every request with a response and writes it to the span file when the response was applied (no tracing if None)
+    connect_timeout : float
+        The maximum time to connect to the server [s]
+    login_timeout : float
+        The maximum time the server can take to answer the login [s]
+    connect_state : str
+        The progress of the login ("disconnected", "waiting", "connecting", "logging_in" or "connected")
+    connect_cancelled : bool
+        If the running login was cancelled (is reset with the socket)
+    session : str | None
+        The token of the session (is sent when logging in again after the connection was lost)
+    credentials : tuple[str, str, str, int] | None
+        The name, password, host and port of the last successful login (are used to reconnect)
+    reconnect_attempt : int
+        The number of reconnects since the connection was lost
+    next_reconnect : float
+        The time of the next reconnect (time.time)
 
     Methods
     -------
-    connect_to_server(name: str, pwd: str, register: bool = False, host: str = "127.0.0.2", port: int = 3333) -> bool | ConnectionRefusedError | None
+    connect_to_server(name: str, pwd: str, register: bool = False, host: str = "127.0.0.2", port: int = 3333) -> tuple[bool | OSError | None, str | None]
         Connect to the server with a given name
-    send(data: bytes) -> None
+    connect_in_background(name: str, pwd: str, register: bool = False, host: str = "127.0.0.2", port: int = 3333) -> Future
+        Connect to the server with a given name in a thread
+    handshake(name: str, pwd: str, register: bool, host: str, port: int) -> tuple[bool | OSError | None, str | None]
+        Connects the socket and logs in (every step has its own timeout)
+    connect_socket(host: str, port: int) -> None
+        Connects the socket without blocking, so the connect can be cancelled
+    start_listener() -> None
+        Starts the listener process that receives the commands of the server
+    cancel_connect() -> None
+        Cancels the login of connect_in_background
+    prepare_offline(name: str, pwd: str, host: str = "127.0.0.2", port: int = 3333) -> None
+        Stores the credentials without connecting (to play offline)
+    connection_lost() -> None
+        Marks the connection as lost (the commands are dropped until the client reconnected)
+    reconnect_in_background() -> Future
+        Logs in again with the last credentials in a thread (with jittered exponential backoff)
+    reconnect() -> tuple[bool | OSError | None, str | None]
+        Tries to log in again until the server accepts or refuses the login
+    reset_socket() -> None
+        Closes the socket and creates a new one for the next login
+    send(data: bytes, login: bool = False) -> None
         Send data to the server (first length then data)
-    send_to_server(command: str, username: str, **data: Any) -> None
+    compress(data: bytes) -> bytes
+        Compress data with the preset dictionary
+    decompress(data: bytes) -> bytes
+        Decompress data that was compressed with the preset dictionary
+    send_to_server(command: str, username: str, **data: Any) -> Future
         Send a command to the server
+    send_batch_to_server(username: str, commands: list[tuple[str, dict]]) -> list[Future]
+        Send multiple commands to the server in a single write
+    create_request(command: str, username: str, data: dict) -> tuple[dict, Future]
+        Create a command with a new request id
+    drop_request(request: dict, future: Future) -> None
+        Fails a request that can't be sent because the client isn't connected
+    resolve(recv: dict) -> None
+        Resolve the future of the request the received command answers
+    finish_trace(recv: dict) -> None
+        Stamps that the received command is applied to the UI and exports its trace
     recv() -> bytes
         Function to receive the exact amount of bytes
         First the length will be received than the client receives the data
+    recv_exact(length: int) -> bytes
+        Receive exactly the given amount of bytes
     convert_received_data() -> dict | list[dict]
         Receive data from the server and convert it to a command
         (Multiple commands can be received at once)
@@ -52,19 +148,31 @@ class NetworkClient:
         Function to receive data from the server and put it into the queue
     """
     
-    def __init__(self):
+    def __init__(self, tracer: TraceExporter | None = None, connect_timeout: float = 5, login_timeout: float = 15):
         """
         Initialize a new NetworkClient
 
         Parameters
         ----------
-        None
+        tracer : TraceExporter | None (default: None)
+            Traces every request with a response if given
+        connect_timeout : float (default: 5)
+            The maximum time to connect to the server [s]
+        login_timeout : float (default: 15)
+            The maximum time the server can take to answer the login (hashing the password takes a while) [s]
 
         Returns
         -------
         None
         """
         self.ENCODING = "utf-8"
+        self.COMPRESSION = "zlib-1"
+        self.COMPRESSION_THRESHOLD = 512
+        self.COMPRESSED_FLAG = 1 << 127
+        self.RECONNECT_BASE_DELAY = 0.5
+        self.RECONNECT_MAX_DELAY = 30
+        self.NO_RESPONSE = frozenset({"GAME_FINISHED", "CLOSE_CONNECTION"})
+        self.CANCEL_INTERVAL = 0.1
         #A queue to store the commands received when receiving data
         self.que: multiprocessing.Queue = multiprocessing.Queue()
         #allows the communication between the client and the server
@@ -74,13 +182,30 @@ class NetworkClient:
         #Indicators if listener is running and if client is connected to the server
         self.running: bool = True
         self.connected: bool = False
+        #every request gets an id to match the response to the request
+        self.next_request_id: int = 1
+        self.pending: dict[int, tuple[Future, float]] = {}
+        self.last_rtt: float | None = None
+        self.heartbeat_interval: float = 10
+        self.compression: bool = False
+        self.tracer: TraceExporter | None = tracer
+        #the login can run in a thread, the window shows its progress
+        self.connect_timeout: float = connect_timeout
+        self.login_timeout: float = login_timeout
+        self.connect_state: str = "disconnected"
+        self.connect_cancelled: bool = False
+        #the client logs in again by itself if the connection is lost
+        self.session: str | None = None
+        self.credentials: tuple[str, str, str, int] | None = None
+        self.reconnect_attempt: int = 0
+        self.next_reconnect: float = 0
 
 
 #-------------------------CONNECT-------------------------#
 
-    def connect_to_server(self, name: str, pwd: str, register: bool = False, host: str = "127.0.0.2", port: int = 3333) -> bool | ConnectionRefusedError | None:
+    def connect_to_server(self, name: str, pwd: str, register: bool = False, host: str = "127.0.0.2", port: int = 3333) -> tuple[bool | OSError | None, str | None]:
         """
-        Connect to the server with a given name
+        Connect to the server with a given name (blocks until the server answered, see connect_in_background)
 
         Parameters
         ----------
@@ -97,33 +222,330 @@ class NetworkClient:
 
         Returns
         -------
-        self.connected: bool
-            Returns if the connection was successful
-        reason: str | None
+        status : bool | OSError | None
+            If the login was successful, the error if the connection failed or None if the server sent no valid answer
+        reason : str | None
             The reason why the connection was refused
         """
+        status, reason = self.handshake(name, pwd, register, host, port)
+        if status is True:
+            self.start_listener()
+        return status, reason
+
+
+    def connect_in_background(self, name: str, pwd: str, register: bool = False, host: str = "127.0.0.2", port: int = 3333) -> Future:
+        """
+        Connect to the server with a given name in a thread, so the window stays responsive
+        The progress is shown by connect_state, start_listener has to be called when the login was successful
+
+        Parameters
+        ----------
+        name : str
+            The name of the client that wants to connect to the server
+        pwd : str
+            The password for the login
+        register : bool
+            If register is True the user wants to register if not the user wants to log in into a existing account
+        host : str (default: 127.0.0.2)
+            The IPv4-Address of the Server to connect to
+        port : int (default: 3333)
+            The Port of the Server to connect to
+
+        Returns
+        -------
+        future : Future
+            Is resolved with the status and the reason (like connect_to_server returns them)
+        """
+        future = Future()
+        def run() -> None:
+            future.set_result(self.handshake(name, pwd, register, host, port))
+
+        #the thread isn't stored, the client has to stay picklable for the listener process
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+
+    def handshake(self, name: str, pwd: str, register: bool, host: str, port: int) -> tuple[bool | OSError | None, str | None]:
+        """
+        Connects the socket and logs in (every step has its own timeout)
+        If the login fails the socket is replaced, so the next try has a new socket
+
+        Parameters
+        ----------
+        name : str
+            The name of the client that wants to connect to the server
+        pwd : str
+            The password for the login
+        register : bool
+            If register is True the user wants to register if not the user wants to log in into a existing account
+        host : str
+            The IPv4-Address of the Server to connect to
+        port : int
+            The Port of the Server to connect to
+
+        Returns
+        -------
+        status : bool | OSError | None
+            If the login was successful, the error if the connection failed or None if the server sent no valid answer
+        reason : str | None
+            The reason why the connection failed or was refused
+        """
         try:
-            self.client_socket.connect((host, port))
-        except ConnectionRefusedError as error:
-            return error, None
-    
-        if register:
-            self.send_to_server(command="REGISTER", username=name, password=pwd)
-        else:
-            self.send_to_server(command="LOGIN", username=name, password=pwd)
-        
-        resp = self.convert_received_data()
-        if resp.get("command") == "CONNECTED":
-            if resp.get("to") == name:
-                print("listener_started")
-                self.listener.start()
-                self.connected = True
-                return self.connected, None
-        elif resp.get("command") == "CONNECTION_REFUSED":
-            self.client_socket.close()
-            self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.connected = False
+            self.connect_state = "connecting"
+            self.connect_socket(host, port)
+            #a cancel while the connect finished would only shut down a socket that wasn't connected yet
+            if self.connect_cancelled:
+                raise ConnectionAbortedError("The login was cancelled")
+
+            #the server decides if large messages are compressed
+            self.connect_state = "logging_in"
+            self.client_socket.settimeout(self.login_timeout)
+            login_data = {"password": pwd, "compression": [self.COMPRESSION]}
+            if self.session and not register:
+                #the server replaces the old connection if it still thinks it is alive
+                login_data["session"] = self.session
+            request, _ = self.create_request("REGISTER" if register else "LOGIN", name, login_data)
+            string_data = json.dumps(request)
+            print(f"[{'SENDING':<10}] {string_data}")
+            self.send(string_data.encode(self.ENCODING), login=True)
+            resp = self.convert_received_data() or {}
+        except TimeoutError as error:
+            #the state is reset with the socket
+            timeout = self.connect_timeout if self.connect_state == "connecting" else self.login_timeout
+            self.reset_socket()
+            return error, f"The server didn't answer within {timeout} s"
+        except OSError as error:
+            #a cancelled login ends here too (the connect was stopped or the socket was shut down)
+            self.reset_socket()
+            return error, str(error)
+
+        self.resolve(resp)
+        if resp.get("command") == "CONNECTED" and resp.get("to") == name:
+            self.client_socket.settimeout(None)
+            self.heartbeat_interval = resp.get("heartbeat_interval", self.heartbeat_interval)
+            self.compression = resp.get("compression") == self.COMPRESSION
+            self.session = resp.get("session")
+            self.credentials = (name, pwd, host, port)
+            self.connected = True
+            self.connect_state = "connected"
+            return self.connected, None
+
+        self.reset_socket()
+        if resp.get("command") == "CONNECTION_REFUSED":
             return self.connected, resp.get("reason")
+        return None, None
+
+
+    def connect_socket(self, host: str, port: int) -> None:
+        """
+        Connects the socket without blocking, so the connect can be cancelled
+        (a blocking connect isn't ended by closing the socket in another thread)
+
+        Parameters
+        ----------
+        host : str
+            The IPv4-Address of the Server to connect to
+        port : int
+            The Port of the Server to connect to
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        TimeoutError
+            If the server didn't accept the connection within connect_timeout
+        ConnectionAbortedError
+            If cancel_connect was called (is checked every CANCEL_INTERVAL)
+        OSError
+            If the connection failed
+        """
+        self.client_socket.setblocking(False)
+        error = self.client_socket.connect_ex((host, port))
+        #the connect is still running (EINPROGRESS on unix, WSAEWOULDBLOCK on windows)
+        if error not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK)):
+            raise OSError(error, os.strerror(error))
+
+        deadline = time.monotonic() + self.connect_timeout
+        while error:
+            if self.connect_cancelled:
+                raise ConnectionAbortedError("The login was cancelled")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("timed out")
+            #a finished connect is writable (a failed one is also reported as exception on windows)
+            _, writable, failed = select.select([], [self.client_socket], [self.client_socket], min(remaining, self.CANCEL_INTERVAL))
+            if writable or failed:
+                error = self.client_socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error:
+                    raise OSError(error, os.strerror(error))
+
+
+    def start_listener(self) -> None:
+        """
+        Starts the listener process that receives the commands of the server
+        (has to be called by the process of the window, not by the thread of connect_in_background)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        #a process can only be started once, the listener of a lost connection is replaced
+        if self.listener.pid is not None:
+            self.listener.join(1)
+            self.listener = multiprocessing.Process(target=self.recv_in_process, daemon=True)
+        print("listener_started")
+        self.listener.start()
+
+
+    def cancel_connect(self) -> None:
+        """
+        Cancels the login of connect_in_background
+        A running connect is stopped within CANCEL_INTERVAL, the wait for the login answer is ended at once (the socket is shut down)
+        A login that is already done isn't cancelled
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.connected:
+            return
+        #the flag is set first, so a connect that finishes in between is stopped by handshake
+        self.connect_cancelled = True
+        try:
+            self.client_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            #the socket isn't connected yet, connect_socket sees the flag
+            pass
+
+
+    def prepare_offline(self, name: str, pwd: str, host: str = "127.0.0.2", port: int = 3333) -> None:
+        """
+        Stores the credentials without connecting, so reconnect_in_background logs in when the server is reachable
+
+        Parameters
+        ----------
+        name : str
+            The name of the client
+        pwd : str
+            The password for the login
+        host : str (default: 127.0.0.2)
+            The IPv4-Address of the Server to connect to
+        port : int (default: 3333)
+            The Port of the Server to connect to
+
+        Returns
+        -------
+        None
+        """
+        self.credentials = (name, pwd, host, port)
+        self.connected = False
+        self.connect_state = "disconnected"
+
+
+    def connection_lost(self) -> None:
+        """
+        Marks the connection as lost (the commands are dropped until the client reconnected)
+        Is called by the window when the listener reported CONNECTION_LOST
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.connected = False
+        self.connect_state = "disconnected"
+
+
+    def reconnect_in_background(self) -> Future:
+        """
+        Logs in again with the last credentials in a thread (see reconnect)
+        start_listener has to be called when the login was successful
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        future : Future
+            Is resolved with the status and the reason (like connect_to_server returns them)
+        """
+        future = Future()
+        def run() -> None:
+            future.set_result(self.reconnect())
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+
+    def reconnect(self) -> tuple[bool | OSError | None, str | None]:
+        """
+        Tries to log in again until the server accepts or refuses the login
+        The delay before every attempt is random between 0 and RECONNECT_BASE_DELAY * 2^attempt (at most RECONNECT_MAX_DELAY),
+        so the clients of a restarting server don't all log in at the same time
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        status : bool | OSError | None
+            True if the client is logged in again, False if the server refused the login
+        reason : str | None
+            The reason why the login was refused
+        """
+        name, pwd, host, port = self.credentials
+        while True:
+            self.reconnect_attempt += 1
+            delay = random.uniform(0, min(self.RECONNECT_MAX_DELAY, self.RECONNECT_BASE_DELAY * 2**self.reconnect_attempt))
+            self.next_reconnect = time.time() + delay
+            self.connect_state = "waiting"
+            time.sleep(delay)
+
+            self.reset_socket()
+            #the requests of the lost connection are never answered
+            self.pending.clear()
+            status, reason = self.handshake(name, pwd, False, host, port)
+            if status is True:
+                self.reconnect_attempt = 0
+                return status, reason
+            #a full server or a session the server didn't close yet can be tried again, wrong credentials can't
+            if status is False and reason not in ("The server is full!", "Already loged in!"):
+                return status, reason
+
+
+    def reset_socket(self) -> None:
+        """
+        Closes the socket and creates a new one for the next login
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.client_socket.close()
+        self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.connected = False
+        self.connect_state = "disconnected"
+        #a cancel only ends the login of the old socket
+        self.connect_cancelled = False
 
 #-------------------------CONNECT-------------------------#
 
@@ -131,31 +553,78 @@ class NetworkClient:
 
 #--------------------------SEND---------------------------#
 
-    def send(self, data: bytes) -> None:
+    def send(self, data: bytes, login: bool = False) -> None:
         """
         Send data to the server (first length then data)
+        While the client isn't logged in only the login is sent (the other commands are dropped)
 
         Parameters
         ----------
         data : bytes
             The data to send to the server
+        login : bool (default: False)
+            If the data is the login (is sent before the client is connected)
 
         Returns
         -------
         None
         """
-        length = len(data)
+        if not self.connected and not login:
+            return
+
+        header = 0
+        if self.compression and len(data) >= self.COMPRESSION_THRESHOLD:
+            data = self.compress(data)
+            header = self.COMPRESSED_FLAG
+
+        header |= len(data)
         try:
-            byte_length = length.to_bytes(16, "big")
-            self.client_socket.send(byte_length)
-            self.client_socket.send(data)
+            byte_length = header.to_bytes(16, "big")
+            #length and data are sent in one write
+            self.client_socket.sendall(byte_length + data)
         except OSError:
             pass
 
 
-    def send_to_server(self, command: str, username: str, **data: Any) -> None:
+    def compress(self, data: bytes) -> bytes:
         """
-        Send a command to the server
+        Compress data with the preset dictionary
+
+        Parameters
+        ----------
+        data : bytes
+            The data to compress
+
+        Returns
+        -------
+        : bytes
+            The compressed data
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY, COMPRESSION_DICTIONARY)
+        return compressor.compress(data) + compressor.flush()
+
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Decompress data that was compressed with the preset dictionary
+
+        Parameters
+        ----------
+        data : bytes
+            The compressed data
+
+        Returns
+        -------
+        : bytes
+            The decompressed data
+        """
+        decompressor = zlib.decompressobj(zdict=COMPRESSION_DICTIONARY)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+    def create_request(self, command: str, username: str, data: dict) -> tuple[dict, Future]:
+        """
+        Create a command with a new request id
 
         Parameters
         ----------
@@ -168,19 +637,116 @@ class NetworkClient:
 
         Returns
         -------
-        None
+        to_send : dict
+            The command that can be sent to the server
+        future : Future
+            Is resolved with the response of the server (see resolve, never resolved for NO_RESPONSE commands)
         """
+        request_id = self.next_request_id
+        self.next_request_id += 1
+
         to_send = {"command": command,
-                   "from": username}
+                   "from": username,
+                   "id": request_id}
 
         if data:
             for key, value in data.items():
                 to_send[key] = value
 
+        #the trace of a command without a response is never exported
+        if self.tracer and command not in self.NO_RESPONSE:
+            to_send["trace"] = self.tracer.start()
+
+        future = Future()
+        #a command without a response would stay in pending until the connection is lost
+        if command not in self.NO_RESPONSE:
+            self.pending[request_id] = (future, time.perf_counter())
+        return to_send, future
+
+
+    def drop_request(self, request: dict, future: Future) -> None:
+        """
+        Fails a request that can't be sent because the client isn't connected (it would never be answered)
+
+        Parameters
+        ----------
+        request : dict
+            The command that isn't sent
+        future : Future
+            The future of the command
+
+        Returns
+        -------
+        None
+        """
+        self.pending.pop(request["id"], None)
+        future.set_exception(ConnectionError(f"{request['command']} wasn't sent, the client isn't connected"))
+
+
+    def send_to_server(self, command: str, username: str, **data: Any) -> Future:
+        """
+        Send a command to the server
+
+        Parameters
+        ----------
+        command : str
+            The command name the server should receive
+        username : str
+            The name of the client that sends the command
+        data : dict
+            Additional data the server needs to process the command
+
+        Returns
+        -------
+        future : Future
+            Is resolved with the response of the server (commands without a response are never resolved)
+            Fails with a ConnectionError if the client isn't connected (the command is dropped)
+        """
+        to_send, future = self.create_request(command, username, data)
+        if not self.connected:
+            self.drop_request(to_send, future)
+            return future
+
+        string_data = json.dumps(to_send)
+        print(f"[{'SENDING':<10}] {string_data}")
+
+        self.send(string_data.encode(self.ENCODING))
+        return future
+
+
+    def send_batch_to_server(self, username: str, commands: list[tuple[str, dict]]) -> list[Future]:
+        """
+        Send multiple commands to the server in a single write
+        The server processes them in order and answers every command on its own
+
+        Parameters
+        ----------
+        username : str
+            The name of the client that sends the commands
+        commands : list[tuple[str, dict]]
+            The command names with the additional data the server needs
+
+        Returns
+        -------
+        futures : list[Future]
+            The futures of the commands in the same order (fail with a ConnectionError if the client isn't connected)
+        """
+        to_send = []
+        futures = []
+        for command, data in commands:
+            request, future = self.create_request(command, username, data)
+            to_send.append(request)
+            futures.append(future)
+        if not self.connected:
+            for request, future in zip(to_send, futures):
+                self.drop_request(request, future)
+            return futures
+
         string_data = json.dumps(to_send)
         print(f"[{'SENDING':<10}] {string_data}")
 
         self.send(string_data.encode(self.ENCODING))
+        return futures
 
 #--------------------------SEND---------------------------#
 
@@ -203,13 +769,47 @@ class NetworkClient:
             The data received
         """
         try:
-            length = int.from_bytes(self.client_socket.recv(16), "big")
-            data = self.client_socket.recv(length)
+            header = int.from_bytes(self.recv_exact(16), "big")
+            data = self.recv_exact(header & (self.COMPRESSED_FLAG - 1))
+            if header & self.COMPRESSED_FLAG:
+                data = self.decompress(data)
             return data
-        except ConnectionResetError:
+        except TimeoutError:
+            #only the login has a timeout, it is handled by the handshake
+            raise
+        except OSError:
             return b'{"command": "CONNECTION_LOST"}'
 
 
+    def recv_exact(self, length: int) -> bytes:
+        """
+        Receive exactly the given amount of bytes
+        (a single recv can return less when multiple messages arrive at once)
+
+        Parameters
+        ----------
+        length : int
+            The amount of bytes to receive
+
+        Returns
+        -------
+        data : bytes
+            The data received
+
+        Raises
+        ------
+        ConnectionResetError
+            If the server closed the connection
+        """
+        data = b""
+        while len(data) < length:
+            chunk = self.client_socket.recv(length - len(data))
+            if not chunk:
+                raise ConnectionResetError("The server closed the connection")
+            data += chunk
+        return data
+
+
     def convert_received_data(self) -> dict | None:
         """
         Receive data from the server and convert it to a command
@@ -251,8 +851,55 @@ class NetworkClient:
             if recv:
                 if isinstance(recv, list):
                     for com in recv:
+                        TraceExporter.stamp(com, "client_receive")
                         self.que.put(com)
-                    return
+                    continue
+                TraceExporter.stamp(recv, "client_receive")
                 self.que.put(recv)
+                #the socket is dead, a new listener is started when the client reconnected
+                if recv.get("command") == "CONNECTION_LOST":
+                    break
+
+
+    def resolve(self, recv: dict) -> None:
+        """
+        Resolve the future of the request the received command answers
+        Has to be called by the process that sent the request (the futures are not shared with the listener)
+
+        Parameters
+        ----------
+        recv : dict
+            A command received from the server
+
+        Returns
+        -------
+        None
+        """
+        #the response waited in the queue until now
+        TraceExporter.stamp(recv, "queue")
+        request = self.pending.pop(recv.get("id"), None)
+        if request:
+            future, sent_at = request
+            self.last_rtt = time.perf_counter() - sent_at
+            future.set_result(recv)
+
+
+    def finish_trace(self, recv: dict) -> None:
+        """
+        Stamps that the received command is applied to the UI and exports its trace
+        Has to be called after the command (and the callbacks of its future) changed the UI
+
+        Parameters
+        ----------
+        recv : dict
+            A command received from the server
+
+        Returns
+        -------
+        None
+        """
+        if self.tracer and "trace" in recv:
+            TraceExporter.stamp(recv, "ui_apply")
+            self.tracer.export(recv)
 
 #-------------------------RECEIVE-------------------------#
\ No newline at end of file
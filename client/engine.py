@@ -0,0 +1,385 @@
+"""
+In this file the rules of the game are defined without tkinter
+The engine gets the time from a clock and the clicks from an input source (the target grid in the app, a bot in simulate.py),
+so games can be played on the screen or simulated without a display
+The targets of a game are generated up front from a seed (splitmix64, the same function as in the server's challenge.py),
+the same seed gives the same game and the server plays the game again from the seed and the clicks
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import time
+import random
+
+from typing import Callable
+
+
+MASK = (1 << 64) - 1
+
+
+def target_sequence(seed: int, targets: int, length: int) -> list[int]:
+    """
+    Generates the targets of a game (splitmix64, a longer sequence starts with the same targets)
+
+    Parameters
+    ----------
+    seed : int
+        The seed of the game
+    targets : int
+        The number of targets
+    length : int
+        The number of generated targets
+
+    Returns
+    -------
+    : list[int]
+        The highlighted targets in the order they are shown
+    """
+    state = seed & MASK
+    sequence = []
+    for _ in range(length):
+        state = (state + 0x9E3779B97F4A7C15) & MASK
+        z = state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+        sequence.append((z ^ (z >> 31)) % targets)
+    return sequence
+
+
+class GameEngine:
+    """
+    A class to play one game after another: highlights targets, counts the clicks and calculates the stats
+
+    Game loop
+    ---------
+    start() once, then tick() until it returns False, click(target) for every click in between,
+    the stats of the game are in result() after the game
+    (a hit highlights the next target of the sequence at once, the server replays the game with the same rule)
+
+    ...
+
+    Constants
+    ---------
+    TARGETS_PER_SECOND : int -> 5
+        The number of targets per second of the game that are generated up front (more are generated if they run out)
+
+    Attributes
+    ----------
+    targets : int
+        The number of targets
+    duration : int
+        The duration of a game [s]
+    clock : Callable[[], float]
+        Returns the current time [s] (time.time in the app, a SimulatedClock in simulations)
+    rng : random.Random
+        Picks the seeds of the games that are started without a seed
+    seed : int
+        The seed of the last game
+    challenge : str | None
+        The date of the daily challenge of the last game (None if it wasn't a challenge)
+    sequence : list[int]
+        The targets of the last game in the order they are shown
+    position : int
+        The position of the highlighted target in the sequence
+    running : bool
+        If a game is running
+    start_time : float
+        The time the last game started
+    highlighted : int | None
+        The highlighted target (None if no game is running)
+    highlighted_at : float
+        The time the target was highlighted
+    score : int
+        The correct clicks of the game
+    missed : int
+        The wrong clicks of the game
+    hits : list[list[float, float]]
+        The time the target was highlighted and the time it was hit for every correct click [s since the start of the game]
+    misses : list[float]
+        The time of every wrong click [s since the start of the game]
+    inputs : list[list[float, int]]
+        The time and the clicked target of every click [s since the start of the game]
+
+    Methods
+    -------
+    start(seed: int = None, challenge: str = None) -> None
+        Starts a new game
+    tick() -> bool
+        Ends the game if the time is up
+    next_target() -> None
+        Highlights the next target of the sequence
+    click(target: int) -> bool
+        Counts a click on a target
+    time_left() -> float
+        Gets the time left in the game
+    finish() -> None
+        Ends the game
+    result() -> dict
+        Gets the stats of the last game
+    """
+
+    TARGETS_PER_SECOND = 5
+
+    def __init__(self, targets: int = 9, duration: int = 10, clock: Callable[[], float] = time.time, rng: random.Random = None) -> None:
+        """
+        Initialize a new GameEngine
+
+        Parameters
+        ----------
+        targets : int (default: 9)
+            The number of targets
+        duration : int (default: 10)
+            The duration of a game [s]
+        clock : Callable[[], float] (default: time.time)
+            Returns the current time [s]
+        rng : random.Random (default: None)
+            Picks the seeds of the games that are started without a seed (a new unseeded random.Random if None)
+
+        Returns
+        -------
+        None
+        """
+        self.targets: int = targets
+        self.duration: int = duration
+        self.clock: Callable[[], float] = clock
+        self.rng: random.Random = rng or random.Random()
+
+        self.seed: int = 0
+        self.challenge: str | None = None
+        self.sequence: list[int] = []
+        self.position: int = 0
+        self.running: bool = False
+        self.start_time: float = 0
+        self.highlighted: int | None = None
+        self.highlighted_at: float = 0
+        self.score: int = 0
+        self.missed: int = 0
+        self.hits: list[list[float, float]] = []
+        self.misses: list[float] = []
+        self.inputs: list[list[float, int]] = []
+
+
+    def start(self, seed: int = None, challenge: str = None) -> None:
+        """
+        Starts a new game (the stats of the last game are reset, the targets are generated and the first one is highlighted)
+
+        Parameters
+        ----------
+        seed : int (default: None)
+            The seed of the targets (a random seed if None, the same seed gives the same targets)
+        challenge : str (default: None)
+            The date of the daily challenge the seed belongs to (is sent with the clicks)
+
+        Returns
+        -------
+        None
+        """
+        self.seed = self.rng.getrandbits(63) if seed is None else seed
+        self.challenge = challenge
+        self.sequence = target_sequence(self.seed, self.targets, max(1, int(self.duration * self.TARGETS_PER_SECOND)))
+        self.score = 0
+        self.missed = 0
+        self.hits = []
+        self.misses = []
+        self.inputs = []
+        self.start_time = self.clock()
+        self.running = True
+        self.position = -1
+        self.next_target()
+
+
+    def tick(self) -> bool:
+        """
+        Ends the game if the time is up
+        (the app calls it every frame, a simulation after every click)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : bool
+            If the game is still running
+        """
+        if not self.running:
+            return False
+        if self.time_left() < 0:
+            self.finish()
+            return False
+        return True
+
+
+    def next_target(self) -> None:
+        """
+        Highlights the next target of the sequence (the sequence is generated again twice as long if it runs out)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.position += 1
+        if self.position == len(self.sequence):
+            self.sequence = target_sequence(self.seed, self.targets, 2 * len(self.sequence))
+        self.highlighted = self.sequence[self.position]
+        self.highlighted_at = self.clock() - self.start_time
+
+
+    def click(self, target: int) -> bool:
+        """
+        Counts a click on a target
+            if the target is highlighted the score increases by 1 and the next target is highlighted
+            if the target is NOT highlighted the missed clicks increase by 1
+        Clicks while no game is running are ignored
+
+        Parameters
+        ----------
+        target : int
+            The clicked target
+
+        Returns
+        -------
+        : bool
+            If the highlighted target was hit
+        """
+        if not self.running:
+            return False
+
+        now = self.clock() - self.start_time
+        self.inputs.append([now, target])
+        if target == self.highlighted:
+            self.score += 1
+            self.hits.append([self.highlighted_at, now])
+            self.next_target()
+            return True
+
+        self.missed += 1
+        self.misses.append(now)
+        return False
+
+
+    def time_left(self) -> float:
+        """
+        Gets the time left in the game
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : float
+            The time left [s] (negative if the time is up)
+        """
+        return self.duration - (self.clock() - self.start_time)
+
+
+    def finish(self) -> None:
+        """
+        Ends the game (the highlight of the target is removed)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.running = False
+        self.highlighted = None
+
+
+    def result(self) -> dict:
+        """
+        Gets the stats of the last game (like they are sent in GAME_FINISHED)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : dict
+            score, missed, accuracy [%], time (the duration), rating and clicks
+            (the timing, seed and inputs the server checks the score with)
+        """
+        clicks = self.score + self.missed
+        accuracy = round((self.score / clicks) * 100, 2) if clicks else 0
+        result = {"score": self.score, "missed": self.missed, "accuracy": accuracy, "time": self.duration,
+                  "rating": round((self.score * accuracy) / (100 * self.duration), 3),
+                  "clicks": {"hits": [[round(shown, 4), round(hit, 4)] for shown, hit in self.hits],
+                             "misses": [round(miss, 4) for miss in self.misses],
+                             "seed": self.seed, "targets": self.targets,
+                             "inputs": [[round(clicked_at, 4), target] for clicked_at, target in self.inputs]}}
+        if self.challenge:
+            result["clicks"]["challenge"] = self.challenge
+        return result
+
+
+class SimulatedClock:
+    """
+    A clock that only moves when it is advanced (a game of 60 s is simulated without waiting)
+
+    ...
+
+    Attributes
+    ----------
+    now : float
+        The current time [s]
+
+    Methods
+    -------
+    advance(seconds: float) -> None
+        Moves the clock forward
+    """
+
+    def __init__(self, start: float = 0) -> None:
+        """
+        Initialize a new SimulatedClock
+
+        Parameters
+        ----------
+        start : float (default: 0)
+            The time the clock starts at [s]
+
+        Returns
+        -------
+        None
+        """
+        self.now: float = start
+
+
+    def __call__(self) -> float:
+        """
+        Gets the current time (the clock is used like time.time)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : float
+            The current time [s]
+        """
+        return self.now
+
+
+    def advance(self, seconds: float) -> None:
+        """
+        Moves the clock forward
+
+        Parameters
+        ----------
+        seconds : float
+            The time to move forward [s]
+
+        Returns
+        -------
+        None
+        """
+        self.now += seconds
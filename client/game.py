@@ -1,14 +1,20 @@
 """
-In this file the class of the App and the GameButton is 
+In this file the class of the App is defined (the targets of the game are in target_grid.py)
 ~ Hartl Lorenz, Hell Andreas, Holas Christoph
 """
 
 import tkinter
 import tkinter.messagebox
+import tkinter.simpledialog
 from tkinter import ttk
-import random
 import time
+from concurrent.futures import Future
 from client_network import NetworkClient
+from tracing import TraceExporter
+from cache import LocalCache
+from journal import GameJournal
+from target_grid import TargetGrid
+from engine import GameEngine
 
 class App:
     """
@@ -16,10 +22,23 @@ class App:
 
     ...
 
+    Constants
+    ---------
+    GRID_WIDTH : int -> 260
+        The width of the target grid [px]
+    GRID_HEIGHT : int -> 300
+        The height of the target grid [px]
+    RANKED_GRID : tuple[int, int] -> (3, 3)
+        The rows and columns of the ranked games (the games on other grids are practice and aren't sent to the server)
+
     Attributes
     ----------
     client : NetworkClient
         The network part of the client
+    cache : LocalCache
+        The last leaderboard and own highscore (are shown at the start and sent as if_version)
+    journal : GameJournal
+        The games that were played while the client wasn't connected (are sent with SUBMIT_GAMES)
     window : tkinter.TK
         The window which is shown to the user
     username : str
@@ -27,6 +46,22 @@ class App:
 
     login_status : bool
         A variable to check the if user is loged in 
+    login_request : Future | None
+        The running login (is resolved with the status and the reason, None if no login is running)
+    login_cancelled : bool
+        If the user cancelled the running login
+    reconnect_request : Future | None
+        The running reconnect after the connection was lost (None if the client is connected)
+    login_register : bool
+        If the running login registers a new account (an account that doesn't exist yet can't be played offline)
+    journal_request : Future | None
+        The running SUBMIT_GAMES (None if no games are sent)
+    last_game : dict | None
+        The journal entry of the last game that was sent (is journaled if the server answers GAME_FINISHED with BUSY)
+    last_highscore : dict | None
+        The data of the last NEW_HIGHSCORE (is sent again if the server answers it with BUSY)
+    grid_size : tuple[int, int]
+        The number of rows and columns of the target grid
     game_running : bool
         A variable to check if there is a game running
     app_running : bool
@@ -46,11 +81,35 @@ class App:
         The ratinf of th last game (is used to compare the highscore)
     highest_rating : float
         The highest rating the user had all time
+    rank : int
+        The global rank of the user
+    engine : GameEngine
+        The rules of the game (highlights the targets, counts the clicks of the target grid and calculates the stats)
+    clicks : dict[str, list]
+        The timing of the clicks of the last game (the server checks the score with it)
+    next_page : list[float, str] | None
+        The cursor of the next page of the highscore table (None if there are no more pages)
+    page_request : Future | None
+        The request of the next page of the highscore table (None if no page is requested)
+    leaderboard_window : str
+        The leaderboard shown in the highscore table ("all_time", "daily", "weekly", "mode_<duration>" or "group:<name>")
+    window_names : dict[str, str]
+        The leaderboards that can be selected with their name in the window select
+    groups : list[str]
+        The groups of the user
+    group_codes : dict[str, str]
+        The invite code of every group of the user (is shown in the group dialog to share it)
 
     exit_button : tkinter.Button
         Sends the server a command to close the connection if loged in and closes the window (calls exit_app)
     start_button : tkinter.Button
         Starts a new game if there is no game running (calls start_game)
+    group_button : tkinter.Button
+        Joins or leaves a group (calls edit_group)
+    stats_button : tkinter.Button
+        Requests the last games and the statistics of the user (calls request_game_history)
+    challenge_button : tkinter.Button
+        Requests the daily challenge and plays it when the server sends it (calls request_challenge)
     time_label : tkinter.Label
         Show the time which is left in the game
     login_button : tkinter.Button
@@ -71,12 +130,26 @@ class App:
         Shows where to confirm the typed password in the register window
     password_confirm_entry : tkinter.Entry
         Allows the user to conf
+    login_progress_label : tkinter.Label
+        Shows the progress of the running login
+    cancel_button : tkinter.Button
+        Cancels the running login (calls cancel_login), is only shown while a login is running
     highscore_talbe : ttk.Treeview
-        The table to show the highscores of the top 10 users
-    buttons : list[GameButton]
-        A list of the game buttons (each calls GameButton.check_status)
+        The table to show the highscores (more pages are loaded when scrolling to the end)
+    table_scrollbar : ttk.Scrollbar
+        The scrollbar of the highscore table
+    target_grid : TargetGrid
+        The targets of the game (one canvas with grid_size targets)
     highscore_table_label : tkinter.Label
         A heading for the highscore table
+    rank_label : tkinter.Label
+        Shows the global rank of the user
+    connection_label : tkinter.Label
+        Shows that the client is reconnecting
+    window_select : ttk.Combobox
+        Selects the leaderboard shown in the highscore table (calls select_window)
+    mode_select : ttk.Combobox
+        Selects the duration of the next game (calls select_mode)
     login_heading : tkinter.Label
         A heading for the login screen
     login_subheading : tkinter.Label
@@ -92,38 +165,89 @@ class App:
         Changes the Window to the login screen
     login() -> None
         Method triggerd by the login button when user is in the login screen
-        Calls the setup_connection method and destroys the widgets that are no longer needed
+        Calls the setup_connection method
     register_window() -> None
         Changes the Window to the register screen
     register() -> None
         Method triggerd by the register button when user is in the register screen
-        Calls the setup_connection method and destroys the widgets that are no longer needed
+        Calls the setup_connection method
         The user is loged in automatically
     setup_connection(register: bool) -> None
-        Tries to connect to server and gives pop up if connection to server failed or the login wasn't correct
-    start_game() -> None
+        Starts the login in the background (a login that is already running isn't started again)
+    show_login_progress() -> None
+        Shows the progress of the running login in the login screen
+    cancel_login() -> None
+        Cancels the running login
+    finish_login() -> None
+        Handles the result of the login, gives pop up if connection to server failed or the login wasn't correct
+    play_offline() -> None
+        Starts the app without a connection
+    destroy_login_widgets() -> None
+        Destroys the widgets of the login/register screen
+    start_game(challenge: dict = None) -> None
         Starts the game if there is no game running
         Is triggert by the start button in the main window
+    request_challenge() -> None
+        Requests the seed of the daily challenge
     show_end_msg() -> None
         Shows a pop up at the end of the game
         Shows the reached score and if it is a new highscore
+    request_game_history() -> None
+        Requests the last games and the statistics of the user
+    show_game_history(data: dict) -> None
+        Shows a pop up with the last games and the statistics of the user
     create_table() -> None
         Creats the highscore table
     update_highscore_table(data: dict) -> None
         Updates the highscore table
-    show_buttons() -> None
-        Creating and showing the buttons needed for the game
+    request_highscore_table() -> None
+        Requests the selected leaderboard
+    select_window(event: tkinter.Event) -> None
+        Shows the leaderboard that was selected in the window select
+    select_mode(event: tkinter.Event) -> None
+        Sets the duration of the next game to the mode that was selected in the mode select
+    edit_group() -> None
+        Asks the user for a group to join or leave
+    update_groups(data: dict) -> None
+        Adds the leaderboards of the groups of the user to the window select
+    table_scrolled(first: str, last: str) -> None
+        Updates the scrollbar and requests the next page if the end of the table is visible
+    add_highscore_page(page_request: Future) -> None
+        Adds a page of the leaderboard to the end of the highscore table
+    show_buttons(grid_size: tuple[int, int] = None) -> None
+        Creating and showing the target grid of the game
     calculate_stats() -> None
-        Calculates the stats of the last game
+        Gets the stats of the last game from the engine
     reset_stats() -> None
         Resets the current game stats
+    conn_lost() -> None
+        Starts reconnecting when the connection to the server was lost
+    show_reconnect_progress() -> None
+        Shows when the client tries to reconnect
+    request_sync() -> None
+        Requests the leaderboard and the own highscore at once
+    flush_journal() -> None
+        Sends the games of the journal to the server
+    games_submitted(data: dict) -> None
+        Removes the games the server processed from the journal and sends the next ones
+    server_busy(data: dict) -> None
+        Keeps a game the server rejected because it was busy and sends it again later
+    send_highscore() -> None
+        Sends the last highscore again after the server was busy
+    finish_reconnect() -> None
+        Synchronizes the state when the client is logged in again (closes the app if the server refused the login)
     exit_app() -> None
         Show pop up if user really want's to exit the app
         Sends the server a command to close the connection
         Closes the window
     """
 
-    def __init__(self, window: tkinter.Tk, window_title: str) -> None:
+    GRID_WIDTH = 260
+    GRID_HEIGHT = 300
+    RANKED_GRID = (3, 3)
+
+    def __init__(self, window: tkinter.Tk, window_title: str, trace_path: str = None, cache_path: str = "useless_gui_cache.json", \
+                 journal_path: str = "useless_gui_journal.jsonl", grid_size: tuple[int, int] = (3, 3)) -> None:
         """
         Initialize a new App
 
@@ -133,12 +257,22 @@ class App:
             The window to show the app
         window_title : str
             The name of the Window
+        trace_path : str (default: None)
+            Every request is traced and written to this span file (no tracing if None)
+        cache_path : str (default: "useless_gui_cache.json")
+            The file the last leaderboard and own highscore are cached in
+        journal_path : str (default: "useless_gui_journal.jsonl")
+            The file the games are stored in while the client isn't connected
+        grid_size : tuple[int, int] (default: (3, 3))
+            The number of rows and columns of the target grid
 
         Returns
         -------
         None
         """
-        self.client = NetworkClient()
+        self.client = NetworkClient(TraceExporter(trace_path) if trace_path else None)
+        self.cache = LocalCache(cache_path)
+        self.journal = GameJournal(journal_path)
 
         self.window: tkinter.Tk = window
         self.window.title(window_title)
@@ -146,6 +280,14 @@ class App:
         self.login_status: bool = False
         self.app_running: bool = True
         self.username: str = ""
+        self.login_request: Future | None = None
+        self.login_cancelled: bool = False
+        self.reconnect_request: Future | None = None
+        self.login_register: bool = False
+        self.journal_request: Future | None = None
+        self.last_game: dict | None = None
+        self.last_highscore: dict | None = None
+        self.grid_size: tuple[int, int] = grid_size
 
         #creating and placing the exit button
         self.exit_button = tkinter.Button(self.window, name="exit_button", text="Exit", command=self.exit_app, height=2, width=10)
@@ -166,20 +308,53 @@ class App:
         self.highscore_accuracy: float = 0
         self.rating: float = 0
         self.highest_rating: float = 0
-
+        self.rank: int = 0
+        self.clicks: dict[str, list] = {"hits": [], "misses": []}
+
+        self.next_page: list[float, str] | None = None
+        self.page_request: Future | None = None
+        self.leaderboard_window: str = "all_time"
+        self.window_names: dict[str, str] = {"All time": "all_time", "Today": "daily", "This week": "weekly", \
+                                             "10 s mode": "mode_10", "30 s mode": "mode_30", "60 s mode": "mode_60"}
+        self.groups: list[str] = []
+        self.group_codes: dict[str, str] = {}
         self.create_table()
-        self.client.send_to_server("REQUEST_HIGHSCORE_TABLE",self.username)
 
-        #requests the own all time highscore to compare it with the current scores
-        self.client.send_to_server("REQUEST_OWN_HIGHSCORE", self.username)
+        #the cached leaderboard and own highscore are shown until the server answers
+        if self.cache.get("highscores"):
+            self.update_highscore_table(self.cache.get("highscores"))
+        if self.cache.get(f"own_highscore:{self.username}"):
+            self.get_own_highscore(self.cache.get(f"own_highscore:{self.username}"))
+
+        #requests the highscore table, the own all time highscore (to compare it with the current scores) and the groups at once
+        #the server only sends the table and the highscore if they changed since the cached version
+        self.client.send_batch_to_server(self.username, [("REQUEST_HIGHSCORE_TABLE", {"if_version": self.cache.version("highscores")}), \
+                                                         ("REQUEST_OWN_HIGHSCORE", {"if_version": self.cache.version(f"own_highscore:{self.username}")}), \
+                                                         ("REQUEST_GROUPS", {})])
+        #offline the client connects in the background, the games are stored in the journal until then
+        if self.client.connected:
+            self.flush_journal()
+        else:
+            self.conn_lost()
 
         self.show_buttons()
         #creating and placing the start button
         self.start_button = tkinter.Button(self.window, name="start_button", text="Start", command=self.start_game, height=2, width=10)
         self.start_button.place(x=50, y=400)
+        #creating and placing the stats button
+        self.stats_button = tkinter.Button(self.window, name="stats_button", text="Stats", command=self.request_game_history, height=2, width=10)
+        self.stats_button.place(x=170, y=400)
+        #creating and placing the challenge button (the daily challenge has the same targets for every player)
+        self.challenge_button = tkinter.Button(self.window, name="challenge_button", text="Challenge", command=self.request_challenge, height=2, width=10)
+        self.challenge_button.place(x=50, y=450)
         #creating and placing the time label (shows the time left in the game)
         self.time_label = tkinter.Label(self.window, name="start_label", text=f"Time: {self.duration}", height=2, width=10)
         self.time_label.place(x=300, y=400)
+        #creating and placing the mode select (every game duration has its own leaderboard)
+        self.mode_select = ttk.Combobox(self.window, name="mode_select", values=["10 s", "30 s", "60 s"], state="readonly", width=5)
+        self.mode_select.current(0)
+        self.mode_select.bind("<<ComboboxSelected>>", self.select_mode)
+        self.mode_select.place(x=400, y=410)
         #replacing the exit button
         self.exit_button.place(x=550, y=400)
 
@@ -201,13 +376,30 @@ class App:
         """
         #timestamp of the last highscore request
         last_highscore_request = time.time()
+        #timestamp of the last heartbeat
+        last_heartbeat = time.time()
         #mainloop
         while self.app_running:
-            #request highscore table every 30 seconds
-            if last_highscore_request + 30 <= time.time():
-                self.client.send_to_server("REQUEST_HIGHSCORE_TABLE",self.username)
+            #the server disconnects clients that don't send heartbeats
+            if last_heartbeat + self.client.heartbeat_interval <= time.time():
+                self.client.send_to_server("HEARTBEAT", self.username)
+                last_heartbeat = time.time()
+
+            #request highscore table every 30 seconds (not while the user is scrolling through the table)
+            if last_highscore_request + 30 <= time.time() and self.highscore_talbe.yview()[0] == 0:
+                self.request_highscore_table()
+                #games the server didn't process (e.g. it was busy) are sent again
+                self.flush_journal()
                 last_highscore_request = time.time()
 
+            #the client reconnects in the background
+            if self.reconnect_request is not None:
+                self.show_reconnect_progress()
+                if self.reconnect_request.done():
+                    self.finish_reconnect()
+                    if not self.app_running:
+                        break
+
             self.handle_server_commands()
             
             self.window.update()
@@ -227,16 +419,76 @@ class App:
         """
         if not self.client.que.empty():
             recv: dict = self.client.que.get()
+            #resolves the request the command answers
+            self.client.resolve(recv)
 
             match recv.get("command"):
                 case "UPDATE_HIGHSCORE_TABLE":
-                    self.update_highscore_table(recv)
+                    self.cache.store("highscores", recv)
+                    #the all time leaderboard is only shown if it is selected
+                    if self.leaderboard_window == "all_time":
+                        self.update_highscore_table(recv)
+
+                case "NOT_MODIFIED":
+                    #the cached table is still up to date (another leaderboard could be shown since it was requested)
+                    if recv.get("request") in ("REQUEST_HIGHSCORE_TABLE", "REQUEST_SYNC") and self.leaderboard_window == "all_time":
+                        self.update_highscore_table(self.cache.get("highscores"))
+
+                case "SYNC":
+                    #the state after a reconnect, is stored like the single responses
+                    own = recv.get("own")
+                    self.cache.store("highscores", {"command": "UPDATE_HIGHSCORE_TABLE", "highscores": recv.get("highscores"), "version": recv.get("version")})
+                    self.cache.store(f"own_highscore:{self.username}", {"command": "OWN_HIGHSCORE", "rating": own[0], "score": own[1], \
+                                                                        "accuracy": own[2], "time": own[3], "rank": own[4], "version": recv.get("version")})
+                    self.get_own_highscore(self.cache.get(f"own_highscore:{self.username}"))
+                    if self.leaderboard_window == "all_time":
+                        self.update_highscore_table(self.cache.get("highscores"))
+                    else:
+                        self.request_highscore_table()
+
+                case "WINDOW_LEADERBOARD":
+                    if recv.get("window") == self.leaderboard_window:
+                        self.update_highscore_table(recv)
+
+                case "MODE_LEADERBOARD":
+                    if f"mode_{recv.get('duration')}" == self.leaderboard_window:
+                        self.update_highscore_table(recv)
+                        own = recv.get("own")
+                        self.rank_label.config(text=f"Your rank ({recv.get('duration')} s): {own[4] if own else '-'}")
+
+                case "GROUPS":
+                    self.update_groups(recv)
+
+                case "GROUP_LEADERBOARD":
+                    if f"group:{recv.get('group')}" == self.leaderboard_window:
+                        self.update_highscore_table(recv)
+                        self.rank_label.config(text=f"Your rank ({recv.get('group')}): {recv.get('rank') or '-'}")
 
                 case "OWN_HIGHSCORE":
+                    self.cache.store(f"own_highscore:{self.username}", recv)
                     self.get_own_highscore(recv)
 
+                case "GAME_HISTORY":
+                    self.show_game_history(recv)
+
+                case "GAMES_SUBMITTED":
+                    self.games_submitted(recv)
+
+                case "CHALLENGE":
+                    self.start_game(recv)
+
+                case "BUSY":
+                    self.server_busy(recv)
+
+                case "SCORE_REJECTED":
+                    tkinter.messagebox.showwarning("SCORE REJECTED", message="The server didn't accept your last game:\n" + \
+                                                   "\n".join(recv.get("reasons")))
+
                 case "CONNECTION_LOST":
                     self.conn_lost()
+
+            #the command is applied to the UI
+            self.client.finish_trace(recv)
 #------------------------MAINLOOP-----------------------#
 
 
@@ -283,10 +535,20 @@ class App:
         self.password_entry = tkinter.Entry(self.window, show="*", name="password_entry", font=('Arial 15'))
         self.password_entry.place(x=120, y=175)
 
-        #mainloop for login screen
+        #shows the progress of the login (the cancel button is only placed while a login is running)
+        self.login_progress_label = tkinter.Label(self.window, name="login_progress_label", text="", font=('Arial 10'))
+        self.login_progress_label.place(x=10, y=320)
+
+        self.cancel_button = tkinter.Button(self.window, name="cancel_button", text="cancel", command=self.cancel_login, height=2, width=10)
+
+        #mainloop for login screen (the login runs in the background, so the window stays responsive)
         while not self.login_status:
             if not self.app_running:
                 exit()
+            if self.login_request is not None:
+                self.show_login_progress()
+                if self.login_request.done():
+                    self.finish_login()
             self.window.update()
 
 
@@ -306,7 +568,7 @@ class App:
     def login(self) -> None:
         """
         Method triggerd by the login button when user is in the login screen
-        Calls the setup_connection method and destroys the widgets that are no longer needed
+        Calls the setup_connection method (the widgets are destroyed by finish_login when the login was successful)
 
         Parameters
         ----------
@@ -317,17 +579,6 @@ class App:
         None
         """
         self.setup_connection(register=False)
-        
-        #destroying the widgets needed for the login screen when login was successful
-        if self.login_status:
-            self.login_button.destroy()
-            self.register_button.destroy()
-            self.username_entry.destroy()
-            self.username_label.destroy()
-            self.password_entry.destroy()
-            self.password_label.destroy()
-            self.login_heading.destroy()
-            self.login_subheading.destroy()
 
 
     def register_window(self) -> None:
@@ -358,7 +609,7 @@ class App:
     def register(self) -> None:
         """
         Method triggerd by the register button when user is in the register screen
-        Calls the setup_connection method and destroys the widgets that are no longer needed
+        Calls the setup_connection method (the widgets are destroyed by finish_login when the login was successful)
         The user is loged in automatically
 
         Parameters
@@ -371,23 +622,10 @@ class App:
         """
         self.setup_connection(register=True)
 
-        #destroying the widgets needed for the register screen when login was successful
-        if self.login_status:
-            self.login_button.destroy()
-            self.register_button.destroy()
-            self.username_entry.destroy()
-            self.username_label.destroy()
-            self.password_entry.destroy()
-            self.password_label.destroy()
-            self.password_confirm_entry.destroy()
-            self.password_confirm_label.destroy()
-            self.login_heading.destroy()
-            self.login_subheading.destroy()
-
 
     def setup_connection(self, register: bool) -> None:
         """
-        Tries to connect to server and gives pop up if connection to server failed or the login wasn't correct
+        Starts the login in the background (finish_login gives pop up if connection to server failed or the login wasn't correct)
 
         Parameters
         ----------
@@ -412,33 +650,147 @@ class App:
                 return
 
 
-        #checks if there is already a connection
-        if not self.client.connected:
-            #tries to connect to the server 
-            status, reason = self.client.connect_to_server(self.username, self.password_entry.get(), register)
+        #checks if there is already a connection or a login running (a second click doesn't send a second login)
+        if not self.client.connected and self.login_request is None:
+            #the login runs in a thread, the login loop calls finish_login when the server answered
+            self.login_cancelled = False
+            self.login_register = register
+            self.login_request = self.client.connect_in_background(self.username, self.password_entry.get(), register)
+            self.login_button.config(state=tkinter.DISABLED)
+            self.register_button.config(state=tkinter.DISABLED)
+            self.cancel_button.place(x=290, y=350)
 
-            #if the connection is refused, a error pop up will show
-            if isinstance(status, ConnectionRefusedError):
-                tkinter.messagebox.showerror("CONNECTION FAILED", message="Couldn't connect to server!")
-    
-            #if the login credentials were wrong a error pop up will show
-            elif status == False:
-                tkinter.messagebox.showerror("LOGIN FAILED", message=f"{reason}")
-        
-            elif status == True:
-                self.login_status = True
+
+    def show_login_progress(self) -> None:
+        """
+        Shows the progress of the running login in the login screen
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.login_cancelled:
+            text = "Cancelling..."
+        else:
+            text = {"connecting": "Connecting to the server...", "logging_in": "Logging in..."}.get(self.client.connect_state, "")
+        if self.login_progress_label.cget("text") != text:
+            self.login_progress_label.config(text=text)
+
+
+    def cancel_login(self) -> None:
+        """
+        Cancels the running login (finish_login is called as soon as the thread of the login returned)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.login_request is not None:
+            self.login_cancelled = True
+            self.client.cancel_connect()
+
+
+    def finish_login(self) -> None:
+        """
+        Handles the result of the login (is called by the login loop when the login request is done)
+        Gives pop up if connection to server failed or the login wasn't correct
+        Starts the listener and destroys the widgets of the login/register screen if the login was successful
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        status, reason = self.login_request.result()
+        self.login_request = None
+        self.cancel_button.place_forget()
+        self.login_progress_label.config(text="")
+        self.login_button.config(state=tkinter.NORMAL)
+        self.register_button.config(state=tkinter.NORMAL)
+
+        #a login that was done before it could be cancelled is kept
+        if status == True:
+            self.client.start_listener()
+            self.login_status = True
+            self.destroy_login_widgets()
+
+        elif self.login_cancelled:
+            return
+
+        #if the login credentials were wrong a error pop up will show
+        elif status == False:
+            tkinter.messagebox.showerror("LOGIN FAILED", message=f"{reason}")
+
+        #if the server didn't answer in time or the connection is refused, a error pop up will show
+        else:
+            title = "CONNECTION TIMED OUT" if isinstance(status, TimeoutError) else "CONNECTION FAILED"
+            message = f"{reason}" if isinstance(status, TimeoutError) else "Couldn't connect to server!"
+            #an existing account can be played offline (a new account has to be registered first)
+            if self.login_register:
+                tkinter.messagebox.showerror(title, message=message)
+            elif tkinter.messagebox.askyesno(title, message=message + "\nDo you want to play offline? Your games are sent when the server is reachable again."):
+                self.play_offline()
+
+
+    def play_offline(self) -> None:
+        """
+        Starts the app without a connection (the client logs in with the typed credentials when the server is reachable)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.client.prepare_offline(self.username, self.password_entry.get())
+        self.login_status = True
+        self.destroy_login_widgets()
+
+
+    def destroy_login_widgets(self) -> None:
+        """
+        Destroys the widgets of the login/register screen
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        for widget in ("login_button", "register_button", "cancel_button", "login_progress_label", "username_entry", "username_label", \
+                       "password_entry", "password_label", "password_confirm_entry", "password_confirm_label", "login_heading", "login_subheading"):
+            #the confirm widgets only exist if the user was in the register screen
+            if hasattr(self, widget):
+                getattr(self, widget).destroy()
 #-------------------------LOGIN-------------------------#
 
 
 #-------------------------GAME--------------------------#
-    def start_game(self) -> None:
+    def start_game(self, challenge: dict = None) -> None:
         """
         Starts the game
         Is triggert by the start button in the main window
+        Is triggert by CHALLENGE (the daily challenge is played with the seed, grid and duration of the server)
 
         Parameters
         ----------
-        None
+        challenge : dict (default: None)
+            The daily challenge with date, seed, time, rows and cols (a normal game with a random seed if None)
 
         Returns
         -------
@@ -449,32 +801,66 @@ class App:
         if not self.game_running:
             #resetting the current stats
             self.reset_stats()
-            start_time = time.time()
+            #everybody plays the challenge on the same grid, the grid of the user is shown again in the next normal game
+            grid_size = (challenge["rows"], challenge["cols"]) if challenge else self.grid_size
+            if grid_size != (self.target_grid.rows, self.target_grid.cols):
+                self.target_grid.canvas.destroy()
+                self.show_buttons(grid_size)
+
+            if challenge:
+                self.engine.duration = challenge["time"]
+                self.engine.start(seed=challenge["seed"], challenge=challenge["date"])
+            else:
+                self.engine.duration = self.duration
+                self.engine.start()
             self.game_running = True
 
-            #Runs the game as long as the timer is runnning
-            while start_time + self.duration >= time.time():
-                #pick a random button and changes its color
-                random_button: GameButton = random.choice(self.buttons)
-                random_button.change_color()
-
-                #Updates the screen and waits until the right button is pressed
-                while random_button.highlighted == True and start_time + self.duration >= time.time():
-                    #updating the time label
-                    time_left = str(int(self.duration-(time.time()-start_time)))
+            time_left = None
+            #Runs the game as long as the timer is runnning (the engine highlights a new target when the last one was hit)
+            while self.engine.tick():
+                #updating the time label (only if the shown second changed)
+                if int(self.engine.time_left()) != time_left:
+                    time_left = int(self.engine.time_left())
                     self.time_label.config(text=f"Time: {time_left}")
-                    self.window.update()
-                
+                #only the targets that changed since the last frame are redrawn
+                self.target_grid.show(self.engine.highlighted)
+                self.target_grid.redraw()
+                #the clicks on the targets are passed to the engine while the window is updated
+                self.window.update()
+
             self.calculate_stats()
             self.game_running = False
-            random_button.reset_button()
+            self.target_grid.show(None)
+            self.target_grid.redraw()
             self.show_end_msg()
 
 
+    def request_challenge(self) -> None:
+        """
+        Requests the seed of the daily challenge (the game starts when the server sends CHALLENGE)
+        Is triggert by the challenge button in the main window
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.game_running:
+            return
+        if not self.client.connected:
+            tkinter.messagebox.showinfo(title="Daily challenge", message="The daily challenge can only be played while connected to the server")
+            return
+        self.client.send_to_server("REQUEST_CHALLENGE", self.username)
+
+
     def show_end_msg(self) -> None:
         """
         Shows a pop up at the end of the game
         Shows the reached score and if it is a new highscore
+        (games on another grid than RANKED_GRID are practice and are neither sent nor journaled)
 
         Parameters
         ----------
@@ -484,13 +870,34 @@ class App:
         -------
         None
         """
+        #the leaderboards don't know the grid size, the games on other grids would be ranked against the 3x3 games
+        grid_size = (self.target_grid.rows, self.target_grid.cols)
+        if grid_size != self.RANKED_GRID:
+            tkinter.messagebox.showinfo(title="Practice game", message=f"Your score: {self.score} with an accuracy of {self.accuracy}%\
+                                         \nGames on a {grid_size[0]}x{grid_size[1]} grid aren't ranked")
+            return
+
+        #every game is stored on the server for the statistics
+        connected = self.client.connected
+        game = {"score": self.score, "missed": self.missed_clicks, "accuracy": self.accuracy, "time": self.engine.duration, \
+                "played_at": time.time(), "clicks": self.clicks}
+        if connected:
+            self.last_game = game
+            self.client.send_to_server("GAME_FINISHED", self.username, score = self.score, missed = self.missed_clicks, \
+                                       accuracy = self.accuracy, time = self.engine.duration, clicks = self.clicks)
+        else:
+            #the server checks the highscore of the games in the journal when they are sent
+            self.journal.append(self.username, game)
+
         if self.rating > self.highest_rating:
             self.highscore = self.score
             self.highscore_accuracy = self.accuracy
             self.highest_rating = self.rating
 
-            self.client.send_to_server("NEW_HIGHSCORE", self.username, highscore = self.highscore, \
-                                        accuracy = self.highscore_accuracy, time = self.duration)
+            if connected:
+                self.last_highscore = {"highscore": self.highscore, "accuracy": self.highscore_accuracy, "time": self.engine.duration, \
+                                       "clicks": self.clicks}
+                self.client.send_to_server("NEW_HIGHSCORE", self.username, **self.last_highscore)
 
             tkinter.messagebox.showinfo(title="NEW HIGHSCORE", \
                                                         message=f"Congratulation, you reached a new highscore!\
@@ -498,13 +905,57 @@ class App:
         else:
             tkinter.messagebox.showinfo(title="Game stats", message=f"Your score: {self.score} with an accuracy of {self.accuracy}%\
                                          \nYour highscore: {self.highscore} with an accuracy of {self.highscore_accuracy}%")
+
+
+    def request_game_history(self) -> None:
+        """
+        Requests the last games and the statistics of the user
+        Is triggert by the stats button in the main window
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if not self.game_running:
+            self.client.send_to_server("REQUEST_GAME_HISTORY", self.username, limit = 5)
+
+
+    def show_game_history(self, data: dict) -> None:
+        """
+        Shows a pop up with the last games and the statistics of the user
+
+        Parameters
+        ----------
+        data : dict
+            The data the client receives
+
+        Returns
+        -------
+        None
+        """
+        averages = data.get("averages")
+        if not averages:
+            tkinter.messagebox.showinfo(title="Stats", message="You haven't finished a game yet!")
+            return
+
+        games, avg_score, avg_missed, avg_accuracy = averages
+        median, top_10, top_1 = data.get("percentiles")
+        last_games = "\n".join(f"Score: {game[0]} with an accuracy of {game[2]}%" for game in data.get("games"))
+        tkinter.messagebox.showinfo(title="Stats", message=f"Games played: {games}\
+                                    \nAverage score: {avg_score} with an accuracy of {avg_accuracy}% ({avg_missed} missed)\
+                                    \nMedian score: {median}, top 10%: {top_10}, top 1%: {top_1}\
+                                    \n\nLast games:\n{last_games}")
 #-------------------------GAME--------------------------#
 
 
 #------------------------OTHER--------------------------#
     def get_own_highscore(self, data: dict) -> None:
         """
-        Gets the highscore of the user from the server
+        Gets the highscore and the global rank of the user from the server
 
         Parameters
         ----------
@@ -516,8 +967,10 @@ class App:
         None
         """
         self.highest_rating = data.get("rating")
-        self.highscore = data.get("highscore")
+        self.highscore = data.get("score")
         self.highscore_accuracy = data.get("accuracy")
+        self.rank = data.get("rank")
+        self.rank_label.config(text=f"Your rank: {self.rank}")
 
 
     def create_table(self) -> None:
@@ -532,7 +985,7 @@ class App:
         -------
         None
         """
-        self.highscore_table_label = tkinter.Label(self.window, name="table_label", text="Top 10 highscores", font=('Arial 22'))
+        self.highscore_table_label = tkinter.Label(self.window, name="table_label", text="Highscores", font=('Arial 22'))
         self.highscore_table_label.place(x=400,y=40)
         self.highscore_talbe = ttk.Treeview(self.window, column=("c1", "c2", "c3", "c4"), show='headings')
 
@@ -550,6 +1003,25 @@ class App:
         
         self.highscore_talbe.place(x=330, y=85)
 
+        #the next page is loaded when the end of the table is visible
+        self.table_scrollbar = ttk.Scrollbar(self.window, orient=tkinter.VERTICAL, command=self.highscore_talbe.yview)
+        self.highscore_talbe.configure(yscrollcommand=self.table_scrolled)
+        self.table_scrollbar.place(x=682, y=85, height=227)
+
+        self.rank_label = tkinter.Label(self.window, name="rank_label", text="Your rank: -", font=('Arial 12'))
+        self.rank_label.place(x=330, y=320)
+
+        self.connection_label = tkinter.Label(self.window, name="connection_label", text="", fg="red", font=('Arial 10'))
+        self.connection_label.place(x=330, y=10)
+
+        self.window_select = ttk.Combobox(self.window, name="window_select", values=list(self.window_names), state="readonly", width=10)
+        self.window_select.current(0)
+        self.window_select.bind("<<ComboboxSelected>>", self.select_window)
+        self.window_select.place(x=580, y=50)
+
+        self.group_button = tkinter.Button(self.window, name="group_button", text="Groups", command=self.edit_group, width=8)
+        self.group_button.place(x=600, y=316)
+
 
     def update_highscore_table(self, data: dict) -> None:
         """
@@ -568,15 +1040,21 @@ class App:
         for item in entries:
             self.highscore_talbe.delete(item)
         
-        rows: list[list[str, int, int]] = data.get("highscores") 
+        rows: list[list[str, float, int, float, int]] = data.get("highscores") 
         for row in rows:
             self.highscore_talbe.insert("", tkinter.END, values=row)
-        
 
-    def show_buttons(self) -> None:
+        #the top 10 are the first page of the all time leaderboard (the days and weeks have only one page)
+        if data.get("command") == "UPDATE_HIGHSCORE_TABLE" and len(rows) == 10:
+            self.next_page = [rows[-1][1], rows[-1][0]]
+        else:
+            self.next_page = None
+        self.page_request = None
+
+
+    def request_highscore_table(self) -> None:
         """
-        Creating the buttons needed for the game
-        Showing the buttons on the screen
+        Requests the selected leaderboard
 
         Parameters
         ----------
@@ -586,41 +1064,216 @@ class App:
         -------
         None
         """
-        #a list of all the game buttons
-        self.buttons: list[GameButton] = []
-        #the x and y positions of the buttons
-        x_pos = [50, 130, 210]
-        y_pos = [50, 136, 222]
-        for y in y_pos:
-            for x in x_pos:
-                #creating the buttons and adding them to the list
-                self.buttons.append(GameButton(self.window, x = x, y = y, text = str(len(self.buttons)+1)))
-        
+        if self.leaderboard_window == "all_time":
+            self.client.send_to_server("REQUEST_HIGHSCORE_TABLE", self.username, if_version = self.cache.version("highscores"))
+        elif self.leaderboard_window.startswith("group:"):
+            group = self.leaderboard_window.removeprefix("group:")
+            self.client.send_to_server("REQUEST_GROUP_LEADERBOARD", self.username, group = group)
+        elif self.leaderboard_window.startswith("mode_"):
+            duration = int(self.leaderboard_window.removeprefix("mode_"))
+            self.client.send_to_server("REQUEST_MODE_LEADERBOARD", self.username, duration = duration, count = 50)
+        else:
+            self.client.send_to_server("REQUEST_WINDOW_LEADERBOARD", self.username, window = self.leaderboard_window, count = 50)
 
-    def calculate_stats(self) -> None:
+
+    def select_window(self, event: tkinter.Event) -> None:
         """
-        Calculates the stats of the last game
+        Shows the leaderboard that was selected in the window select
 
         Parameters
         ----------
+        event : tkinter.Event
+            The selection event of the window select
+
+        Returns
+        -------
         None
+        """
+        self.leaderboard_window = self.window_names[self.window_select.get()]
+        #pages of the last leaderboard are ignored
+        self.next_page = None
+        self.page_request = None
+        #the rank label shows the rank of the mode while a mode is selected
+        self.rank_label.config(text=f"Your rank: {self.rank}")
+        self.request_highscore_table()
+
+
+    def select_mode(self, event: tkinter.Event) -> None:
+        """
+        Sets the duration of the next game to the mode that was selected in the mode select
+
+        Parameters
+        ----------
+        event : tkinter.Event
+            The selection event of the mode select
 
         Returns
         -------
         None
         """
-        for button in self.buttons:
-            self.score += button.right_pressed
-            self.missed_clicks += button.false_pressed
-    
-        clicks = self.missed_clicks + self.score
-        try:
-            self.accuracy = round((self.score/clicks) * 100,2)
+        #the duration can't change while a game is running
+        if self.game_running:
+            self.mode_select.set(f"{self.duration} s")
+            return
+
+        self.duration = int(self.mode_select.get().removesuffix(" s"))
+        self.time_label.config(text=f"Time: {self.duration}")
+
 
-        except ZeroDivisionError:
-            self.accuracy = 0
+    def edit_group(self) -> None:
+        """
+        Asks the user for a group to join or leave (the user leaves the group if he is already a member)
+        Joining an existing group needs its invite code (the codes of the groups of the user are shown to share them)
+        Is triggert by the group button in the main window
+
+        Parameters
+        ----------
+        None
 
-        self.rating = round((self.score*self.accuracy)/(100*self.duration), 3)
+        Returns
+        -------
+        None
+        """
+        group = tkinter.simpledialog.askstring("Groups", "Enter a group to join (or one of your groups to leave it):" + \
+                                               "".join(f"\n- {name} (invite code: {self.group_codes.get(name)})" for name in self.groups), \
+                                               parent=self.window)
+        if not group or not group.strip():
+            return
+
+        group = group.strip()
+        if group in self.groups:
+            self.client.send_to_server("LEAVE_GROUP", self.username, group = group)
+        else:
+            #an existing group can only be joined with the invite code of one of its members
+            code = tkinter.simpledialog.askstring("Groups", f"Enter the invite code of {group} (empty to create a new group):", parent=self.window)
+            if code is None:
+                return
+            self.client.send_to_server("JOIN_GROUP", self.username, group = group, code = code.strip())
+
+
+    def update_groups(self, data: dict) -> None:
+        """
+        Adds the leaderboards of the groups of the user to the window select (and removes the left ones)
+
+        Parameters
+        ----------
+        data : dict
+            The data the client receives
+
+        Returns
+        -------
+        None
+        """
+        if data.get("reason"):
+            tkinter.messagebox.showwarning("GROUPS", message=data.get("reason"))
+
+        self.groups = data.get("groups", [])
+        self.group_codes = data.get("codes", {})
+        self.window_names = {name: window for name, window in self.window_names.items() if not window.startswith("group:")}
+        for group in self.groups:
+            self.window_names[f"Group: {group}"] = f"group:{group}"
+        self.window_select.config(values=list(self.window_names))
+
+        #a left group can't be shown anymore
+        if self.leaderboard_window not in self.window_names.values():
+            self.window_select.current(0)
+            self.select_window(None)
+
+
+    def table_scrolled(self, first: str, last: str) -> None:
+        """
+        Updates the scrollbar and requests the next page if the end of the table is visible
+        Is called by the highscore table when the visible part changes
+
+        Parameters
+        ----------
+        first : str
+            The position of the top of the visible part (0 to 1)
+        last : str
+            The position of the bottom of the visible part (0 to 1)
+
+        Returns
+        -------
+        None
+        """
+        self.table_scrollbar.set(first, last)
+
+        if float(last) >= 1 and self.next_page and not self.page_request:
+            self.page_request = self.client.send_to_server("REQUEST_HIGHSCORE_PAGE", self.username, page_size = 20, after = self.next_page)
+            self.page_request.add_done_callback(self.add_highscore_page)
+
+
+    def add_highscore_page(self, page_request: Future) -> None:
+        """
+        Adds a page of the leaderboard to the end of the highscore table
+        Is called when the response to the page request is received
+
+        Parameters
+        ----------
+        page_request : Future
+            The resolved request of the page
+
+        Returns
+        -------
+        None
+        """
+        #the page is outdated if the table was updated after requesting it
+        if page_request is not self.page_request:
+            return
+
+        #the page is requested again when the user scrolls (also if the client wasn't connected)
+        if page_request.exception() is not None or page_request.result().get("command") == "BUSY":
+            self.page_request = None
+            return
+        data: dict = page_request.result()
+
+        rows: list[list[str, float, int, float, int]] = data.get("highscores")
+        for row in rows:
+            self.highscore_talbe.insert("", tkinter.END, values=row)
+
+        self.next_page = data.get("after")
+        self.page_request = None
+        
+
+    def show_buttons(self, grid_size: tuple[int, int] = None) -> None:
+        """
+        Creating the target grid of the game (grid_size targets on one canvas)
+        Showing the grid on the screen
+
+        Parameters
+        ----------
+        grid_size : tuple[int, int] (default: None)
+            The number of rows and columns (the grid_size of the app if None)
+
+        Returns
+        -------
+        None
+        """
+        #the grid fills the space left of the highscore table, the size of the targets depends on the number of rows and columns
+        rows, cols = grid_size or self.grid_size
+        self.engine = GameEngine(targets=rows * cols, duration=self.duration)
+        self.target_grid = TargetGrid(self.window, x=50, y=50, width=self.GRID_WIDTH, height=self.GRID_HEIGHT, command=self.engine.click, \
+                                      rows=rows, cols=cols)
+
+    def calculate_stats(self) -> None:
+        """
+        Gets the stats of the last game from the engine
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        result = self.engine.result()
+        self.score = result["score"]
+        self.missed_clicks = result["missed"]
+        self.accuracy = result["accuracy"]
+        self.rating = result["rating"]
+        #the times are relative to the start of the game
+        self.clicks = result["clicks"]
  
 
     def reset_stats(self) -> None:
@@ -637,14 +1290,11 @@ class App:
         """
         self.score = 0
         self.missed_clicks = 0
-        for button in self.buttons:
-            button.right_pressed = 0
-            button.false_pressed = 0
        
 
     def conn_lost(self) -> None:
         """
-        Show pop up that the connection to the server was lost
+        Starts reconnecting when the connection to the server was lost (the app keeps running)
 
         Parameters
         ----------
@@ -654,19 +1304,16 @@ class App:
         -------
         None
         """
-        tkinter.messagebox.showwarning("CONNECTION LOST", message="The connection to the server is lost! \
-                                       \nThe app is going to close.")
-        self.app_running = False
-        self.window.destroy()
-        self.client.listener.terminate()
-        self.client.client_socket.close()
+        if self.reconnect_request is not None:
+            return
+        self.client.connection_lost()
+        self.reconnect_request = self.client.reconnect_in_background()
+        self.connection_label.config(text="Offline, reconnecting...")
 
 
-    def exit_app(self) -> None:
+    def show_reconnect_progress(self) -> None:
         """
-        Show pop up if user really want's to exit the app
-        Sends the server a command to close the connection
-        Closes the window
+        Shows when the client tries to reconnect
 
         Parameters
         ----------
@@ -676,88 +1323,113 @@ class App:
         -------
         None
         """
-        if tkinter.messagebox.askyesno(title="EXIT", message="Do you really want to exit the app?"):
-            if self.login_status:
-                self.client.send_to_server("CLOSE_CONNECTION", self.username)
-                self.client.listener.terminate()
-                
-            self.app_running = False
-            self.window.destroy()
-            self.client.client_socket.close()
-#------------------------OTHER--------------------------#
+        if self.client.connect_state == "waiting":
+            text = f"Offline, reconnecting in {max(self.client.next_reconnect - time.time(), 0):.0f} s " + \
+                   f"(attempt {self.client.reconnect_attempt})"
+        else:
+            text = f"Offline, reconnecting... (attempt {self.client.reconnect_attempt})"
+        if self.connection_label.cget("text") != text:
+            self.connection_label.config(text=text)
 
-class GameButton:
-    """
-    A class to represent and interact with the game button
 
-    ...
+    def request_sync(self) -> None:
+        """
+        Requests the leaderboard and the own highscore at once
 
-    Attributes
-    ----------
-    button : tkinter.Button
-        The button object of tkinter
-    highlighted : bool
-        The current status of the button
-    false_pressed : int
-        A counter for the wrong clicks in a game
-    right_pressed : int
-        A counter for the correct clicks in a game
+        Parameters
+        ----------
+        None
 
-    Methods
-    -------
-    change_color() -> None
-        Changes the color of the button to read and the highlited status to True
-    def check_status() -> None
-        Checks if button is highlighted, updates the counters and resets the button if status was True
-    reset_button() -> None
-        Resets the button to the basic color and sets the highlighted status to Flase
-    """
-    def __init__(self, window: tkinter.Tk, x: int, y: int, text: str) -> None:
+        Returns
+        -------
+        None
         """
-        Initialize a new GameButton
+        #the server only sends them if they changed since they were cached
+        cached = self.cache.version("highscores")
+        if_version = cached if cached == self.cache.version(f"own_highscore:{self.username}") else None
+        self.client.send_to_server("REQUEST_SYNC", self.username, if_version = if_version)
+
+
+    def flush_journal(self) -> None:
+        """
+        Sends the games of the journal to the server (the next games are sent when the server processed them)
 
         Parameters
         ----------
-        window : tkinter.TK
-            The window in which the button should show up
-        x : int
-            The x-coordinate of the button
-        y : int
-            The y-coordinate of the button
-        text : str
-            The text that should be on the button
-            
+        None
+
         Returns
         -------
         None
         """
-        self.button: tkinter.Button = tkinter.Button(window, text=text, command=self.check_status, height=5, width=10)
-        self.button.place(x=x, y=y)
-        self.highlighted: bool = False
-        self.false_pressed: int = 0
-        self.right_pressed: int = 0
+        if not self.client.connected or (self.journal_request is not None and not self.journal_request.done()):
+            return
+        #the server processes at most 100 games at once
+        games = self.journal.pending(self.username)[:100]
+        if games:
+            self.journal_request = self.client.send_to_server("SUBMIT_GAMES", self.username, games = games)
+
 
-    def change_color(self) -> None:
+    def games_submitted(self, data: dict) -> None:
         """
-        Changes the color of the button to read and the highlited status to True
+        Removes the games the server processed from the journal and sends the next ones
 
         Parameters
         ----------
+        data : dict
+            The data the client receives
+
+        Returns
+        -------
         None
+        """
+        self.journal.remove(data.get("ids") or [])
+        self.journal_request = None
+        if data.get("rejected"):
+            tkinter.messagebox.showwarning("SCORE REJECTED", message=f"The server didn't accept {len(data.get('rejected'))} of your offline games:\n" + \
+                                           "\n".join(sorted({reason for reasons in data.get("rejected").values() for reason in reasons})))
+
+        if self.journal.pending(self.username):
+            self.flush_journal()
+        else:
+            #the highscore and the leaderboard can be changed by the offline games
+            self.request_sync()
+
+
+    def server_busy(self, data: dict) -> None:
+        """
+        Keeps a game the server rejected because it was busy and sends it again later
+        (a finished game is journaled and sent with SUBMIT_GAMES, a highscore and the journal are sent again after retry_after)
+
+        Parameters
+        ----------
+        data : dict
+            The data the client receives
 
         Returns
         -------
         None
         """
-        self.highlighted = True
-        self.button.config(bg="red")
+        delay = int(max(data.get("retry_after") or 1, 0) * 1000)
+        match data.get("request"):
+            case "GAME_FINISHED" if self.last_game is not None:
+                #the journal keeps the game until the server stored it (also if the app is closed in between)
+                self.journal.append(self.username, self.last_game)
+                self.last_game = None
+                self.window.after(delay, self.flush_journal)
+
+            case "NEW_HIGHSCORE" if self.last_highscore is not None:
+                self.window.after(delay, self.send_highscore)
+
+            case "SUBMIT_GAMES":
+                #the games stay in the journal
+                self.journal_request = None
+                self.window.after(delay, self.flush_journal)
 
-    def check_status(self) -> None:
+
+    def send_highscore(self) -> None:
         """
-        Is triggert if the button is clicked
-        Checks if button is highlighted
-            if its highlighted the counter of the correct presses increases by 1 and resets button
-            if its NOT highlighted the counter of the wrong presses increases by 1
+        Sends the last highscore again after the server was busy (it is kept until the next highscore is reached)
 
         Parameters
         ----------
@@ -767,17 +1439,14 @@ class GameButton:
         -------
         None
         """
-        if self.highlighted == True:
-            self.right_pressed += 1
-            self.reset_button()
-        else: 
-            self.false_pressed += 1
+        if self.client.connected and self.last_highscore is not None:
+            self.client.send_to_server("NEW_HIGHSCORE", self.username, **self.last_highscore)
+
 
-    def reset_button(self) -> None:
+    def finish_reconnect(self) -> None:
         """
-        Resets the button to the basic color and sets the highlighted status to Flase
-        Is called at the end of the game
-        Is called if user presses the button and the button is highlighted
+        Synchronizes the leaderboard and the own highscore when the client is logged in again
+        Show pop up that the connection to the server was lost and closes the app if the server refused the login
 
         Parameters
         ----------
@@ -787,5 +1456,53 @@ class GameButton:
         -------
         None
         """
-        self.highlighted = False
-        self.button.config(bg="SystemButtonFace")
+        status, reason = self.reconnect_request.result()
+        self.reconnect_request = None
+
+        if status == True:
+            self.client.start_listener()
+            self.connection_label.config(text="")
+            #the games played offline are sent first, the state is synchronized when the server processed all of them
+            self.journal_request = None
+            if self.journal.pending(self.username):
+                self.flush_journal()
+            else:
+                self.request_sync()
+            return
+
+        tkinter.messagebox.showwarning("CONNECTION LOST", message=f"The connection to the server is lost! ({reason}) \
+                                       \nThe app is going to close.")
+        self.app_running = False
+        self.window.destroy()
+        #offline the listener was never started (terminate fails on a process that wasn't started)
+        if self.client.listener.is_alive():
+            self.client.listener.terminate()
+        self.client.client_socket.close()
+
+
+    def exit_app(self) -> None:
+        """
+        Show pop up if user really want's to exit the app
+        Sends the server a command to close the connection
+        Closes the window
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if tkinter.messagebox.askyesno(title="EXIT", message="Do you really want to exit the app?"):
+            if self.login_status:
+                self.client.send_to_server("CLOSE_CONNECTION", self.username)
+            #offline the listener was never started (terminate fails on a process that wasn't started)
+            if self.client.listener.is_alive():
+                self.client.listener.terminate()
+                
+            self.app_running = False
+            self.window.destroy()
+            self.client.client_socket.close()
+            if self.client.tracer:
+                self.client.tracer.close()
@@ -0,0 +1,157 @@
+"""
+In this file the journal of the games that couldn't be sent to the server is defined
+Every game is a line of a jsonl file that is synced to the disk before the game is counted as saved,
+the games are sent with SUBMIT_GAMES when the client is connected again and removed when the server processed them
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import os
+import json
+
+
+class GameJournal:
+    """
+    A class to store finished games on disk until the server processed them
+
+    Entries
+    -------
+    id : str
+        A random id of the game (the server sends it back when the game is processed)
+    user : str
+        The name of the user who played the game
+    score, missed, accuracy, time, clicks :
+        Like in GAME_FINISHED
+    played_at : float
+        The time the game ended (time.time)
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        The path of the journal file
+
+    Methods
+    -------
+    append(username: str, game: dict) -> None
+        Adds a finished game to the journal
+    pending(username: str) -> list[dict]
+        Gets the games of the user that weren't processed by the server yet
+    remove(ids: list[str]) -> None
+        Removes the games the server processed
+    read() -> list[dict]
+        Reads all games of the journal
+    """
+
+    def __init__(self, path: str = "useless_gui_journal.jsonl") -> None:
+        """
+        Initialize a new GameJournal
+
+        Parameters
+        ----------
+        path : str (default: "useless_gui_journal.jsonl")
+            The path of the journal file
+
+        Returns
+        -------
+        None
+        """
+        self.path: str = path
+
+
+    def append(self, username: str, game: dict) -> None:
+        """
+        Adds a finished game to the journal (the game is on the disk when the method returns)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user who played the game
+        game : dict
+            The score, missed clicks, accuracy, time, timestamp (played_at) and clicks of the game
+
+        Returns
+        -------
+        None
+        """
+        line = (json.dumps({"id": os.urandom(8).hex(), "user": username, **game}) + "\n").encode()
+        with open(self.path, "a+b") as file:
+            #a line that was only written partly when the app crashed is ended, so the new game gets its own line
+            if file.seek(0, os.SEEK_END) > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    line = b"\n" + line
+            file.write(line)
+            file.flush()
+            os.fsync(file.fileno())
+
+
+    def pending(self, username: str) -> list[dict]:
+        """
+        Gets the games of the user that weren't processed by the server yet (oldest first)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        : list[dict]
+            The games without the user
+        """
+        return [{key: value for key, value in entry.items() if key != "user"} for entry in self.read() if entry.get("user") == username]
+
+
+    def remove(self, ids: list[str]) -> None:
+        """
+        Removes the games the server processed
+        The remaining games are written to a new file that replaces the journal, so a crash never loses a game
+
+        Parameters
+        ----------
+        ids : list[str]
+            The ids of the processed games
+
+        Returns
+        -------
+        None
+        """
+        ids = set(ids)
+        entries = self.read()
+        remaining = [entry for entry in entries if entry.get("id") not in ids]
+        if len(remaining) == len(entries):
+            return
+
+        with open(self.path + ".tmp", "w") as file:
+            file.writelines(json.dumps(entry) + "\n" for entry in remaining)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(self.path + ".tmp", self.path)
+
+
+    def read(self) -> list[dict]:
+        """
+        Reads all games of the journal
+        (a line that was only written partly when the app crashed is skipped)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : list[dict]
+            All games in the order they were played
+        """
+        entries = []
+        try:
+            with open(self.path) as file:
+                for line in file:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
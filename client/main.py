@@ -1,12 +1,37 @@
 """
 Python 3.10 is needed
 The main file of the client to start the app
+Start it with "--trace traces.jsonl" to write a trace of every request (see tracing.py)
+The last leaderboard is cached in useless_gui_cache.json (change the file with "--cache path", see cache.py)
+Games played while the server is unreachable are stored in useless_gui_journal.jsonl (see journal.py)
+The game is played on a 3x3 grid of targets (change it with "--grid 10x10", see target_grid.py, only the 3x3 games are ranked)
 ~ Hartl Lorenz, Hell Andreas, Holas Christoph
 """
 
 import tkinter
+import argparse
 from game import *
+from target_grid import TargetGrid
 
 
 if __name__ == '__main__':
-    App(tkinter.Tk(), "Useless GUI")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Useless GUI")
+    parser.add_argument("--trace", help="writes a trace of every request to this span file")
+    parser.add_argument("--cache", default="useless_gui_cache.json", help="the file the last leaderboard is cached in")
+    parser.add_argument("--journal", default="useless_gui_journal.jsonl", help="the file the games are stored in while the server is unreachable")
+    parser.add_argument("--grid", default="3x3", help="the number of rows and columns of the targets (ROWSxCOLS)")
+    args = parser.parse_args()
+
+    try:
+        grid_size = tuple(int(size) for size in args.grid.lower().split("x"))
+        if len(grid_size) != 2:
+            raise ValueError
+    except ValueError:
+        parser.error(f"--grid has to be ROWSxCOLS (got {args.grid})")
+    #TargetGrid would only fail after the login
+    try:
+        TargetGrid.check_size(*grid_size, App.GRID_WIDTH, App.GRID_HEIGHT)
+    except ValueError as error:
+        parser.error(f"--grid {args.grid}: {error}")
+
+    App(tkinter.Tk(), "Useless GUI", args.trace, args.cache, args.journal, grid_size)
@@ -0,0 +1,218 @@
+"""
+The headless runner of the client
+Plays games with a bot on a simulated clock (no display and no waiting), reports the stats of the games and the games per second
+and can write the games like they are sent in GAME_FINISHED, so they can be used to load test the server
+
+Usage: python simulate.py [--games 1000] [--grid 3x3] [--duration 10] [--reaction 0.35] [--jitter 0.08] [--miss-rate 0.05] [--seed 1] [--output games.jsonl]
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import json
+import time
+import random
+import argparse
+import statistics
+
+from engine import GameEngine, SimulatedClock
+
+
+class BotPlayer:
+    """
+    A class to click the targets like a human (the input source of a simulated game)
+
+    ...
+
+    Constants
+    ---------
+    MIN_REACTION_TIME : float -> 0.12
+        The fastest reaction of the bot [s] (the server flags faster reactions, see validation.py)
+
+    Attributes
+    ----------
+    reaction : float
+        The average time until the bot clicks [s]
+    jitter : float
+        The standard deviation of the reaction time [s]
+    miss_rate : float
+        The share of clicks on a target that isn't highlighted
+    rng : random.Random
+        Picks the reaction times and the missed targets
+
+    Methods
+    -------
+    next_click(engine: GameEngine) -> tuple[float, int]
+        Gets the time until the next click and the clicked target
+    """
+
+    MIN_REACTION_TIME = 0.12
+
+    def __init__(self, reaction: float = 0.35, jitter: float = 0.08, miss_rate: float = 0.05, rng: random.Random = None) -> None:
+        """
+        Initialize a new BotPlayer
+
+        Parameters
+        ----------
+        reaction : float (default: 0.35)
+            The average time until the bot clicks [s]
+        jitter : float (default: 0.08)
+            The standard deviation of the reaction time [s]
+        miss_rate : float (default: 0.05)
+            The share of clicks on a target that isn't highlighted
+        rng : random.Random (default: None)
+            Picks the reaction times and the missed targets (a new unseeded random.Random if None)
+
+        Returns
+        -------
+        None
+        """
+        self.reaction: float = reaction
+        self.jitter: float = jitter
+        self.miss_rate: float = miss_rate
+        self.rng: random.Random = rng or random.Random()
+
+
+    def next_click(self, engine: GameEngine) -> tuple[float, int]:
+        """
+        Gets the time until the next click and the clicked target
+
+        Parameters
+        ----------
+        engine : GameEngine
+            The running game
+
+        Returns
+        -------
+        : tuple[float, int]
+            The time until the click [s] and the clicked target
+        """
+        delay = max(self.MIN_REACTION_TIME, self.rng.gauss(self.reaction, self.jitter))
+        if engine.targets > 1 and self.rng.random() < self.miss_rate:
+            #a miss is a click on any other target
+            target = self.rng.randrange(engine.targets - 1)
+            return delay, target + (target >= engine.highlighted)
+        return delay, engine.highlighted
+
+
+class HeadlessRunner:
+    """
+    A class to simulate games with a bot (the same GameEngine as in the app, driven by a SimulatedClock)
+
+    ...
+
+    Attributes
+    ----------
+    clock : SimulatedClock
+        The clock of the engine (is advanced by the time until every click)
+    engine : GameEngine
+        The rules of the game
+    bot : BotPlayer
+        The input source of the games
+
+    Methods
+    -------
+    play() -> dict
+        Simulates one game
+    run(games: int) -> list[dict]
+        Simulates multiple games
+    """
+
+    def __init__(self, targets: int = 9, duration: int = 10, bot: BotPlayer = None, seed: int = None) -> None:
+        """
+        Initialize a new HeadlessRunner
+
+        Parameters
+        ----------
+        targets : int (default: 9)
+            The number of targets
+        duration : int (default: 10)
+            The duration of a game [s]
+        bot : BotPlayer (default: None)
+            The input source of the games (a BotPlayer with the default reaction if None)
+        seed : int (default: None)
+            The seed of the targets and the bot (the same seed simulates the same games)
+
+        Returns
+        -------
+        None
+        """
+        rng = random.Random(seed)
+        self.clock: SimulatedClock = SimulatedClock()
+        self.engine: GameEngine = GameEngine(targets, duration, self.clock, random.Random(rng.random()))
+        self.bot: BotPlayer = bot or BotPlayer()
+        if seed is not None:
+            self.bot.rng = random.Random(rng.random())
+
+
+    def play(self) -> dict:
+        """
+        Simulates one game
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : dict
+            The stats of the game like GameEngine.result
+        """
+        self.engine.start()
+        while self.engine.tick():
+            delay, target = self.bot.next_click(self.engine)
+            self.clock.advance(delay)
+            #a click after the end of the game doesn't count
+            if self.engine.time_left() >= 0:
+                self.engine.click(target)
+        return self.engine.result()
+
+
+    def run(self, games: int) -> list[dict]:
+        """
+        Simulates multiple games
+
+        Parameters
+        ----------
+        games : int
+            The number of games
+
+        Returns
+        -------
+        : list[dict]
+            The stats of every game
+        """
+        return [self.play() for _ in range(games)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulates games with a bot without a display")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--grid", default="3x3", help="the number of rows and columns of the targets (ROWSxCOLS)")
+    parser.add_argument("--duration", type=int, default=10, help="the duration of a game [s]")
+    parser.add_argument("--reaction", type=float, default=0.35, help="the average reaction time of the bot [s]")
+    parser.add_argument("--jitter", type=float, default=0.08, help="the standard deviation of the reaction time [s]")
+    parser.add_argument("--miss-rate", type=float, default=0.05, help="the share of clicks on a wrong target")
+    parser.add_argument("--seed", type=int, help="the same seed simulates the same games")
+    parser.add_argument("--output", help="writes every game to this jsonl file (like GAME_FINISHED)")
+    args = parser.parse_args()
+
+    try:
+        rows, cols = (int(size) for size in args.grid.lower().split("x"))
+    except ValueError:
+        parser.error(f"--grid has to be ROWSxCOLS (got {args.grid})")
+    if rows < 1 or cols < 1:
+        parser.error(f"--grid needs at least one row and one column (got {args.grid})")
+
+    runner = HeadlessRunner(rows * cols, args.duration, BotPlayer(args.reaction, args.jitter, args.miss_rate), args.seed)
+    start = time.perf_counter()
+    results = runner.run(args.games)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print(f"[{'SIMULATE':<10}] {args.games} games in {elapsed:.2f}s, {args.games / elapsed:.0f} games/s")
+    if results:
+        for key in ("score", "missed", "accuracy", "rating"):
+            values = [result[key] for result in results]
+            print(f"[{'SIMULATE':<10}] {key:<8}: mean {statistics.fmean(values):.3f}, min {min(values)}, max {max(values)}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.writelines(json.dumps({key: value for key, value in result.items() if key != "rating"}) + "\n" for result in results)
@@ -0,0 +1,254 @@
+"""
+In this file the grid of the game targets is defined
+All targets are rectangles on one canvas: a click is mapped to its target with the cell size (no widget per target)
+and only the targets that changed since the last frame are redrawn, so large grids stay as fast as the 3x3 grid
+The grid only shows the targets and passes the clicks on, the rules of the game are in engine.py
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import tkinter
+
+from typing import Callable
+
+
+class TargetGrid:
+    """
+    A class to show the targets of the game on a canvas and pass the clicks on them to the game
+
+    ...
+
+    Constants
+    ---------
+    COLOR : str -> "#d9d9d9"
+        The color of a target that is not highlighted
+    HIGHLIGHT_COLOR : str -> "red"
+        The color of the highlighted target
+    GAP : int -> 4
+        The space between two targets [px] (a click in the gap is no click on a target)
+    MIN_CELL_SIZE : int -> 6
+        The smallest size of a target [px]
+    MIN_LABEL_SIZE : int -> 30
+        The smallest size of a target that gets its number as label [px]
+
+    Attributes
+    ----------
+    canvas : tkinter.Canvas
+        The canvas all targets are drawn on (calls clicked)
+    command : Callable[[int], object]
+        Is called with the number of the target for every click on a target (GameEngine.click in the app)
+    rows : int
+        The number of rows of the grid
+    cols : int
+        The number of columns of the grid
+    count : int
+        The number of targets
+    cell_width : float
+        The width of one cell (target and gap) [px]
+    cell_height : float
+        The height of one cell (target and gap) [px]
+    targets : list[int]
+        The canvas items of the targets (row by row)
+    highlighted : int | None
+        The highlighted target (None if no target is highlighted)
+    dirty : set[int]
+        The targets that changed since the last redraw
+
+    Methods
+    -------
+    check_size(rows: int, cols: int, width: int, height: int) -> None
+        Checks if a grid fits in its size
+    target_at(x: float, y: float) -> int | None
+        Gets the target at a position of the canvas
+    clicked(event: tkinter.Event) -> None
+        Passes a click on a target to the command
+    show(target: int | None) -> None
+        Highlights a target and removes the highlight of the last one
+    redraw() -> None
+        Redraws the targets that changed since the last redraw
+    """
+
+    COLOR = "#d9d9d9"
+    HIGHLIGHT_COLOR = "red"
+    GAP = 4
+    MIN_CELL_SIZE = 6
+    MIN_LABEL_SIZE = 30
+
+    def __init__(self, window: tkinter.Tk, x: int, y: int, width: int, height: int, command: Callable[[int], object], \
+                 rows: int = 3, cols: int = 3) -> None:
+        """
+        Initialize a new TargetGrid and draw all targets
+
+        Parameters
+        ----------
+        window : tkinter.TK
+            The window in which the grid should show up
+        x : int
+            The x-coordinate of the grid
+        y : int
+            The y-coordinate of the grid
+        width : int
+            The width of the grid [px]
+        height : int
+            The height of the grid [px]
+        command : Callable[[int], object]
+            Is called with the number of the target for every click on a target
+        rows : int (default: 3)
+            The number of rows of the grid
+        cols : int (default: 3)
+            The number of columns of the grid
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the grid has no targets or the targets would be smaller than MIN_CELL_SIZE
+        """
+        self.check_size(rows, cols, width, height)
+
+        self.command: Callable[[int], object] = command
+        self.rows: int = rows
+        self.cols: int = cols
+        self.count: int = rows * cols
+        self.cell_width: float = width / cols
+        self.cell_height: float = height / rows
+
+        self.canvas: tkinter.Canvas = tkinter.Canvas(window, name="target_grid", width=width, height=height, highlightthickness=0)
+        self.canvas.place(x=x, y=y)
+        #one binding for the whole grid, the target is found with the position of the click
+        self.canvas.bind("<Button-1>", self.clicked)
+
+        self.targets: list[int] = []
+        labeled = min(self.cell_width, self.cell_height) >= self.MIN_LABEL_SIZE
+        for row in range(rows):
+            for col in range(cols):
+                left, top = col * self.cell_width, row * self.cell_height
+                self.targets.append(self.canvas.create_rectangle(left + self.GAP / 2, top + self.GAP / 2, \
+                                                                 left + self.cell_width - self.GAP / 2, top + self.cell_height - self.GAP / 2, \
+                                                                 fill=self.COLOR, outline="gray"))
+                if labeled:
+                    #the labels are drawn over the targets but don't change, so they are never redrawn
+                    self.canvas.create_text(left + self.cell_width / 2, top + self.cell_height / 2, text=str(len(self.targets)))
+
+        self.highlighted: int | None = None
+        self.dirty: set[int] = set()
+
+
+    @classmethod
+    def check_size(cls, rows: int, cols: int, width: int, height: int) -> None:
+        """
+        Checks if a grid fits in its size (main.py checks --grid with it before the login)
+
+        Parameters
+        ----------
+        rows : int
+            The number of rows of the grid
+        cols : int
+            The number of columns of the grid
+        width : int
+            The width of the grid [px]
+        height : int
+            The height of the grid [px]
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the grid has no targets or the targets would be smaller than MIN_CELL_SIZE
+        """
+        if rows < 1 or cols < 1:
+            raise ValueError(f"The grid needs at least one row and column (got {rows}x{cols})")
+        if width / cols - cls.GAP < cls.MIN_CELL_SIZE or height / rows - cls.GAP < cls.MIN_CELL_SIZE:
+            raise ValueError(f"A {rows}x{cols} grid doesn't fit in {width}x{height} px")
+
+
+    def target_at(self, x: float, y: float) -> int | None:
+        """
+        Gets the target at a position of the canvas (the cell is calculated, the canvas items are not searched)
+
+        Parameters
+        ----------
+        x : float
+            The x-coordinate on the canvas
+        y : float
+            The y-coordinate on the canvas
+
+        Returns
+        -------
+        : int
+            The number of the target (row by row, starting at 0)
+        : None
+            If the position is in a gap or outside of the grid
+        """
+        col, col_offset = divmod(x, self.cell_width)
+        row, row_offset = divmod(y, self.cell_height)
+        if not (0 <= col < self.cols and 0 <= row < self.rows):
+            return None
+        #the gap is half on each side of a cell
+        if not (self.GAP / 2 <= col_offset <= self.cell_width - self.GAP / 2 and self.GAP / 2 <= row_offset <= self.cell_height - self.GAP / 2):
+            return None
+        return int(row) * self.cols + int(col)
+
+
+    def clicked(self, event: tkinter.Event) -> None:
+        """
+        Is triggert if the canvas is clicked
+        Passes the clicked target to the command (clicks in a gap are ignored)
+
+        Parameters
+        ----------
+        event : tkinter.Event
+            The click with its position on the canvas
+
+        Returns
+        -------
+        None
+        """
+        target = self.target_at(event.x, event.y)
+        if target is not None:
+            self.command(target)
+
+
+    def show(self, target: int | None) -> None:
+        """
+        Highlights a target and removes the highlight of the last one (the canvas changes with the next redraw)
+
+        Parameters
+        ----------
+        target : int | None
+            The number of the target (row by row, starting at 0), None removes the highlight
+
+        Returns
+        -------
+        None
+        """
+        if target == self.highlighted:
+            return
+        if self.highlighted is not None:
+            self.dirty.add(self.highlighted)
+        if target is not None:
+            self.dirty.add(target)
+        self.highlighted = target
+
+
+    def redraw(self) -> None:
+        """
+        Redraws the targets that changed since the last redraw
+        (the canvas only repaints the area of the changed items, the other targets are not touched)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        for target in self.dirty:
+            self.canvas.itemconfigure(self.targets[target], fill=self.HIGHLIGHT_COLOR if target == self.highlighted else self.COLOR)
+        self.dirty.clear()
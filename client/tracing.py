@@ -0,0 +1,215 @@
+"""
+In this file the tracing of the client is defined
+A traced command gets a trace in its envelope, every stage it passes (client and server) adds a stamp to it
+and the trace is written to a span file when the response is applied to the UI
+
+Usage: python tracing.py traces.jsonl (prints the median and 95th percentile of every span)
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import os
+import sys
+import json
+import time
+
+from typing import Iterator
+
+
+class TraceExporter:
+    """
+    A class to create traces and write them to a span file (one json object per line)
+
+    Stages
+    ------
+    client_send : the client created the command
+    server_receive : the server received the command
+    dispatch : the server started processing the command
+    db : the database work of the command is done
+    encode : the server started encoding the response
+    client_receive : the listener of the client received the response
+    queue : the main loop took the response from the queue
+    ui_apply : the response is applied to the UI
+
+    The stamps are unix times of the machine that added them, spans between client and server include the clock difference
+
+    ...
+
+    Constants
+    ---------
+    STAGES : tuple[str, ...]
+        The stages in the order a command passes them
+
+    Attributes
+    ----------
+    path : str
+        The path of the span file
+    file : TextIO | None
+        The opened span file (is opened with the first trace)
+
+    Methods
+    -------
+    start() -> dict
+        Creates a new trace with the client_send stamp
+    stamp(command: dict, stage: str) -> None
+        Adds the time a traced command reached a stage to its trace
+    export(recv: dict) -> None
+        Writes the trace of a response with its spans to the span file
+    read(path: str) -> Iterator[dict]
+        Reads all traces of a span file
+    summarize(path: str) -> dict[str, dict[str, float]]
+        Gets the median and 95th percentile of every span
+    close() -> None
+        Closes the span file
+    """
+
+    STAGES = ("client_send", "server_receive", "dispatch", "db", "encode", "client_receive", "queue", "ui_apply")
+
+    def __init__(self, path: str = "traces.jsonl") -> None:
+        """
+        Initialize a new TraceExporter
+
+        Parameters
+        ----------
+        path : str (default: "traces.jsonl")
+            The path of the span file (new traces are appended)
+
+        Returns
+        -------
+        None
+        """
+        self.path: str = path
+        self.file = None
+
+
+    def start(self) -> dict:
+        """
+        Creates a new trace with the client_send stamp
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : dict
+            The trace (is sent in the envelope of the command)
+        """
+        return {"id": os.urandom(8).hex(), "stamps": [["client_send", time.time()]]}
+
+
+    @staticmethod
+    def stamp(command: dict, stage: str) -> None:
+        """
+        Adds the time a traced command reached a stage to its trace (commands without a trace are ignored)
+
+        Parameters
+        ----------
+        command : dict
+            The command
+        stage : str
+            The name of the stage
+
+        Returns
+        -------
+        None
+        """
+        trace = command.get("trace")
+        if isinstance(trace, dict) and isinstance(trace.get("stamps"), list):
+            trace["stamps"].append([stage, time.time()])
+
+
+    def export(self, recv: dict) -> None:
+        """
+        Writes the trace of a response with its spans to the span file
+        Every span is the time between two following stamps
+
+        Parameters
+        ----------
+        recv : dict
+            The response with the trace
+
+        Returns
+        -------
+        None
+        """
+        stamps = recv["trace"]["stamps"]
+        spans = []
+        for (start_stage, start), (end_stage, end) in zip(stamps, stamps[1:]):
+            spans.append({"name": f"{start_stage}->{end_stage}", "start": start, "duration_ms": round((end - start) * 1000, 3)})
+
+        if self.file is None:
+            #every trace is a line, so a crash loses at most the last trace
+            self.file = open(self.path, "a", buffering=1)
+        self.file.write(json.dumps({"trace": recv["trace"]["id"], "command": recv.get("command"), "stamps": stamps, \
+                                    "spans": spans, "total_ms": round((stamps[-1][1] - stamps[0][1]) * 1000, 3)}) + "\n")
+
+
+    @classmethod
+    def read(cls, path: str) -> Iterator[dict]:
+        """
+        Reads all traces of a span file
+
+        Parameters
+        ----------
+        path : str
+            The path of the span file
+
+        Returns
+        -------
+        : Iterator[dict]
+            The traces with their command, stamps, spans and total time
+        """
+        with open(path) as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+    @classmethod
+    def summarize(cls, path: str) -> dict[str, dict[str, float]]:
+        """
+        Gets the median and 95th percentile of every span (per command)
+
+        Parameters
+        ----------
+        path : str
+            The path of the span file
+
+        Returns
+        -------
+        summary : dict[str, dict[str, float]]
+            The count, median and 95th percentile [ms] of every "command span" (and "command total")
+        """
+        durations: dict[str, list[float]] = {}
+        for trace in cls.read(path):
+            for span in trace["spans"]:
+                durations.setdefault(f"{trace['command']} {span['name']}", []).append(span["duration_ms"])
+            durations.setdefault(f"{trace['command']} total", []).append(trace["total_ms"])
+
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            summary[name] = {"count": len(values), "p50": values[(len(values) - 1) // 2], "p95": values[-(-95 * len(values) // 100) - 1]}
+        return summary
+
+
+    def close(self) -> None:
+        """
+        Closes the span file
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+if __name__ == "__main__":
+    for name, stats in TraceExporter.summarize(sys.argv[1] if len(sys.argv) > 1 else "traces.jsonl").items():
+        print(f"[{'TRACE':<10}] {name:<60} count={stats['count']} p50={stats['p50']}ms p95={stats['p95']}ms")
@@ -0,0 +1,311 @@
+"""
+The bulk tool of the server
+Streams the accounts or the games of the database to a csv/jsonl file or loads them from one,
+the rows are written in large transactions with executemany (no bcrypt and no commit per account)
+
+Usage: python bulk.py export|import accounts|games file.csv|file.jsonl [--format csv|jsonl] [--batch-size 10000] [--hash-passwords] [--shards 1]
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import csv
+import json
+import time
+import bcrypt
+import argparse
+import itertools
+
+from typing import Iterator
+
+import database
+from sharding import ShardedDatabase
+
+
+class BulkTransfer:
+    """
+    A class to export and import the rows of one table with bounded memory (at most batch_size rows at once)
+
+    Accounts : username, password_hash (bcrypt), highscore, accuracy, time
+        (a plain "password" column is only accepted with hash_passwords, hashing is by far the slowest part)
+    Games : username, score, missed, accuracy, time, played_at
+        (games of unknown users are skipped, the accounts have to be imported first)
+
+    ...
+
+    Constants
+    ---------
+    FIELDS : dict[str, tuple[str, ...]]
+        The columns of the file of every table
+    FORMATS : tuple[str, str] -> ("csv", "jsonl")
+        The supported file formats
+    PROGRESS_INTERVAL : float -> 1
+        The minimum time between two progress reports [s]
+
+    Attributes
+    ----------
+    path : str
+        The path of the file
+    table : str
+        "accounts" or "games"
+    file_format : str
+        "csv" or "jsonl"
+    batch_size : int
+        The number of rows in one transaction
+    hash_passwords : bool
+        If plain passwords are hashed with bcrypt (else accounts without password_hash are skipped)
+    rows : int
+        The number of exported or imported rows
+    skipped : int
+        The number of rows that were invalid or already existed
+    start : float
+        The time the transfer started (time.perf_counter)
+    last_report : float
+        The time of the last progress report (time.perf_counter)
+
+    Methods
+    -------
+    export(db: database.Database | ShardedDatabase) -> None
+        Writes all rows of the table to the file
+    load(db: database.Database | ShardedDatabase) -> None
+        Stores all rows of the file in the table
+    read_rows() -> Iterator[dict]
+        Reads the rows of the file one by one
+    parse_account(row: dict) -> tuple[str, bytes, int, float, int] | None
+        Converts a row of the file to an account
+    parse_game(row: dict) -> tuple[str, int, int, float, int, float] | None
+        Converts a row of the file to a game
+    report(final: bool = False) -> None
+        Prints the transferred rows and the rows per second
+    """
+
+    FIELDS = {"accounts": ("username", "password_hash", "highscore", "accuracy", "time"),
+              "games": ("username", "score", "missed", "accuracy", "time", "played_at")}
+    FORMATS = ("csv", "jsonl")
+    PROGRESS_INTERVAL = 1
+
+    def __init__(self, path: str, table: str, file_format: str = None, batch_size: int = 10000, hash_passwords: bool = False) -> None:
+        """
+        Initialize a new BulkTransfer
+
+        Parameters
+        ----------
+        path : str
+            The path of the file
+        table : str
+            "accounts" or "games"
+        file_format : str (default: None)
+            "csv" or "jsonl" (None takes it from the file extension)
+        batch_size : int (default: 10000)
+            The number of rows in one transaction
+        hash_passwords : bool (default: False)
+            If plain passwords are hashed with bcrypt (else accounts without password_hash are skipped)
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the table or the file format is unknown
+        """
+        if table not in self.FIELDS:
+            raise ValueError(f"Unknown table {table}")
+        file_format = file_format or path.rsplit(".", 1)[-1].lower()
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Unknown file format {file_format} (use --format csv or --format jsonl)")
+
+        self.path: str = path
+        self.table: str = table
+        self.file_format: str = file_format
+        self.batch_size: int = batch_size
+        self.hash_passwords: bool = hash_passwords
+
+        self.rows: int = 0
+        self.skipped: int = 0
+        self.start: float = time.perf_counter()
+        self.last_report: float = self.start
+
+
+    def export(self, db: database.Database | ShardedDatabase) -> None:
+        """
+        Writes all rows of the table to the file
+
+        Parameters
+        ----------
+        db : database.Database | ShardedDatabase
+            The database the rows are read from
+
+        Returns
+        -------
+        None
+        """
+        fields = self.FIELDS[self.table]
+        rows = db.export_accounts(self.batch_size) if self.table == "accounts" else db.export_games(self.batch_size)
+
+        with open(self.path, "w", newline="") as file:
+            writer = csv.writer(file) if self.file_format == "csv" else None
+            if writer:
+                writer.writerow(fields)
+            for row in rows:
+                if writer:
+                    writer.writerow(row)
+                else:
+                    file.write(json.dumps(dict(zip(fields, row))) + "\n")
+                self.rows += 1
+                if self.rows % self.batch_size == 0:
+                    self.report()
+        self.report(final=True)
+
+
+    def load(self, db: database.Database | ShardedDatabase) -> None:
+        """
+        Stores all rows of the file in the table (one transaction per batch)
+
+        Parameters
+        ----------
+        db : database.Database | ShardedDatabase
+            The database the rows are stored in
+
+        Returns
+        -------
+        None
+        """
+        parse = self.parse_account if self.table == "accounts" else self.parse_game
+        rows = self.read_rows()
+        while batch := list(itertools.islice(rows, self.batch_size)):
+            parsed = [entry for entry in map(parse, batch) if entry is not None]
+            stored = db.import_accounts(parsed) if self.table == "accounts" else db.add_games(parsed)
+            self.rows += stored
+            self.skipped += len(batch) - stored
+            self.report()
+
+        if self.table == "accounts":
+            #the rating tree is rebuilt once instead of one update per account
+            db.finish_import()
+        self.report(final=True)
+
+
+    def read_rows(self) -> Iterator[dict]:
+        """
+        Reads the rows of the file one by one
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : Iterator[dict]
+            Every row with its column names as keys
+        """
+        with open(self.path, newline="") as file:
+            if self.file_format == "csv":
+                yield from csv.DictReader(file)
+            else:
+                for line in file:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+    def parse_account(self, row: dict) -> tuple[str, bytes, int, float, int] | None:
+        """
+        Converts a row of the file to an account
+
+        Parameters
+        ----------
+        row : dict
+            The row with username, password_hash (or password), highscore, accuracy and time
+
+        Returns
+        -------
+        : tuple[str, bytes, int, float, int]
+            The username, bcrypt hash, highscore, accuracy and time
+        : None
+            If the row is invalid
+        """
+        try:
+            username = str(row["username"])
+            highscore = int(row.get("highscore") or 0)
+            accuracy = float(row.get("accuracy") or 0)
+            game_time = int(row.get("time") or 30)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        if row.get("password_hash"):
+            password = str(row["password_hash"]).encode()
+        elif row.get("password") and self.hash_passwords:
+            password = bcrypt.hashpw(str(row["password"]).encode(), bcrypt.gensalt())
+        else:
+            return None
+
+        if not username or game_time <= 0:
+            return None
+        return username, password, highscore, accuracy, game_time
+
+
+    def parse_game(self, row: dict) -> tuple[str, int, int, float, int, float] | None:
+        """
+        Converts a row of the file to a game
+
+        Parameters
+        ----------
+        row : dict
+            The row with username, score, missed, accuracy, time and played_at
+
+        Returns
+        -------
+        : tuple[str, int, int, float, int, float]
+            The username, score, missed clicks, accuracy, time and timestamp
+        : None
+            If the row is invalid
+        """
+        try:
+            game = (str(row["username"]), int(row["score"]), int(row["missed"]), float(row["accuracy"]), \
+                    int(row["time"]), float(row["played_at"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+        return game if game[4] > 0 else None
+
+
+    def report(self, final: bool = False) -> None:
+        """
+        Prints the transferred rows and the rows per second (at most once per PROGRESS_INTERVAL if not final)
+
+        Parameters
+        ----------
+        final : bool (default: False)
+            If the transfer is done
+
+        Returns
+        -------
+        None
+        """
+        now = time.perf_counter()
+        if not final and now - self.last_report < self.PROGRESS_INTERVAL:
+            return
+
+        self.last_report = now
+        elapsed = max(now - self.start, 1e-9)
+        print(f"[{'BULK':<10}] {'Done' if final else 'Running'}: {self.rows} {self.table} ({self.skipped} skipped) " + \
+              f"in {elapsed:.2f}s, {self.rows / elapsed:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exports or imports the accounts or games of the database (useless_gui.db)")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("table", choices=tuple(BulkTransfer.FIELDS))
+    parser.add_argument("file", help="the csv or jsonl file")
+    parser.add_argument("--format", choices=BulkTransfer.FORMATS, help="the file format (default: the file extension)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="the number of rows in one transaction")
+    parser.add_argument("--hash-passwords", action="store_true", help="hashes a plain password column with bcrypt (slow)")
+    parser.add_argument("--shards", type=int, default=1, help="the number of shards of the database (see NetworkServer(shards=...))")
+    args = parser.parse_args()
+
+    transfer = BulkTransfer(args.file, args.table, args.format, args.batch_size, args.hash_passwords)
+    #an export with the old number of shards and an import with the new one moves the accounts to their new shards
+    db = ShardedDatabase(args.shards) if args.shards > 1 else database.Database()
+    if args.action == "export":
+        transfer.export(db)
+    else:
+        transfer.load(db)
+    db.close_conn()
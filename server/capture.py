@@ -0,0 +1,146 @@
+"""
+In this file the traffic capture of the server is defined
+Every frame the server receives can be written to a capture log that the replay tool (replay.py) can send again
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import os
+import time
+import struct
+
+from typing import Iterator
+
+
+class CaptureLog:
+    """
+    A class to write and read capture logs
+
+    File format (big endian)
+    ------------------------
+    header : magic (4s), format version (H)
+    records : timestamp (d), connection id (I), length (I), frame (utf-8 json, uncompressed)
+
+    ...
+
+    Constants
+    ---------
+    MAGIC : bytes -> b"UGTC"
+        The first bytes of every capture log
+    FORMAT_VERSION : int -> 1
+        The version of the file format
+    HEADER : struct.Struct
+        The layout of the file header
+    RECORD : struct.Struct
+        The layout of a record (without the frame)
+
+    Attributes
+    ----------
+    path : str
+        The path of the capture log
+    fd : int
+        The file descriptor the records are appended to
+
+    Methods
+    -------
+    write(connection_id: int, frame: bytes) -> None
+        Appends a frame to the capture log
+    read(path: str) -> Iterator[tuple[float, int, bytes]]
+        Reads all records of a capture log
+    close() -> None
+        Closes the capture log
+    """
+
+    MAGIC = b"UGTC"
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct(">4sH")
+    RECORD = struct.Struct(">dII")
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens a capture log to append records (creates it if it doesn't exist)
+        The file is opened with O_APPEND, so the listener processes can share it after forking
+
+        Parameters
+        ----------
+        path : str
+            The path of the capture log
+
+        Returns
+        -------
+        None
+        """
+        self.path: str = path
+        self.fd: int = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        if os.fstat(self.fd).st_size == 0:
+            os.write(self.fd, self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION))
+
+
+    def write(self, connection_id: int, frame: bytes) -> None:
+        """
+        Appends a frame to the capture log
+        Every record is written with a single write, so records of different processes don't mix
+
+        Parameters
+        ----------
+        connection_id : int
+            The id of the connection the frame was received from
+        frame : bytes
+            The received frame
+
+        Returns
+        -------
+        None
+        """
+        os.write(self.fd, self.RECORD.pack(time.time(), connection_id, len(frame)) + frame)
+
+
+    @classmethod
+    def read(cls, path: str) -> Iterator[tuple[float, int, bytes]]:
+        """
+        Reads all records of a capture log
+
+        Parameters
+        ----------
+        path : str
+            The path of the capture log
+
+        Returns
+        -------
+        : Iterator[tuple[float, int, bytes]]
+            The timestamp, connection id and frame of every record
+
+        Raises
+        ------
+        ValueError
+            If the file is not a capture log
+        """
+        with open(path, "rb") as file:
+            magic, format_version = cls.HEADER.unpack(file.read(cls.HEADER.size))
+            if magic != cls.MAGIC or format_version != cls.FORMAT_VERSION:
+                raise ValueError(f"{path} is not a capture log")
+
+            while True:
+                record = file.read(cls.RECORD.size)
+                if len(record) < cls.RECORD.size:
+                    return
+                timestamp, connection_id, length = cls.RECORD.unpack(record)
+                frame = file.read(length)
+                if len(frame) < length:
+                    #the server was stopped while writing the last record
+                    return
+                yield timestamp, connection_id, frame
+
+
+    def close(self) -> None:
+        """
+        Closes the capture log
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        os.close(self.fd)
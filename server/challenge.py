@@ -0,0 +1,196 @@
+"""
+In this file the seeded target sequences and the daily challenge are defined
+Every game is driven by a sequence of targets generated from a seed (splitmix64, the same function as in the client engine),
+so the server can play a submitted game again from its clicks and everybody gets the same targets in the daily challenge
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import hashlib
+import datetime
+
+
+MASK = (1 << 64) - 1
+
+
+def target_sequence(seed: int, targets: int, length: int) -> list[int]:
+    """
+    Generates the targets of a game (splitmix64, a longer sequence starts with the same targets)
+
+    Parameters
+    ----------
+    seed : int
+        The seed of the game
+    targets : int
+        The number of targets
+    length : int
+        The number of generated targets
+
+    Returns
+    -------
+    : list[int]
+        The highlighted targets in the order they are shown
+    """
+    state = seed & MASK
+    sequence = []
+    for _ in range(length):
+        state = (state + 0x9E3779B97F4A7C15) & MASK
+        z = state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+        sequence.append((z ^ (z >> 31)) % targets)
+    return sequence
+
+
+def replay(seed: int, targets: int, inputs: list[list[float, int]]) -> tuple[list[list[float, float]], list[float]]:
+    """
+    Plays a game again from its clicks (the rules of GameEngine.click: a hit shows the next target of the sequence at once)
+
+    Parameters
+    ----------
+    seed : int
+        The seed of the game
+    targets : int
+        The number of targets
+    inputs : list[list[float, int]]
+        The time [s since the start of the game] and the clicked target of every click in order
+
+    Returns
+    -------
+    hits : list[list[float, float]]
+        The time every target was shown and the time it was hit
+    misses : list[float]
+        The time of every wrong click
+    """
+    #a game can't have more hits than clicks
+    sequence = target_sequence(seed, targets, len(inputs) + 1)
+    position = 0
+    shown_at = 0.0
+    hits = []
+    misses = []
+    for clicked_at, target in inputs:
+        if target == sequence[position]:
+            hits.append([shown_at, clicked_at])
+            position += 1
+            shown_at = clicked_at
+        else:
+            misses.append(clicked_at)
+    return hits, misses
+
+
+class DailyChallenge:
+    """
+    A class to issue the seed of the daily challenge (the same targets for every player on one day)
+
+    ...
+
+    Constants
+    ---------
+    DURATION : int -> 30
+        The duration of a challenge game [s]
+    ROWS : int -> 3
+        The rows of the target grid of the challenge
+    COLS : int -> 3
+        The columns of the target grid of the challenge
+    MAX_AGE : int -> 7
+        How many days after the challenge a game of it is accepted (games played offline are sent later)
+
+    Attributes
+    ----------
+    secret : str
+        Is mixed into the seeds, so the seeds of the next days can't be calculated in advance
+
+    Methods
+    -------
+    seed(day: datetime.date) -> int
+        Gets the seed of the challenge of a day
+    current() -> dict
+        Gets the challenge of today
+    check(game: dict) -> list[str]
+        Checks if a game belongs to a challenge
+    """
+
+    DURATION = 30
+    ROWS = 3
+    COLS = 3
+    MAX_AGE = 7
+
+    def __init__(self, secret: str = "") -> None:
+        """
+        Initialize a new DailyChallenge
+
+        Parameters
+        ----------
+        secret : str (default: "")
+            Is mixed into the seeds (has to stay the same after a restart, else the challenge of the day changes)
+
+        Returns
+        -------
+        None
+        """
+        self.secret: str = secret
+
+
+    def seed(self, day: datetime.date) -> int:
+        """
+        Gets the seed of the challenge of a day
+
+        Parameters
+        ----------
+        day : datetime.date
+            The day of the challenge (UTC)
+
+        Returns
+        -------
+        : int
+            The seed (63 bit, so it fits into the json numbers of every client)
+        """
+        digest = hashlib.sha256(f"{self.secret}:{day.isoformat()}".encode()).digest()
+        return int.from_bytes(digest[:8], "big") >> 1
+
+
+    def current(self) -> dict:
+        """
+        Gets the challenge of today
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : dict
+            The date (YYYY-MM-DD), seed, time (the duration), rows and cols of the challenge
+        """
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        return {"date": today.isoformat(), "seed": self.seed(today), "time": self.DURATION, "rows": self.ROWS, "cols": self.COLS}
+
+
+    def check(self, game: dict) -> list[str]:
+        """
+        Checks if a game belongs to a challenge (the game has the date of the challenge in clicks["challenge"])
+
+        Parameters
+        ----------
+        game : dict
+            The submitted game with time and clicks
+
+        Returns
+        -------
+        reasons : list[str]
+            Why the game doesn't belong to the challenge (empty if it does)
+        """
+        clicks = game["clicks"]
+        try:
+            day = datetime.date.fromisoformat(clicks["challenge"])
+        except (TypeError, ValueError):
+            return ["unknown challenge"]
+
+        age = (datetime.datetime.now(datetime.timezone.utc).date() - day).days
+        reasons = []
+        if not 0 <= age <= self.MAX_AGE:
+            reasons.append("challenge is over")
+        if clicks.get("seed") != self.seed(day):
+            reasons.append("wrong challenge seed")
+        if game.get("time") != self.DURATION or clicks.get("targets") != self.ROWS * self.COLS:
+            reasons.append("wrong challenge mode")
+        return reasons
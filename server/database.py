@@ -3,8 +3,14 @@ In this file the database is created and the functions to access the database ar
 ~ Hartl Lorenz, Hell Andreas, Holas Christoph
 """
 
+import json
+import time
+import array
 import sqlite3
 import bcrypt
+import secrets
+
+from typing import Iterable, Iterator
 
 class Database:
     """
@@ -12,8 +18,25 @@ class Database:
 
     ...
 
+    Constants
+    ---------
+    RATING_SCALE : int -> 1000
+        Ratings are rounded to 3 decimals, so every rating maps to an integer bucket
+    RATING_BUCKETS : int -> 131072
+        The number of buckets in the rating tree (ratings above 131.071 share the last bucket)
+    WINDOWS : dict[str, tuple[int, int]]
+        The length and the offset of the leaderboard windows [s] (days and weeks start at 00:00 UTC, weeks on monday)
+    MODES : tuple[int, ...] -> (10, 30, 60)
+        The game durations that have their own leaderboard [s]
+
     Attributes
     ----------
+    path : str
+        The path of the database file
+    shard : int
+        The index of the shard the database file stores (see sharding.py)
+    shard_count : int
+        The number of shards (account ids are shard + 1, shard + 1 + shard_count, ... so they are unique in all shards)
     conn : sqlite3.Connection
         The connection to the database
     cursor : sqlite3.Cursor
@@ -27,25 +50,121 @@ class Database:
         Checks if the user entered the correct password
     updat_highscore(uesrname: str, highscore: int, accuracy: float, time: int) -> None
         Updates the highscore of the user
-    get_highscores() -> list[list[float, str, int, float, int]]
+    get_highscores() -> list[list[str, float, int, float, int]]
         Gets the highscores of all players and returns the top 10
+    get_highscore_page(page_size: int, after: list[float, str] = None) -> tuple[list[list[str, float, int, float, int]], list[float, str] | None]
+        Gets one page of the leaderboard
+    get_user_highscore(username: str, with_rank: bool = True) -> list[float, int, float, int, int | None]
+        Gets the highscore and the global rank of the user
+    get_account_id(username: str) -> int | None
+        Gets the id of the account of the user
+    get_accounts(account_ids: list[int]) -> list[list[str, float, int, float, int]]
+        Gets the highscores of multiple accounts with one query
+    rating_bucket(rating: float) -> int
+        Converts a rating to the node of its bucket in the rating tree
+    add_to_rating_tree(rating: float, amount: int) -> None
+        Adds the amount to the bucket of the rating
+    count_up_to(node: int) -> int
+        Counts the accounts in all buckets up to the given node
+    get_rank(rating: float) -> int
+        Gets the global rank a rating has (1 is the best)
+    rebuild_rating_tree() -> None
+        Rebuilds the rating tree from the accounts table
+    get_rating_tree() -> array.array
+        Gets the counts of all nodes of the rating tree
+    get_data_version() -> int
+        Gets the data version (changes whenever the leaderboard changes)
+    bump_data_version() -> None
+        Increases the data version
+    add_games(games: list[tuple[str, int, int, float, int, float]]) -> int
+        Stores finished games in one transaction
+    insert_games(games: list[tuple[str, int, int, float, int, float]]) -> int
+        Stores finished games without committing
+    submit_games(username: str, games: list[tuple[int, int, float, int, float, str]]) -> int
+        Stores the games the user played offline and updates his highscore in one transaction
+    get_recent_games(username: str, limit: int = 10) -> list[list[int, int, float, int, float, float]]
+        Gets the last games of the user (newest is index 0)
+    get_game_averages(username: str) -> list[int, float, float, float] | None
+        Gets the number of games and the average score, missed clicks and accuracy of the user
+    get_score_percentiles(username: str, percentiles: tuple[int] = (50, 90, 99)) -> list[int]
+        Gets the score percentiles of all games of the user
+    window_bucket(window: str, timestamp: float) -> int
+        Gets the bucket of a leaderboard window a timestamp belongs to
+    get_window_highscores(window: str, bucket: int, count: int = 10) -> list[list[str, float, int, float, int]]
+        Gets the best games of one bucket of a leaderboard window
+    prune_windows(now: float, keep: int = 8) -> None
+        Deletes the buckets of the leaderboard windows that are too old to be requested
+    get_mode_highscores(duration: int, count: int = 10) -> list[list[str, float, int, float, int]]
+        Gets the best games of one game duration
+    get_mode_highscore(username: str, duration: int) -> list[float, int, float, int, int] | None
+        Gets the best game and the rank of the user in one game duration
+    count_mode_ratings_above(duration: int, rating: float) -> int
+        Counts the users with a better best game in one game duration
+    flag_scores(flagged: list[tuple[str, str, int, int, float, int, list[str], dict, float]]) -> None
+        Stores submitted games that failed the plausibility checks for review
+    get_flagged_scores(limit: int = 50) -> list[list]
+        Gets the last flagged games
+    join_group(group: str, username: str, max_members: int = 100, code: str = None) -> str | None
+        Adds the user to a group with its invite code (creates the group if it doesn't exist)
+    add_group_member(group: str, account_id: int, max_members: int = 100, code: str = None) -> str | None
+        Adds an account to a group with its invite code (creates the group if it doesn't exist)
+    leave_group(group: str, username: str) -> None
+        Removes the user from a group (the group is deleted with its last member)
+    remove_group_member(group: str, account_id: int) -> None
+        Removes an account from a group (the group is deleted with its last member)
+    get_user_groups(username: str) -> dict[str, str]
+        Gets the groups of the user with their invite codes
+    get_account_groups(account_id: int) -> dict[str, str]
+        Gets the groups of an account with their invite codes
+    get_group_highscores(group: str) -> list[list[str, float, int, float, int]] | None
+        Gets the leaderboard of a group (from the cache if it is valid)
+    get_group(group: str) -> tuple[int, list[list[str, float, int, float, int]] | None] | None
+        Gets the id and the cached leaderboard of a group
+    get_group_members(group_id: int) -> list[int]
+        Gets the account ids of the members of a group
+    cache_group_highscores(group_id: int, highscores: list[list[str, float, int, float, int]]) -> None
+        Stores the leaderboard of a group until it is outdated
+    invalidate_group_caches(account_id: int) -> None
+        Deletes the cached leaderboards of all groups of an account
+    export_accounts(batch_size: int = 10000) -> Iterator[tuple[str, str, int, float, int]]
+        Streams all accounts with their password hash and highscore
+    export_games(batch_size: int = 10000) -> Iterator[tuple[str, int, int, float, int, float]]
+        Streams all finished games
+    import_accounts(accounts: Iterable[tuple[str, bytes, int, float, int]]) -> int
+        Stores accounts with already hashed passwords in one transaction
+    finish_import() -> None
+        Rebuilds the rating tree after accounts were imported
     close_conn() -> None
         Closes the connection to the database
     """
 
-    def __init__(self) -> None:
+    RATING_SCALE = 1000
+    RATING_BUCKETS = 2**17
+    #1970-01-01 was a thursday, weeks are shifted by 3 days to start on monday
+    WINDOWS = {"daily": (86400, 0), "weekly": (604800, 259200)}
+    MODES = (10, 30, 60)
+
+    def __init__(self, path: str = "useless_gui.db", shard: int = 0, shard_count: int = 1) -> None:
         """
-        Initialize the database and creates the table if it doesn't exist
+        Initialize the database and creates the tables if they don't exist
 
         Parameters
         ----------
-        None
+        path : str (default: "useless_gui.db")
+            The path of the database file
+        shard : int (default: 0)
+            The index of the shard the database file stores (see sharding.py)
+        shard_count : int (default: 1)
+            The number of shards (1 if the database isn't sharded)
         
         Returns
         -------
         None
         """
-        self.conn = sqlite3.connect("useless_gui.db")
+        self.path: str = path
+        self.shard: int = shard
+        self.shard_count: int = shard_count
+        self.conn = sqlite3.connect(path)
         self.cursor = self.conn.cursor()
 
         self.cursor.execute("""
@@ -58,6 +177,163 @@ class Database:
             time INTEGER)
         """)
 
+        #databases created before the rating column existed have to be migrated
+        columns = [column[1] for column in self.cursor.execute("PRAGMA table_info(accounts)")]
+        if "rating" not in columns:
+            self.cursor.execute("ALTER TABLE accounts ADD COLUMN rating FLOAT NOT NULL DEFAULT 0")
+            self.cursor.execute("UPDATE accounts SET rating = ROUND((highscore*accuracy)/(100*time), 3)")
+            #the rating tree is rebuilt from the migrated ratings
+            self.cursor.execute("DROP TABLE IF EXISTS rating_tree")
+
+        self.cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS accounts_username ON accounts (username)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS accounts_rating ON accounts (rating, username)")
+
+        #a fenwick tree over the rating buckets (node -> number of accounts) to get the rank in O(log n)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rating_tree (
+            node INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL)
+        """)
+        self.conn.commit()
+
+        #the data version is increased whenever the leaderboard changes (is used to validate caches and snapshots)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL)
+        """)
+        #a new database starts at its creation time [ms], so the version of a deleted database is never reused by the clients caches
+        self.cursor.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', ?)", (int(time.time() * 1000),))
+        self.conn.commit()
+
+        #every finished game is appended to the games table (the rowid only grows, so inserts are appends)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY,
+            account_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            missed INTEGER NOT NULL,
+            accuracy FLOAT NOT NULL,
+            time INTEGER NOT NULL,
+            rating FLOAT NOT NULL,
+            played_at FLOAT NOT NULL)
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS games_recent ON games (account_id, played_at)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS games_score ON games (account_id, score)")
+        #the ids of the games a user submitted from the journal (a batch that is sent again isn't stored twice)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS submitted_games (
+            account_id INTEGER NOT NULL,
+            game_id TEXT NOT NULL,
+            PRIMARY KEY (account_id, game_id))
+        """)
+
+        #running totals of the games table so averages don't have to scan the games of the user
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS game_stats (
+            account_id INTEGER PRIMARY KEY,
+            games INTEGER NOT NULL,
+            total_score INTEGER NOT NULL,
+            total_missed INTEGER NOT NULL,
+            total_accuracy FLOAT NOT NULL)
+        """)
+        self.conn.commit()
+
+        #the best game of every user in every day and week, a new day/week is a new bucket
+        #so the windows roll over without deleting anything (old buckets are pruned with a range delete)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS window_scores (
+            period TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            rating FLOAT NOT NULL,
+            score INTEGER NOT NULL,
+            accuracy FLOAT NOT NULL,
+            time INTEGER NOT NULL,
+            PRIMARY KEY (period, bucket, account_id))
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS window_scores_rating ON window_scores (period, bucket, rating)")
+        #games of databases created before the windows existed are added once, the flag in meta keeps the backfill
+        #from running again when prune_windows has emptied the table
+        self.cursor.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('window_scores_backfilled', 1)")
+        if self.cursor.rowcount == 1 and self.cursor.execute("SELECT 1 FROM window_scores LIMIT 1").fetchone() is None:
+            for window, (length, offset) in self.WINDOWS.items():
+                #sqlite takes the other columns from the row with the maximum rating
+                self.cursor.execute("INSERT INTO window_scores (period, bucket, account_id, rating, score, accuracy, time) \
+                                    SELECT ?, CAST((played_at + ?) / ? AS INTEGER) AS bucket, account_id, MAX(rating), score, \
+                                    accuracy, time FROM games GROUP BY account_id, bucket", (window, offset, length))
+        self.conn.commit()
+
+        #the best game of every user in every game duration, every duration is a partition of the
+        #mode_scores_rating index (it covers all columns) so the top and the rank of one duration only read the index
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS mode_scores (
+            duration INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            rating FLOAT NOT NULL,
+            score INTEGER NOT NULL,
+            accuracy FLOAT NOT NULL,
+            PRIMARY KEY (duration, account_id))
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS mode_scores_rating ON mode_scores (duration, rating, account_id, score, accuracy)")
+        #games of databases created before the modes existed are added once (recorded in meta like the windows)
+        self.cursor.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('mode_scores_backfilled', 1)")
+        if self.cursor.rowcount == 1 and self.cursor.execute("SELECT 1 FROM mode_scores LIMIT 1").fetchone() is None:
+            placeholders = ", ".join("?" * len(self.MODES))
+            self.cursor.execute(f"INSERT INTO mode_scores (duration, account_id, rating, score, accuracy) \
+                                SELECT time, account_id, MAX(rating), score, accuracy FROM games \
+                                WHERE time IN ({placeholders}) GROUP BY time, account_id", self.MODES)
+        self.conn.commit()
+
+        #games that failed the plausibility checks are not stored in the leaderboards but kept here for review
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS flagged_scores (
+            id INTEGER PRIMARY KEY,
+            username VARCHAR(255) NOT NULL,
+            command TEXT NOT NULL,
+            score INTEGER,
+            missed INTEGER,
+            accuracy FLOAT,
+            time INTEGER,
+            reasons TEXT NOT NULL,
+            clicks TEXT,
+            flagged_at FLOAT NOT NULL)
+        """)
+        self.conn.commit()
+
+        #groups of users (friends, clans, ...) with their own leaderboard, only users with the invite code can join
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL UNIQUE,
+            code TEXT)
+        """)
+        #groups created before the invite codes existed get a code
+        if "code" not in [column[1] for column in self.cursor.execute("PRAGMA table_info(groups)")]:
+            self.cursor.execute("ALTER TABLE groups ADD COLUMN code TEXT")
+            self.cursor.execute("UPDATE groups SET code = lower(hex(randomblob(4)))")
+        #the primary key reads the members of a group, the index reads the groups of a user (to invalidate their caches)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS group_members (
+            group_id INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            PRIMARY KEY (group_id, account_id))
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS group_members_account ON group_members (account_id, group_id)")
+        #the last leaderboard of every group (is deleted when a member gets a new rating or the members change)
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS group_cache (
+            group_id INTEGER PRIMARY KEY,
+            highscores TEXT NOT NULL)
+        """)
+        self.conn.commit()
+
+        #the tree is empty after the migration or if the database was created by an older version
+        tree_empty = self.cursor.execute("SELECT 1 FROM rating_tree LIMIT 1").fetchone() is None
+        accounts_exist = self.cursor.execute("SELECT 1 FROM accounts LIMIT 1").fetchone() is not None
+        if tree_empty and accounts_exist:
+            self.rebuild_rating_tree()
+
 
     def register_user(self, username: str, password: str) -> bool:
         """
@@ -86,8 +362,12 @@ class Database:
         #if not: store new account in the database
         else:
             db_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
-            self.cursor.execute("INSERT INTO accounts (username, password, highscore, accuracy, time) \
-                                VALUES (?, ?, ?, ?, ?)", (username, db_password, 0, 0, 30))
+            #the ids of every shard have their own remainder (without shards the next id is the largest + 1)
+            self.cursor.execute("INSERT INTO accounts (id, username, password, highscore, accuracy, time, rating) \
+                                VALUES ((SELECT IFNULL(MAX(id), ?) + ? FROM accounts), ?, ?, ?, ?, ?, ?)", \
+                                (self.shard + 1 - self.shard_count, self.shard_count, username, db_password, 0, 0, 30, 0))
+            self.add_to_rating_tree(0, 1)
+            self.bump_data_version()
             self.conn.commit()
             return True
  
@@ -138,8 +418,23 @@ class Database:
         -------
         None
         """
-        self.cursor.execute("UPDATE accounts SET highscore = ?, accuracy = ?, time = ? \
-                            where username = ?", (highscore, accuracy, time, uesrname))
+        rating = round((highscore*accuracy)/(100*time), 3)
+
+        #the old rating has to be read in the same transaction to keep the rating tree in sync
+        self.cursor.execute("BEGIN IMMEDIATE")
+        self.cursor.execute("SELECT rating, id FROM accounts WHERE username = ?", (uesrname,))
+        db_entry = self.cursor.fetchone()
+        if not db_entry:
+            self.conn.rollback()
+            return
+
+        self.cursor.execute("UPDATE accounts SET highscore = ?, accuracy = ?, time = ?, rating = ? \
+                            where username = ?", (highscore, accuracy, time, rating, uesrname))
+        self.add_to_rating_tree(db_entry[0], -1)
+        self.add_to_rating_tree(rating, 1)
+        #the leaderboards of the groups of the user are outdated
+        self.invalidate_group_caches(db_entry[1])
+        self.bump_data_version()
         self.conn.commit()
  
 
@@ -153,48 +448,1076 @@ class Database:
 
         Returns
         -------
-        sorted_highscores : list[list[str, float, int, float, int]]
+        highscores : list[list[str, float, int, float, int]]
             The top 10 clients in a sorted list (best is index 0) with their name, rating, score, accuracy and time
         """
-        self.cursor.execute("SElECT username, highscore, accuracy, time from accounts")
-        db_entry = self.cursor.fetchall()
-        highscores = []
-        if db_entry:
-            for entry in db_entry:
-                name, score, accuracy, time = entry
-                avg_score_per_sec = round((score*accuracy)/(100*time), 3)
-                highscores.append([name, avg_score_per_sec, score, accuracy, time])
+        highscores, _ = self.get_highscore_page(10)
+        return highscores
+
+
+    def get_highscore_page(self, page_size: int, after: list[float, str] = None) -> tuple[list[list[str, float, int, float, int]], list[float, str] | None]:
+        """
+        Gets one page of the leaderboard
+        The page is read from the accounts_rating index starting at the cursor,
+        so every page costs the same no matter how deep it is in the ranking
+
+        Parameters
+        ----------
+        page_size : int
+            The maximum number of clients on the page (less than 1 is read as 1)
+        after : list[float, str] (default: None)
+            The rating and name of the last client of the previous page (None for the first page)
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients on the page in a sorted list with their name, rating, score, accuracy and time
+        cursor : list[float, str] | None
+            The cursor of the next page or None if there are no more clients
+        """
+        #a negative LIMIT means no limit in SQLite
+        page_size = max(int(page_size), 1)
+        if after:
+            self.cursor.execute("SELECT username, rating, highscore, accuracy, time FROM accounts \
+                                WHERE (rating, username) < (?, ?) ORDER BY rating DESC, username DESC LIMIT ?", \
+                                (after[0], after[1], page_size))
+        else:
+            self.cursor.execute("SELECT username, rating, highscore, accuracy, time FROM accounts \
+                                ORDER BY rating DESC, username DESC LIMIT ?", (page_size,))
+        highscores = [list(entry) for entry in self.cursor.fetchall()]
 
-            sorted_highscores = sorted(highscores, key= lambda client: client[1], reverse=True)
-            return sorted_highscores[0:10]
+        cursor = None
+        if len(highscores) == page_size:
+            cursor = [highscores[-1][1], highscores[-1][0]]
+        return highscores, cursor
 
     
-    def get_user_highscore(self, username: str) -> list[float, int, float, int]:
+    def get_user_highscore(self, username: str, with_rank: bool = True) -> list[float, int, float, int, int | None]:
         """
-        Gets the highscore of the user
+        Gets the highscore and the global rank of the user
 
         Parameters
         ----------
         username : str
             The name of the user who requests his highscore
+        with_rank : bool (default: True)
+            If the rank should be read from the rating tree (else the rank is None)
 
         Returns
         -------
-        highscore : list[float, int, float, int]
-            The highscore of the user
+        highscore : list[float, int, float, int, int | None]
+            The rating, score, accuracy, time and global rank of the user
         """
-        self.cursor.execute("SElECT highscore, accuracy, time from accounts where username = ?", (username,))
+        self.cursor.execute("SElECT rating, highscore, accuracy, time from accounts where username = ?", (username,))
         db_entry = self.cursor.fetchone()
         if db_entry:
-            score, accuracy, time = db_entry
-            #calculate the rating to compare with other users
-            avg_score_per_sec = round((score*accuracy)/(100*time), 3)
-            highscore = [avg_score_per_sec, score, accuracy, time]
+            rating, score, accuracy, time = db_entry
+            highscore = [rating, score, accuracy, time, self.get_rank(rating) if with_rank else None]
             return highscore
         else:
             return None
 
 
+    def get_account_id(self, username: str) -> int | None:
+        """
+        Gets the id of the account of the user
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        : int | None
+            The id of the account (None if the user doesn't exist)
+        """
+        self.cursor.execute("SELECT id FROM accounts WHERE username = ?", (username,))
+        db_entry = self.cursor.fetchone()
+        return db_entry[0] if db_entry else None
+
+
+    def get_accounts(self, account_ids: list[int]) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the highscores of multiple accounts with one query over the primary key (ids of other shards are ignored)
+
+        Parameters
+        ----------
+        account_ids : list[int]
+            The ids of the accounts
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The accounts in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        """
+        if not account_ids:
+            return []
+        placeholders = ", ".join("?" * len(account_ids))
+        self.cursor.execute(f"SELECT username, rating, highscore, accuracy, time FROM accounts WHERE id IN ({placeholders}) \
+                            ORDER BY rating DESC, username DESC", account_ids)
+        return [list(entry) for entry in self.cursor.fetchall()]
+
+#-----------------------RATING TREE-----------------------#
+
+    @classmethod
+    def rating_bucket(cls, rating: float) -> int:
+        """
+        Converts a rating to the node of its bucket in the rating tree (the tree starts at node 1)
+
+        Parameters
+        ----------
+        rating : float
+            The rating to convert
+
+        Returns
+        -------
+        : int
+            The node of the bucket
+        """
+        return min(max(int(round(rating*cls.RATING_SCALE)), 0), cls.RATING_BUCKETS-1) + 1
+
+
+    def add_to_rating_tree(self, rating: float, amount: int) -> None:
+        """
+        Adds the amount to the bucket of the rating (updates O(log n) nodes)
+        The changes are not committed
+
+        Parameters
+        ----------
+        rating : float
+            The rating of the bucket
+        amount : int
+            The amount of accounts to add (negative to remove accounts)
+
+        Returns
+        -------
+        None
+        """
+        node = self.rating_bucket(rating)
+        nodes = []
+        while node <= self.RATING_BUCKETS:
+            nodes.append((node, amount))
+            node += node & -node
+
+        self.cursor.executemany("INSERT INTO rating_tree (node, count) VALUES (?, ?) \
+                                ON CONFLICT(node) DO UPDATE SET count = count + excluded.count", nodes)
+
+
+    def count_up_to(self, node: int) -> int:
+        """
+        Counts the accounts in all buckets up to the given node (reads O(log n) nodes)
+
+        Parameters
+        ----------
+        node : int
+            The last node to count
+
+        Returns
+        -------
+        : int
+            The number of accounts
+        """
+        nodes = []
+        while node > 0:
+            nodes.append(node)
+            node -= node & -node
+
+        placeholders = ", ".join("?" * len(nodes))
+        self.cursor.execute(f"SELECT COALESCE(SUM(count), 0) FROM rating_tree WHERE node IN ({placeholders})", nodes)
+        return self.cursor.fetchone()[0]
+
+
+    def get_rank(self, rating: float) -> int:
+        """
+        Gets the global rank a rating has (1 is the best)
+        Accounts with the same rating share the rank
+
+        Parameters
+        ----------
+        rating : float
+            The rating to get the rank of
+
+        Returns
+        -------
+        : int
+            The rank of the rating
+        """
+        total = self.count_up_to(self.RATING_BUCKETS)
+        return total - self.count_up_to(self.rating_bucket(rating)) + 1
+
+
+    def rebuild_rating_tree(self) -> None:
+        """
+        Rebuilds the rating tree from the accounts table
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        tree = [0] * (self.RATING_BUCKETS + 1)
+        self.cursor.execute("SELECT rating FROM accounts")
+        for (rating,) in self.cursor:
+            tree[self.rating_bucket(rating)] += 1
+
+        #every node adds its count to its parent (builds the tree in O(n))
+        for node in range(1, self.RATING_BUCKETS + 1):
+            parent = node + (node & -node)
+            if parent <= self.RATING_BUCKETS:
+                tree[parent] += tree[node]
+
+        self.cursor.execute("DELETE FROM rating_tree")
+        self.cursor.executemany("INSERT INTO rating_tree (node, count) VALUES (?, ?)", \
+                                ((node, count) for node, count in enumerate(tree) if count))
+        self.conn.commit()
+
+
+    def get_rating_tree(self) -> array.array:
+        """
+        Gets the counts of all nodes of the rating tree (is used for the leaderboard snapshot)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tree : array.array
+            The count of every node (index 0 is unused)
+        """
+        tree = array.array("I", bytes(4 * (self.RATING_BUCKETS + 1)))
+        for node, count in self.cursor.execute("SELECT node, count FROM rating_tree"):
+            tree[node] = count
+        return tree
+
+#-----------------------RATING TREE-----------------------#
+
+
+
+#----------------------DATA VERSION-----------------------#
+
+    def get_data_version(self) -> int:
+        """
+        Gets the data version (changes whenever the leaderboard changes)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : int
+            The data version
+        """
+        self.cursor.execute("SELECT value FROM meta WHERE key = 'data_version'")
+        return self.cursor.fetchone()[0]
+
+
+    def bump_data_version(self) -> None:
+        """
+        Increases the data version
+        The change is not committed (it is committed with the change of the leaderboard)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.cursor.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+#----------------------DATA VERSION-----------------------#
+
+
+#-------------------------GAMES---------------------------#
+
+    def add_games(self, games: list[tuple[str, int, int, float, int, float]]) -> int:
+        """
+        Stores finished games in one transaction
+
+        Parameters
+        ----------
+        games : list[tuple[str, int, int, float, int, float]]
+            The username, score, missed clicks, accuracy, time and timestamp of every game
+
+        Returns
+        -------
+        : int
+            The number of stored games (games of unknown users are skipped)
+        """
+        stored = self.insert_games(games)
+        self.conn.commit()
+        return stored
+
+
+    def insert_games(self, games: list[tuple[str, int, int, float, int, float]]) -> int:
+        """
+        Stores finished games and updates the leaderboard windows, modes and statistics without committing
+
+        Parameters
+        ----------
+        games : list[tuple[str, int, int, float, int, float]]
+            The username, score, missed clicks, accuracy, time and timestamp of every game
+
+        Returns
+        -------
+        : int
+            The number of stored games (games of unknown users are skipped)
+        """
+        if not games:
+            return 0
+
+        usernames = list({game[0] for game in games})
+        placeholders = ", ".join("?" * len(usernames))
+        self.cursor.execute(f"SELECT username, id FROM accounts WHERE username IN ({placeholders})", usernames)
+        account_ids = dict(self.cursor.fetchall())
+
+        rows = []
+        stats: dict[int, list] = {}
+        for username, score, missed, accuracy, time, played_at in games:
+            account_id = account_ids.get(username)
+            if account_id is None:
+                continue
+            rating = round((score*accuracy)/(100*time), 3)
+            rows.append((account_id, score, missed, accuracy, time, rating, played_at))
+
+            #sum up the games of every user to update the running totals once per user
+            user_stats = stats.setdefault(account_id, [0, 0, 0, 0])
+            user_stats[0] += 1
+            user_stats[1] += score
+            user_stats[2] += missed
+            user_stats[3] += accuracy
+
+        self.cursor.executemany("INSERT INTO games (account_id, score, missed, accuracy, time, rating, played_at) \
+                                VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        #the game replaces the best game of the user in its day and week if it is better
+        self.cursor.executemany("INSERT INTO window_scores (period, bucket, account_id, rating, score, accuracy, time) \
+                                VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(period, bucket, account_id) DO UPDATE SET \
+                                rating = excluded.rating, score = excluded.score, accuracy = excluded.accuracy, \
+                                time = excluded.time WHERE excluded.rating > window_scores.rating", \
+                                [(window, self.window_bucket(window, played_at), account_id, rating, score, accuracy, time) \
+                                 for account_id, score, missed, accuracy, time, rating, played_at in rows for window in self.WINDOWS])
+        #and the best game of the user in its game duration
+        self.cursor.executemany("INSERT INTO mode_scores (duration, account_id, rating, score, accuracy) VALUES (?, ?, ?, ?, ?) \
+                                ON CONFLICT(duration, account_id) DO UPDATE SET rating = excluded.rating, \
+                                score = excluded.score, accuracy = excluded.accuracy WHERE excluded.rating > mode_scores.rating", \
+                                [(time, account_id, rating, score, accuracy) \
+                                 for account_id, score, missed, accuracy, time, rating, played_at in rows if time in self.MODES])
+        self.cursor.executemany("INSERT INTO game_stats (account_id, games, total_score, total_missed, total_accuracy) \
+                                VALUES (?, ?, ?, ?, ?) ON CONFLICT(account_id) DO UPDATE SET \
+                                games = games + excluded.games, total_score = total_score + excluded.total_score, \
+                                total_missed = total_missed + excluded.total_missed, \
+                                total_accuracy = total_accuracy + excluded.total_accuracy", \
+                                [(account_id, *user_stats) for account_id, user_stats in stats.items()])
+        return len(rows)
+
+
+    def submit_games(self, username: str, games: list[tuple[int, int, float, int, float, str]]) -> int:
+        """
+        Stores the games the user played offline and updates his highscore in one transaction
+        Games that are already stored (same user and id) are skipped, so a batch that is sent again isn't stored twice
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        games : list[tuple[int, int, float, int, float, str]]
+            The score, missed clicks, accuracy, time, timestamp and id (of the journal entry) of every game
+
+        Returns
+        -------
+        : int
+            The number of stored games
+        """
+        if not games:
+            return 0
+
+        self.cursor.execute("BEGIN IMMEDIATE")
+        self.cursor.execute("SELECT rating, id FROM accounts WHERE username = ?", (username,))
+        db_entry = self.cursor.fetchone()
+        if not db_entry:
+            self.conn.rollback()
+            return 0
+
+        new_games = []
+        for game in games:
+            #the id is only inserted once, a game that is already stored is ignored
+            self.cursor.execute("INSERT OR IGNORE INTO submitted_games (account_id, game_id) VALUES (?, ?)", (db_entry[1], game[5]))
+            if self.cursor.rowcount:
+                new_games.append((username, *game[:5]))
+        stored = self.insert_games(new_games)
+
+        #the best game of the batch replaces the highscore if it is better
+        best = max(new_games, key=lambda game: round((game[1]*game[3])/(100*game[4]), 3), default=None)
+        rating = round((best[1]*best[3])/(100*best[4]), 3) if best else 0
+        if best and rating > db_entry[0]:
+            self.cursor.execute("UPDATE accounts SET highscore = ?, accuracy = ?, time = ?, rating = ? WHERE id = ?", \
+                                (best[1], best[3], best[4], rating, db_entry[1]))
+            self.add_to_rating_tree(db_entry[0], -1)
+            self.add_to_rating_tree(rating, 1)
+            self.invalidate_group_caches(db_entry[1])
+            self.bump_data_version()
+        self.conn.commit()
+        return stored
+
+
+    def get_recent_games(self, username: str, limit: int = 10) -> list[list[int, int, float, int, float, float]]:
+        """
+        Gets the last games of the user (newest is index 0)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        limit : int (default: 10)
+            The maximum number of games
+
+        Returns
+        -------
+        : list[list[int, int, float, int, float, float]]
+            The score, missed clicks, accuracy, time, rating and timestamp of every game
+        """
+        self.cursor.execute("SELECT score, missed, accuracy, time, rating, played_at FROM games \
+                            WHERE account_id = (SELECT id FROM accounts WHERE username = ?) \
+                            ORDER BY played_at DESC LIMIT ?", (username, max(int(limit), 1)))
+        return [list(game) for game in self.cursor.fetchall()]
+
+
+    def get_game_averages(self, username: str) -> list[int, float, float, float] | None:
+        """
+        Gets the number of games and the average score, missed clicks and accuracy of the user
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        : list[int, float, float, float]
+            The number of games, the average score, the average missed clicks and the average accuracy
+        : None
+            If the user has not finished a game yet
+        """
+        self.cursor.execute("SELECT games, total_score, total_missed, total_accuracy FROM game_stats \
+                            WHERE account_id = (SELECT id FROM accounts WHERE username = ?)", (username,))
+        db_entry = self.cursor.fetchone()
+        if db_entry:
+            games, total_score, total_missed, total_accuracy = db_entry
+            return [games, round(total_score/games, 2), round(total_missed/games, 2), round(total_accuracy/games, 2)]
+        else:
+            return None
+
+
+    def get_score_percentiles(self, username: str, percentiles: tuple[int] = (50, 90, 99)) -> list[int]:
+        """
+        Gets the score percentiles of all games of the user
+        Only the entries of the user in the games_score index are read
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        percentiles : tuple[int] (default: (50, 90, 99))
+            The percentiles to get
+
+        Returns
+        -------
+        scores : list[int]
+            The score of every percentile (empty if the user has not finished a game yet)
+        """
+        self.cursor.execute("SELECT account_id, games FROM game_stats \
+                            WHERE account_id = (SELECT id FROM accounts WHERE username = ?)", (username,))
+        db_entry = self.cursor.fetchone()
+        scores = []
+        if db_entry:
+            account_id, games = db_entry
+            for percentile in percentiles:
+                #nearest rank method
+                offset = max(min(-(-percentile*games // 100), games) - 1, 0)
+                self.cursor.execute("SELECT score FROM games WHERE account_id = ? ORDER BY score LIMIT 1 OFFSET ?", \
+                                    (account_id, offset))
+                scores.append(self.cursor.fetchone()[0])
+        return scores
+
+#-------------------------GAMES---------------------------#
+
+
+#------------------------WINDOWS--------------------------#
+
+    @classmethod
+    def window_bucket(cls, window: str, timestamp: float) -> int:
+        """
+        Gets the bucket of a leaderboard window a timestamp belongs to (the number of the day or week)
+
+        Parameters
+        ----------
+        window : str
+            "daily" or "weekly"
+        timestamp : float
+            The unix time
+
+        Returns
+        -------
+        : int
+            The bucket
+        """
+        length, offset = cls.WINDOWS[window]
+        return int((timestamp + offset) // length)
+
+
+    def get_window_highscores(self, window: str, bucket: int, count: int = 10) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the best games of one bucket of a leaderboard window
+        Only the entries of the bucket in the window_scores_rating index are read
+
+        Parameters
+        ----------
+        window : str
+            "daily" or "weekly"
+        bucket : int
+            The bucket of the window (see window_bucket)
+        count : int (default: 10)
+            The maximum number of clients
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        """
+        self.cursor.execute("SELECT accounts.username, window_scores.rating, window_scores.score, window_scores.accuracy, \
+                            window_scores.time FROM window_scores JOIN accounts ON accounts.id = window_scores.account_id \
+                            WHERE window_scores.period = ? AND window_scores.bucket = ? \
+                            ORDER BY window_scores.rating DESC LIMIT ?", (window, bucket, max(int(count), 1)))
+        return [list(entry) for entry in self.cursor.fetchall()]
+
+
+    def prune_windows(self, now: float, keep: int = 8) -> None:
+        """
+        Deletes the buckets of the leaderboard windows that are too old to be requested
+        The old buckets are at the start of the primary key, so only the deleted rows are read
+
+        Parameters
+        ----------
+        now : float
+            The current unix time
+        keep : int (default: 8)
+            The number of buckets of every window that are kept (including the current one)
+
+        Returns
+        -------
+        None
+        """
+        for window in self.WINDOWS:
+            self.cursor.execute("DELETE FROM window_scores WHERE period = ? AND bucket <= ?", \
+                                (window, self.window_bucket(window, now) - keep))
+        self.conn.commit()
+
+#------------------------WINDOWS--------------------------#
+
+
+#-------------------------MODES---------------------------#
+
+    def get_mode_highscores(self, duration: int, count: int = 10) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the best games of one game duration
+        Only the entries of the duration in the mode_scores_rating index are read
+
+        Parameters
+        ----------
+        duration : int
+            The game duration (one of MODES) [s]
+        count : int (default: 10)
+            The maximum number of clients
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        """
+        self.cursor.execute("SELECT accounts.username, mode_scores.rating, mode_scores.score, mode_scores.accuracy, \
+                            mode_scores.duration FROM mode_scores JOIN accounts ON accounts.id = mode_scores.account_id \
+                            WHERE mode_scores.duration = ? ORDER BY mode_scores.rating DESC, mode_scores.account_id DESC \
+                            LIMIT ?", (duration, max(int(count), 1)))
+        return [list(entry) for entry in self.cursor.fetchall()]
+
+
+    def get_mode_highscore(self, username: str, duration: int) -> list[float, int, float, int, int] | None:
+        """
+        Gets the best game and the rank of the user in one game duration
+        The rank counts the better ratings of the duration in the mode_scores_rating index (no table rows are read)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        duration : int
+            The game duration (one of MODES) [s]
+
+        Returns
+        -------
+        : list[float, int, float, int, int]
+            The rating, score, accuracy, duration and rank of the user
+        : None
+            If the user has not finished a game with this duration yet
+        """
+        self.cursor.execute("SELECT rating, score, accuracy FROM mode_scores \
+                            WHERE duration = ? AND account_id = (SELECT id FROM accounts WHERE username = ?)", (duration, username))
+        db_entry = self.cursor.fetchone()
+        if not db_entry:
+            return None
+
+        rating, score, accuracy = db_entry
+        return [rating, score, accuracy, duration, self.count_mode_ratings_above(duration, rating) + 1]
+
+
+    def count_mode_ratings_above(self, duration: int, rating: float) -> int:
+        """
+        Counts the users with a better best game in one game duration (only reads the mode_scores_rating index)
+
+        Parameters
+        ----------
+        duration : int
+            The game duration (one of MODES) [s]
+        rating : float
+            The rating to compare with
+
+        Returns
+        -------
+        : int
+            The number of users with a better rating
+        """
+        self.cursor.execute("SELECT COUNT(*) FROM mode_scores WHERE duration = ? AND rating > ?", (duration, rating))
+        return self.cursor.fetchone()[0]
+
+#-------------------------MODES---------------------------#
+
+
+#------------------------FLAGGED--------------------------#
+
+    def flag_scores(self, flagged: list[tuple[str, str, int, int, float, int, list[str], dict, float]]) -> None:
+        """
+        Stores submitted games that failed the plausibility checks for review
+
+        Parameters
+        ----------
+        flagged : list[tuple[str, str, int, int, float, int, list[str], dict, float]]
+            The username, command, score, missed clicks, accuracy, time, reasons, clicks and timestamp of every game
+
+        Returns
+        -------
+        None
+        """
+        if not flagged:
+            return
+
+        self.cursor.executemany("INSERT INTO flagged_scores (username, command, score, missed, accuracy, time, reasons, clicks, \
+                                flagged_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", \
+                                [(username, command, score, missed, accuracy, time, json.dumps(reasons), json.dumps(clicks), flagged_at) \
+                                 for username, command, score, missed, accuracy, time, reasons, clicks, flagged_at in flagged])
+        self.conn.commit()
+
+
+    def get_flagged_scores(self, limit: int = 50) -> list[list]:
+        """
+        Gets the last flagged games (newest is index 0)
+
+        Parameters
+        ----------
+        limit : int (default: 50)
+            The maximum number of games
+
+        Returns
+        -------
+        : list[list]
+            The username, command, score, missed clicks, accuracy, time, reasons, clicks and timestamp of every game
+        """
+        self.cursor.execute("SELECT username, command, score, missed, accuracy, time, reasons, clicks, flagged_at \
+                            FROM flagged_scores ORDER BY id DESC LIMIT ?", (limit,))
+        return [[*entry[:6], json.loads(entry[6]), json.loads(entry[7]), entry[8]] for entry in self.cursor.fetchall()]
+
+#------------------------FLAGGED--------------------------#
+
+
+#-------------------------GROUPS--------------------------#
+
+    def join_group(self, group: str, username: str, max_members: int = 100, code: str = None) -> str | None:
+        """
+        Adds the user to a group with its invite code (creates the group if it doesn't exist)
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+        username : str
+            The name of the user
+        max_members : int (default: 100)
+            The maximum number of members of a group
+        code : str (default: None)
+            The invite code of the group (the members get it in GROUPS, not needed to create a group)
+
+        Returns
+        -------
+        : str
+            Why the user couldn't join the group
+        : None
+            If the user is a member of the group now
+        """
+        account_id = self.get_account_id(username)
+        if account_id is None:
+            return "Unknown user!"
+        return self.add_group_member(group, account_id, max_members, code)
+
+
+    def add_group_member(self, group: str, account_id: int, max_members: int = 100, code: str = None) -> str | None:
+        """
+        Adds an account to a group with its invite code (creates the group if it doesn't exist)
+        The account can be stored in another shard (see sharding.py), it is only referenced by its id
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+        account_id : int
+            The id of the account
+        max_members : int (default: 100)
+            The maximum number of members of a group
+        code : str (default: None)
+            The invite code of the group (not needed to create a group)
+
+        Returns
+        -------
+        : str
+            Why the account couldn't join the group
+        : None
+            If the account is a member of the group now
+        """
+        self.cursor.execute("BEGIN IMMEDIATE")
+        self.cursor.execute("SELECT id, code FROM groups WHERE name = ?", (group,))
+        db_entry = self.cursor.fetchone()
+        if not db_entry:
+            self.cursor.execute("INSERT INTO groups (name, code) VALUES (?, ?)", (group, secrets.token_hex(4)))
+            group_id = self.cursor.lastrowid
+        else:
+            group_id = db_entry[0]
+            #a member joining again doesn't need the code
+            self.cursor.execute("SELECT 1 FROM group_members WHERE group_id = ? AND account_id = ?", (group_id, account_id))
+            if self.cursor.fetchone() is None and code != db_entry[1]:
+                self.conn.rollback()
+                return "Wrong invite code!"
+
+        self.cursor.execute("SELECT COUNT(*) FROM group_members WHERE group_id = ?", (group_id,))
+        if self.cursor.fetchone()[0] >= max_members:
+            self.conn.rollback()
+            return "The group is full!"
+
+        self.cursor.execute("INSERT OR IGNORE INTO group_members (group_id, account_id) VALUES (?, ?)", (group_id, account_id))
+        self.cursor.execute("DELETE FROM group_cache WHERE group_id = ?", (group_id,))
+        self.conn.commit()
+        return None
+
+
+    def leave_group(self, group: str, username: str) -> None:
+        """
+        Removes the user from a group (the group is deleted with its last member)
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        None
+        """
+        account_id = self.get_account_id(username)
+        if account_id is not None:
+            self.remove_group_member(group, account_id)
+
+
+    def remove_group_member(self, group: str, account_id: int) -> None:
+        """
+        Removes an account from a group (the group is deleted with its last member)
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+        account_id : int
+            The id of the account
+
+        Returns
+        -------
+        None
+        """
+        self.cursor.execute("SELECT id FROM groups WHERE name = ?", (group,))
+        db_entry = self.cursor.fetchone()
+        if not db_entry:
+            return
+
+        group_id = db_entry[0]
+        self.cursor.execute("DELETE FROM group_members WHERE group_id = ? AND account_id = ?", (group_id, account_id))
+        self.cursor.execute("DELETE FROM group_cache WHERE group_id = ?", (group_id,))
+        self.cursor.execute("DELETE FROM groups WHERE id = ? AND NOT EXISTS \
+                            (SELECT 1 FROM group_members WHERE group_id = ?)", (group_id, group_id))
+        self.conn.commit()
+
+
+    def get_user_groups(self, username: str) -> dict[str, str]:
+        """
+        Gets the groups of the user with their invite codes
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        : dict[str, str]
+            The invite code of every group (sorted by the names)
+        """
+        account_id = self.get_account_id(username)
+        return self.get_account_groups(account_id) if account_id is not None else {}
+
+
+    def get_account_groups(self, account_id: int) -> dict[str, str]:
+        """
+        Gets the groups of an account with their invite codes (reads the group_members_account index)
+
+        Parameters
+        ----------
+        account_id : int
+            The id of the account
+
+        Returns
+        -------
+        : dict[str, str]
+            The invite code of every group (sorted by the names)
+        """
+        self.cursor.execute("SELECT groups.name, groups.code FROM group_members JOIN groups ON groups.id = group_members.group_id \
+                            WHERE group_members.account_id = ? ORDER BY groups.name", (account_id,))
+        return dict(self.cursor.fetchall())
+
+
+    def get_group_highscores(self, group: str) -> list[list[str, float, int, float, int]] | None:
+        """
+        Gets the leaderboard of a group
+        All members are read with one query over the primary key of group_members (not one query per member),
+        the result is cached until a member gets a new rating or the members change
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The members in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        : None
+            If the group doesn't exist
+        """
+        db_entry = self.get_group(group)
+        if db_entry and db_entry[1] is not None:
+            return db_entry[1]
+
+        #the members are read and the leaderboard is stored in one transaction, so a new rating or member can't be committed in between
+        #(its invalidation would run before the outdated leaderboard is stored)
+        self.cursor.execute("BEGIN IMMEDIATE")
+        db_entry = self.get_group(group)
+        if not db_entry or db_entry[1] is not None:
+            self.conn.rollback()
+            return db_entry[1] if db_entry else None
+
+        group_id = db_entry[0]
+        self.cursor.execute("SELECT accounts.username, accounts.rating, accounts.highscore, accounts.accuracy, accounts.time \
+                            FROM group_members JOIN accounts ON accounts.id = group_members.account_id \
+                            WHERE group_members.group_id = ? ORDER BY accounts.rating DESC, accounts.username DESC", (group_id,))
+        highscores = [list(entry) for entry in self.cursor.fetchall()]
+        self.cache_group_highscores(group_id, highscores)
+        return highscores
+
+
+    def get_group(self, group: str) -> tuple[int, list[list[str, float, int, float, int]] | None] | None:
+        """
+        Gets the id and the cached leaderboard of a group
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+
+        Returns
+        -------
+        : tuple[int, list[list[str, float, int, float, int]] | None]
+            The id of the group and its cached leaderboard (None if the cache is outdated)
+        : None
+            If the group doesn't exist
+        """
+        self.cursor.execute("SELECT groups.id, group_cache.highscores FROM groups \
+                            LEFT JOIN group_cache ON group_cache.group_id = groups.id WHERE groups.name = ?", (group,))
+        db_entry = self.cursor.fetchone()
+        if not db_entry:
+            return None
+        return db_entry[0], json.loads(db_entry[1]) if db_entry[1] is not None else None
+
+
+    def get_group_members(self, group_id: int) -> list[int]:
+        """
+        Gets the account ids of the members of a group (reads the primary key of group_members)
+
+        Parameters
+        ----------
+        group_id : int
+            The id of the group
+
+        Returns
+        -------
+        : list[int]
+            The account ids
+        """
+        self.cursor.execute("SELECT account_id FROM group_members WHERE group_id = ?", (group_id,))
+        return [account_id for (account_id,) in self.cursor.fetchall()]
+
+
+    def cache_group_highscores(self, group_id: int, highscores: list[list[str, float, int, float, int]]) -> None:
+        """
+        Stores the leaderboard of a group until a member gets a new rating or the members change
+        (commits the transaction the members were read in)
+
+        Parameters
+        ----------
+        group_id : int
+            The id of the group
+        highscores : list[list[str, float, int, float, int]]
+            The leaderboard of the group
+
+        Returns
+        -------
+        None
+        """
+        self.cursor.execute("INSERT OR REPLACE INTO group_cache (group_id, highscores) VALUES (?, ?)", \
+                            (group_id, json.dumps(highscores)))
+        self.conn.commit()
+
+
+    def invalidate_group_caches(self, account_id: int) -> None:
+        """
+        Deletes the cached leaderboards of all groups of an account
+        The change is not committed (it is committed with the new rating)
+
+        Parameters
+        ----------
+        account_id : int
+            The id of the account
+
+        Returns
+        -------
+        None
+        """
+        self.cursor.execute("DELETE FROM group_cache WHERE group_id IN \
+                            (SELECT group_id FROM group_members WHERE account_id = ?)", (account_id,))
+
+#-------------------------GROUPS--------------------------#
+
+
+#--------------------------BULK---------------------------#
+
+    def export_accounts(self, batch_size: int = 10000) -> Iterator[tuple[str, str, int, float, int]]:
+        """
+        Streams all accounts with their password hash and highscore (only batch_size rows are in memory at once)
+
+        Parameters
+        ----------
+        batch_size : int (default: 10000)
+            The number of rows that are fetched at once
+
+        Returns
+        -------
+        : Iterator[tuple[str, str, int, float, int]]
+            The username, bcrypt hash, highscore, accuracy and time of every account (in the order they were registered)
+        """
+        #an own cursor, so the database can be used while the export is running
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT username, password, highscore, accuracy, time FROM accounts ORDER BY id")
+        while rows := cursor.fetchmany(batch_size):
+            for username, password, highscore, accuracy, time in rows:
+                yield username, password.decode() if isinstance(password, bytes) else password, highscore, accuracy, time
+
+
+    def export_games(self, batch_size: int = 10000) -> Iterator[tuple[str, int, int, float, int, float]]:
+        """
+        Streams all finished games (only batch_size rows are in memory at once)
+
+        Parameters
+        ----------
+        batch_size : int (default: 10000)
+            The number of rows that are fetched at once
+
+        Returns
+        -------
+        : Iterator[tuple[str, int, int, float, int, float]]
+            The username, score, missed clicks, accuracy, time and timestamp of every game (oldest first)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT accounts.username, games.score, games.missed, games.accuracy, games.time, games.played_at \
+                       FROM games JOIN accounts ON accounts.id = games.account_id ORDER BY games.id")
+        while rows := cursor.fetchmany(batch_size):
+            yield from rows
+
+
+    def import_accounts(self, accounts: Iterable[tuple[str, bytes, int, float, int]]) -> int:
+        """
+        Stores accounts with already hashed passwords in one transaction (existing usernames are skipped)
+        The rating tree is not updated, finish_import has to be called after the last batch
+
+        Parameters
+        ----------
+        accounts : Iterable[tuple[str, bytes, int, float, int]]
+            The username, bcrypt hash, highscore, accuracy and time of every account
+
+        Returns
+        -------
+        : int
+            The number of stored accounts
+        """
+        changes = self.conn.total_changes
+        self.cursor.executemany("INSERT INTO accounts (id, username, password, highscore, accuracy, time, rating) \
+                                VALUES ((SELECT IFNULL(MAX(id), ?) + ? FROM accounts), ?, ?, ?, ?, ?, ?) ON CONFLICT(username) DO NOTHING", \
+                                ((self.shard + 1 - self.shard_count, self.shard_count, username, password, highscore, accuracy, time, \
+                                  round((highscore*accuracy)/(100*time), 3)) for username, password, highscore, accuracy, time in accounts))
+        self.conn.commit()
+        return self.conn.total_changes - changes
+
+
+    def finish_import(self) -> None:
+        """
+        Rebuilds the rating tree after accounts were imported (once instead of one update per account)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.rebuild_rating_tree()
+        self.bump_data_version()
+        self.conn.commit()
+
+#--------------------------BULK---------------------------#
+
+
     def close_conn(self) -> None:
         """
         Closes the connection to the database
@@ -1,6 +1,6 @@
 """
 Python 3.10 is needed
-Execute "pip install bcrypt" before running the server
+Execute "pip install bcrypt numpy" before running the server
 The main file of the server to allow clients to connect to the server
 ~ Hartl Lorenz, Hell Andreas, Holas Christoph
 """
@@ -10,8 +10,11 @@ import database
 
 
 if __name__ == "__main__":
-    db = database.Database()
     server = NetworkServer()
+    #NetworkServer(shards=4) spreads the accounts over 4 database files
+    #NetworkServer(storage="memory") keeps everything in memory (nothing is written to disk), database_path="..." changes the file
+    #NetworkServer(challenge_secret="...") makes the seeds of the daily challenge unpredictable (keep it the same after a restart)
+    db = server.open_database()
     
     server.accept_clients(db)
     db.close_conn()
\ No newline at end of file
@@ -0,0 +1,911 @@
+"""
+In this file the in-memory database is defined
+It has the same methods as database.Database but keeps everything in dictionaries and sorted lists,
+so the network and the game can be benchmarked without disk access and load tests start with an empty database
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import time
+import heapq
+import array
+import bisect
+import bcrypt
+import secrets
+import functools
+import threading
+
+from typing import Iterable, Iterator
+from multiprocessing.managers import BaseManager
+
+import database
+
+
+def synchronized(cls: type) -> type:
+    """
+    Makes every public method of the class hold the lock of the instance while it runs
+    (the manager process runs the calls of every listener process in its own thread)
+
+    Parameters
+    ----------
+    cls : type
+        The class with a lock attribute (threading.RLock, methods can call each other)
+
+    Returns
+    -------
+    cls : type
+        The same class
+    """
+    def lock(method):
+        @functools.wraps(method)
+        def locked(self, *args, **kwargs):
+            with self.lock:
+                return method(self, *args, **kwargs)
+        return locked
+
+    for name, method in list(vars(cls).items()):
+        if callable(method) and not name.startswith("_"):
+            setattr(cls, name, lock(method))
+    return cls
+
+
+@synchronized
+class MemoryDatabase:
+    """
+    A class to store the accounts, games and leaderboards in memory (nothing is written to disk)
+
+    The leaderboard is a sorted list of (rating, username), so pages, ranks and the top are binary searches
+    The listener processes of the server share one MemoryDatabase through a MemoryManager (see NetworkServer(storage="memory"))
+
+    ...
+
+    Constants
+    ---------
+    RATING_BUCKETS : int
+        The number of buckets in the rating tree (see database.Database)
+    WINDOWS : dict[str, tuple[int, int]]
+        The length and the offset of the leaderboard windows [s] (see database.Database)
+    MODES : tuple[int, ...]
+        The game durations that have their own leaderboard [s] (see database.Database)
+
+    Attributes
+    ----------
+    lock : threading.RLock
+        Is held by every public method (see synchronized)
+    accounts : dict[str, list]
+        The password hash, highscore, accuracy, time and rating of every user
+    leaderboard : list[tuple[float, str]]
+        The rating and name of every user (sorted ascending, the best user is the last one)
+    games : dict[str, list[list[int, int, float, int, float, float]]]
+        The score, missed clicks, accuracy, time, rating and timestamp of every game of every user (oldest first)
+    submitted : dict[str, set[str]]
+        The ids of the games every user submitted from the journal
+    windows : dict[tuple[str, int], dict[str, list[float, int, float, int]]]
+        The best game of every user in every bucket of the leaderboard windows
+    modes : dict[int, dict[str, list[float, int, float]]]
+        The best game of every user in every game duration
+    mode_ratings : dict[int, list[float]]
+        The sorted ratings of every game duration (for the rank)
+    flagged : list[list]
+        The flagged games (oldest first)
+    groups : dict[str, set[str]]
+        The members of every group
+    group_codes : dict[str, str]
+        The invite code of every group
+    user_groups : dict[str, set[str]]
+        The groups of every user
+    group_cache : dict[str, list[list[str, float, int, float, int]]]
+        The last leaderboard of every group (is deleted when a member gets a new rating or the members change)
+    data_version : int
+        Is increased whenever the leaderboard changes (starts at the creation time [ns])
+
+    Methods
+    -------
+    register_user(username: str, password: str) -> bool
+        Stores a new account if the name isn't taken
+    verify_user(username: str, password: str) -> bool
+        Checks if the user entered the correct password
+    updat_highscore(uesrname: str, highscore: int, accuracy: float, time: int) -> None
+        Updates the highscore of the user
+    set_rating(username: str, rating: float) -> None
+        Moves the user to his new rating in the leaderboard
+    get_highscores() -> list[list[str, float, int, float, int]]
+        Gets the top 10
+    get_highscore_page(page_size: int, after: list[float, str] = None) -> tuple[list[list[str, float, int, float, int]], list[float, str] | None]
+        Gets one page of the leaderboard
+    get_user_highscore(username: str, with_rank: bool = True) -> list[float, int, float, int, int | None]
+        Gets the highscore and the global rank of the user
+    get_rank(rating: float) -> int
+        Gets the global rank a rating has
+    get_rating_tree() -> array.array
+        Gets the rating tree of the leaderboard (for the leaderboard snapshot)
+    get_data_version() -> int
+        Gets the data version
+    add_games(games: list[tuple[str, int, int, float, int, float]]) -> int
+        Stores finished games
+    submit_games(username: str, games: list[tuple[int, int, float, int, float, str]]) -> int
+        Stores the games the user played offline and updates his highscore
+    get_recent_games(username: str, limit: int = 10) -> list[list[int, int, float, int, float, float]]
+        Gets the last games of the user
+    get_game_averages(username: str) -> list[int, float, float, float] | None
+        Gets the number of games and the averages of the user
+    get_score_percentiles(username: str, percentiles: tuple[int] = (50, 90, 99)) -> list[int]
+        Gets the score percentiles of all games of the user
+    get_window_highscores(window: str, bucket: int, count: int = 10) -> list[list[str, float, int, float, int]]
+        Gets the best games of one bucket of a leaderboard window
+    prune_windows(now: float, keep: int = 8) -> None
+        Deletes the buckets of the leaderboard windows that are too old to be requested
+    get_mode_highscores(duration: int, count: int = 10) -> list[list[str, float, int, float, int]]
+        Gets the best games of one game duration
+    get_mode_highscore(username: str, duration: int) -> list[float, int, float, int, int] | None
+        Gets the best game and the rank of the user in one game duration
+    flag_scores(flagged: list[tuple[str, str, int, int, float, int, list[str], dict, float]]) -> None
+        Stores flagged games
+    get_flagged_scores(limit: int = 50) -> list[list]
+        Gets the last flagged games
+    join_group(group: str, username: str, max_members: int = 100, code: str = None) -> str | None
+        Adds the user to a group with its invite code
+    leave_group(group: str, username: str) -> None
+        Removes the user from a group
+    get_user_groups(username: str) -> dict[str, str]
+        Gets the groups of the user with their invite codes
+    get_group_highscores(group: str) -> list[list[str, float, int, float, int]] | None
+        Gets the leaderboard of a group
+    export_accounts(batch_size: int = 10000) -> Iterator[tuple[str, str, int, float, int]]
+        Streams all accounts
+    export_games(batch_size: int = 10000) -> Iterator[tuple[str, int, int, float, int, float]]
+        Streams all finished games
+    import_accounts(accounts: Iterable[tuple[str, bytes, int, float, int]]) -> int
+        Stores accounts with already hashed passwords
+    finish_import() -> None
+        Increases the data version after an import
+    close_conn() -> None
+        Does nothing (the data stays in memory until the process ends)
+    """
+
+    RATING_BUCKETS = database.Database.RATING_BUCKETS
+    WINDOWS = database.Database.WINDOWS
+    MODES = database.Database.MODES
+
+    def __init__(self) -> None:
+        """
+        Initialize a new empty MemoryDatabase
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.lock: threading.RLock = threading.RLock()
+        self.accounts: dict[str, list] = {}
+        self.leaderboard: list[tuple[float, str]] = []
+        self.games: dict[str, list[list[int, int, float, int, float, float]]] = {}
+        self.submitted: dict[str, set[str]] = {}
+        self.windows: dict[tuple[str, int], dict[str, list[float, int, float, int]]] = {}
+        self.modes: dict[int, dict[str, list[float, int, float]]] = {duration: {} for duration in self.MODES}
+        self.mode_ratings: dict[int, list[float]] = {duration: [] for duration in self.MODES}
+        self.flagged: list[list] = []
+        self.groups: dict[str, set[str]] = {}
+        self.group_codes: dict[str, str] = {}
+        self.user_groups: dict[str, set[str]] = {}
+        self.group_cache: dict[str, list[list[str, float, int, float, int]]] = {}
+        #starts at the current time, so a snapshot file of an earlier run never matches the version of this run
+        self.data_version: int = time.time_ns()
+
+#------------------------ACCOUNTS-------------------------#
+
+    def register_user(self, username: str, password: str) -> bool:
+        """
+        Stores a new account if the name isn't taken (the password is hashed with bcrypt like in the database)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user who is trying to register
+        password : str
+            The password the user entered
+
+        Returns
+        -------
+        : bool
+            Returns if the registration was successful
+        """
+        if username in self.accounts:
+            return False
+
+        self.accounts[username] = [bcrypt.hashpw(password.encode(), bcrypt.gensalt()), 0, 0.0, 30, 0.0]
+        bisect.insort(self.leaderboard, (0.0, username))
+        self.data_version += 1
+        return True
+
+
+    def verify_user(self, username: str, password: str) -> bool:
+        """
+        Checks if the user entered the correct password
+
+        Parameters
+        ----------
+        username : str
+            The name of the user who is trying to log in
+        password : str
+            The password the user entered
+
+        Returns
+        -------
+        : bool
+            Returns if the password was correct
+        """
+        account = self.accounts.get(username)
+        return bool(account) and bcrypt.checkpw(password.encode(), account[0])
+
+
+    def updat_highscore(self, uesrname: str, highscore: int, accuracy: float, time: int) -> None:
+        """
+        Updates the highscore of the user
+
+        Parameters
+        ----------
+        uesrname : str
+            The name of the user
+        highscore : int
+            The new highscore of the user
+        accuracy : float
+            The accuracy the user had at his highscore
+        time : int
+            The time the user had to reach the highscore
+
+        Returns
+        -------
+        None
+        """
+        account = self.accounts.get(uesrname)
+        if not account:
+            return
+
+        rating = round((highscore*accuracy)/(100*time), 3)
+        #the same types the database columns have
+        account[1:4] = [int(highscore), float(accuracy), int(time)]
+        self.set_rating(uesrname, rating)
+        for group in self.user_groups.get(uesrname, ()):
+            self.group_cache.pop(group, None)
+        self.data_version += 1
+
+
+    def set_rating(self, username: str, rating: float) -> None:
+        """
+        Moves the user to his new rating in the leaderboard
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        rating : float
+            The new rating
+
+        Returns
+        -------
+        None
+        """
+        account = self.accounts[username]
+        del self.leaderboard[bisect.bisect_left(self.leaderboard, (account[4], username))]
+        account[4] = rating
+        bisect.insort(self.leaderboard, (rating, username))
+
+
+    def get_highscores(self) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the top 10
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The top 10 clients in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        """
+        highscores, _ = self.get_highscore_page(10)
+        return highscores
+
+
+    def get_highscore_page(self, page_size: int, after: list[float, str] = None) -> tuple[list[list[str, float, int, float, int]], list[float, str] | None]:
+        """
+        Gets one page of the leaderboard (the cursor is found with a binary search)
+
+        Parameters
+        ----------
+        page_size : int
+            The maximum number of clients on the page (less than 1 is read as 1)
+        after : list[float, str] (default: None)
+            The rating and name of the last client of the previous page (None for the first page)
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients on the page in a sorted list with their name, rating, score, accuracy and time
+        cursor : list[float, str] | None
+            The cursor of the next page or None if there are no more clients
+        """
+        #a page of 0 or less would slice from the end of the leaderboard
+        page_size = max(int(page_size), 1)
+        end = bisect.bisect_left(self.leaderboard, (after[0], after[1])) if after else len(self.leaderboard)
+        highscores = []
+        for rating, username in reversed(self.leaderboard[max(end - page_size, 0):end]):
+            _, highscore, accuracy, time, _ = self.accounts[username]
+            highscores.append([username, rating, highscore, accuracy, time])
+
+        cursor = None
+        if len(highscores) == page_size:
+            cursor = [highscores[-1][1], highscores[-1][0]]
+        return highscores, cursor
+
+
+    def get_user_highscore(self, username: str, with_rank: bool = True) -> list[float, int, float, int, int | None]:
+        """
+        Gets the highscore and the global rank of the user
+
+        Parameters
+        ----------
+        username : str
+            The name of the user who requests his highscore
+        with_rank : bool (default: True)
+            If the rank should be counted (else the rank is None)
+
+        Returns
+        -------
+        highscore : list[float, int, float, int, int | None]
+            The rating, score, accuracy, time and global rank of the user
+        """
+        account = self.accounts.get(username)
+        if not account:
+            return None
+        _, highscore, accuracy, time, rating = account
+        return [rating, highscore, accuracy, time, self.get_rank(rating) if with_rank else None]
+
+
+    def get_rank(self, rating: float) -> int:
+        """
+        Gets the global rank a rating has (1 is the best, accounts with the same rating share the rank)
+
+        Parameters
+        ----------
+        rating : float
+            The rating to get the rank of
+
+        Returns
+        -------
+        : int
+            The rank of the rating
+        """
+        return len(self.leaderboard) - bisect.bisect_right(self.leaderboard, rating, key=lambda entry: entry[0]) + 1
+
+
+    def get_rating_tree(self) -> array.array:
+        """
+        Gets the rating tree of the leaderboard (the same fenwick tree database.Database stores)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tree : array.array
+            The count of every node (index 0 is unused)
+        """
+        tree = array.array("I", bytes(4 * (self.RATING_BUCKETS + 1)))
+        for rating, _ in self.leaderboard:
+            tree[database.Database.rating_bucket(rating)] += 1
+        for node in range(1, self.RATING_BUCKETS + 1):
+            parent = node + (node & -node)
+            if parent <= self.RATING_BUCKETS:
+                tree[parent] += tree[node]
+        return tree
+
+
+    def get_data_version(self) -> int:
+        """
+        Gets the data version (changes whenever the leaderboard changes)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : int
+            The data version
+        """
+        return self.data_version
+
+#------------------------ACCOUNTS-------------------------#
+
+
+#-------------------------GAMES---------------------------#
+
+    def add_games(self, games: list[tuple[str, int, int, float, int, float]]) -> int:
+        """
+        Stores finished games and updates the leaderboard windows and modes
+
+        Parameters
+        ----------
+        games : list[tuple[str, int, int, float, int, float]]
+            The username, score, missed clicks, accuracy, time and timestamp of every game
+
+        Returns
+        -------
+        : int
+            The number of stored games (games of unknown users are skipped)
+        """
+        stored = 0
+        for username, score, missed, accuracy, time, played_at in games:
+            if username not in self.accounts:
+                continue
+            rating = round((score*accuracy)/(100*time), 3)
+            self.games.setdefault(username, []).append([int(score), int(missed), float(accuracy), int(time), rating, float(played_at)])
+            stored += 1
+
+            for window in self.WINDOWS:
+                bucket = self.windows.setdefault((window, database.Database.window_bucket(window, played_at)), {})
+                if username not in bucket or rating > bucket[username][0]:
+                    bucket[username] = [rating, score, accuracy, time]
+
+            mode = self.modes.get(time)
+            if mode is not None and (username not in mode or rating > mode[username][0]):
+                if username in mode:
+                    ratings = self.mode_ratings[time]
+                    del ratings[bisect.bisect_left(ratings, mode[username][0])]
+                mode[username] = [rating, score, accuracy]
+                bisect.insort(self.mode_ratings[time], rating)
+        return stored
+
+
+    def submit_games(self, username: str, games: list[tuple[int, int, float, int, float, str]]) -> int:
+        """
+        Stores the games the user played offline and updates his highscore
+        Games that are already stored (same user and id) are skipped
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        games : list[tuple[int, int, float, int, float, str]]
+            The score, missed clicks, accuracy, time, timestamp and id (of the journal entry) of every game
+
+        Returns
+        -------
+        : int
+            The number of stored games
+        """
+        account = self.accounts.get(username)
+        if not account:
+            return 0
+
+        submitted = self.submitted.setdefault(username, set())
+        new_games = []
+        for game in games:
+            if game[5] not in submitted:
+                submitted.add(game[5])
+                new_games.append((username, *game[:5]))
+        stored = self.add_games(new_games)
+
+        #the best game of the batch replaces the highscore if it is better
+        best = max(new_games, key=lambda game: round((game[1]*game[3])/(100*game[4]), 3), default=None)
+        if best and round((best[1]*best[3])/(100*best[4]), 3) > account[4]:
+            self.updat_highscore(username, best[1], best[3], best[4])
+        return stored
+
+
+    def get_recent_games(self, username: str, limit: int = 10) -> list[list[int, int, float, int, float, float]]:
+        """
+        Gets the last games of the user (newest is index 0)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        limit : int (default: 10)
+            The maximum number of games
+
+        Returns
+        -------
+        : list[list[int, int, float, int, float, float]]
+            The score, missed clicks, accuracy, time, rating and timestamp of every game
+        """
+        games = sorted(self.games.get(username, []), key=lambda game: game[5], reverse=True)
+        return [list(game) for game in games[:max(int(limit), 1)]]
+
+
+    def get_game_averages(self, username: str) -> list[int, float, float, float] | None:
+        """
+        Gets the number of games and the average score, missed clicks and accuracy of the user
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        : list[int, float, float, float]
+            The number of games, the average score, the average missed clicks and the average accuracy
+        : None
+            If the user has not finished a game yet
+        """
+        games = self.games.get(username)
+        if not games:
+            return None
+        count = len(games)
+        return [count, round(sum(game[0] for game in games)/count, 2), round(sum(game[1] for game in games)/count, 2), \
+                round(sum(game[2] for game in games)/count, 2)]
+
+
+    def get_score_percentiles(self, username: str, percentiles: tuple[int] = (50, 90, 99)) -> list[int]:
+        """
+        Gets the score percentiles of all games of the user (nearest rank method)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        percentiles : tuple[int] (default: (50, 90, 99))
+            The percentiles to get
+
+        Returns
+        -------
+        scores : list[int]
+            The score of every percentile (empty if the user has not finished a game yet)
+        """
+        scores = sorted(game[0] for game in self.games.get(username, []))
+        return [scores[max(min(-(-percentile*len(scores) // 100), len(scores)) - 1, 0)] for percentile in percentiles] if scores else []
+
+
+    def get_window_highscores(self, window: str, bucket: int, count: int = 10) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the best games of one bucket of a leaderboard window
+
+        Parameters
+        ----------
+        window : str
+            "daily" or "weekly"
+        bucket : int
+            The bucket of the window (see database.Database.window_bucket)
+        count : int (default: 10)
+            The maximum number of clients
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        """
+        best = heapq.nlargest(count, self.windows.get((window, bucket), {}).items(), key=lambda entry: entry[1][0])
+        return [[username, *entry] for username, entry in best]
+
+
+    def prune_windows(self, now: float, keep: int = 8) -> None:
+        """
+        Deletes the buckets of the leaderboard windows that are too old to be requested
+
+        Parameters
+        ----------
+        now : float
+            The current unix time
+        keep : int (default: 8)
+            The number of buckets of every window that are kept (including the current one)
+
+        Returns
+        -------
+        None
+        """
+        for window, bucket in list(self.windows):
+            if bucket <= database.Database.window_bucket(window, now) - keep:
+                del self.windows[(window, bucket)]
+
+
+    def get_mode_highscores(self, duration: int, count: int = 10) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the best games of one game duration
+
+        Parameters
+        ----------
+        duration : int
+            The game duration (one of MODES) [s]
+        count : int (default: 10)
+            The maximum number of clients
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients in a sorted list (best is index 0) with their name, rating, score, accuracy and duration
+        """
+        best = heapq.nlargest(count, self.modes.get(duration, {}).items(), key=lambda entry: entry[1][0])
+        return [[username, *entry, duration] for username, entry in best]
+
+
+    def get_mode_highscore(self, username: str, duration: int) -> list[float, int, float, int, int] | None:
+        """
+        Gets the best game and the rank of the user in one game duration
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        duration : int
+            The game duration (one of MODES) [s]
+
+        Returns
+        -------
+        : list[float, int, float, int, int]
+            The rating, score, accuracy, duration and rank of the user
+        : None
+            If the user has not finished a game with this duration yet
+        """
+        entry = self.modes.get(duration, {}).get(username)
+        if not entry:
+            return None
+        ratings = self.mode_ratings[duration]
+        return [*entry, duration, len(ratings) - bisect.bisect_right(ratings, entry[0]) + 1]
+
+#-------------------------GAMES---------------------------#
+
+
+#------------------------FLAGGED--------------------------#
+
+    def flag_scores(self, flagged: list[tuple[str, str, int, int, float, int, list[str], dict, float]]) -> None:
+        """
+        Stores submitted games that failed the plausibility checks for review
+
+        Parameters
+        ----------
+        flagged : list[tuple[str, str, int, int, float, int, list[str], dict, float]]
+            The username, command, score, missed clicks, accuracy, time, reasons, clicks and timestamp of every game
+
+        Returns
+        -------
+        None
+        """
+        self.flagged.extend(list(entry) for entry in flagged)
+
+
+    def get_flagged_scores(self, limit: int = 50) -> list[list]:
+        """
+        Gets the last flagged games (newest is index 0)
+
+        Parameters
+        ----------
+        limit : int (default: 50)
+            The maximum number of games
+
+        Returns
+        -------
+        : list[list]
+            The username, command, score, missed clicks, accuracy, time, reasons, clicks and timestamp of every game
+        """
+        return [list(entry) for entry in reversed(self.flagged[-limit:])] if limit > 0 else []
+
+#------------------------FLAGGED--------------------------#
+
+
+#-------------------------GROUPS--------------------------#
+
+    def join_group(self, group: str, username: str, max_members: int = 100, code: str = None) -> str | None:
+        """
+        Adds the user to a group with its invite code (creates the group if it doesn't exist)
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+        username : str
+            The name of the user
+        max_members : int (default: 100)
+            The maximum number of members of a group
+        code : str (default: None)
+            The invite code of the group (not needed to create a group)
+
+        Returns
+        -------
+        : str
+            Why the user couldn't join the group
+        : None
+            If the user is a member of the group now
+        """
+        if username not in self.accounts:
+            return "Unknown user!"
+        if group not in self.groups:
+            self.groups[group] = set()
+            self.group_codes[group] = secrets.token_hex(4)
+        #a member joining again doesn't need the code
+        elif username not in self.groups[group] and code != self.group_codes[group]:
+            return "Wrong invite code!"
+        members = self.groups[group]
+        if username not in members and len(members) >= max_members:
+            return "The group is full!"
+
+        members.add(username)
+        self.user_groups.setdefault(username, set()).add(group)
+        self.group_cache.pop(group, None)
+        return None
+
+
+    def leave_group(self, group: str, username: str) -> None:
+        """
+        Removes the user from a group (the group is deleted with its last member)
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        None
+        """
+        members = self.groups.get(group)
+        if members is None:
+            return
+
+        members.discard(username)
+        self.user_groups.get(username, set()).discard(group)
+        self.group_cache.pop(group, None)
+        if not members:
+            del self.groups[group]
+            del self.group_codes[group]
+
+
+    def get_user_groups(self, username: str) -> dict[str, str]:
+        """
+        Gets the groups of the user with their invite codes
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        : dict[str, str]
+            The invite code of every group (sorted by the names)
+        """
+        return {group: self.group_codes[group] for group in sorted(self.user_groups.get(username, ()))}
+
+
+    def get_group_highscores(self, group: str) -> list[list[str, float, int, float, int]] | None:
+        """
+        Gets the leaderboard of a group (cached until a member gets a new rating or the members change)
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The members in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        : None
+            If the group doesn't exist
+        """
+        if group not in self.groups:
+            return None
+        if group not in self.group_cache:
+            highscores = [[username, account[4], *account[1:4]] for username, account in \
+                          ((username, self.accounts[username]) for username in self.groups[group])]
+            highscores.sort(key=lambda entry: (entry[1], entry[0]), reverse=True)
+            self.group_cache[group] = highscores
+        return [list(entry) for entry in self.group_cache[group]]
+
+#-------------------------GROUPS--------------------------#
+
+
+#--------------------------BULK---------------------------#
+
+    def export_accounts(self, batch_size: int = 10000) -> Iterator[tuple[str, str, int, float, int]]:
+        """
+        Streams all accounts (in the order they were registered)
+
+        Parameters
+        ----------
+        batch_size : int (default: 10000)
+            Is ignored (everything is in memory already)
+
+        Returns
+        -------
+        : Iterator[tuple[str, str, int, float, int]]
+            The username, bcrypt hash, highscore, accuracy and time of every account
+        """
+        for username, (password, highscore, accuracy, time, _) in list(self.accounts.items()):
+            yield username, password.decode() if isinstance(password, bytes) else password, highscore, accuracy, time
+
+
+    def export_games(self, batch_size: int = 10000) -> Iterator[tuple[str, int, int, float, int, float]]:
+        """
+        Streams all finished games (user by user)
+
+        Parameters
+        ----------
+        batch_size : int (default: 10000)
+            Is ignored (everything is in memory already)
+
+        Returns
+        -------
+        : Iterator[tuple[str, int, int, float, int, float]]
+            The username, score, missed clicks, accuracy, time and timestamp of every game
+        """
+        for username, games in list(self.games.items()):
+            for score, missed, accuracy, time, _, played_at in games:
+                yield username, score, missed, accuracy, time, played_at
+
+
+    def import_accounts(self, accounts: Iterable[tuple[str, bytes, int, float, int]]) -> int:
+        """
+        Stores accounts with already hashed passwords (existing usernames are skipped)
+
+        Parameters
+        ----------
+        accounts : Iterable[tuple[str, bytes, int, float, int]]
+            The username, bcrypt hash, highscore, accuracy and time of every account
+
+        Returns
+        -------
+        : int
+            The number of stored accounts
+        """
+        stored = 0
+        for username, password, highscore, accuracy, time in accounts:
+            if username in self.accounts:
+                continue
+            rating = round((highscore*accuracy)/(100*time), 3)
+            self.accounts[username] = [password, highscore, accuracy, time, rating]
+            self.leaderboard.append((rating, username))
+            stored += 1
+        #one sort instead of one insort per account
+        self.leaderboard.sort()
+        return stored
+
+
+    def finish_import(self) -> None:
+        """
+        Increases the data version after an import (there is no rating tree to rebuild)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.data_version += 1
+
+#--------------------------BULK---------------------------#
+
+
+    def close_conn(self) -> None:
+        """
+        Does nothing (the data stays in memory until the process ends, commands "close" the database after every use)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        return None
+
+
+class MemoryManager(BaseManager):
+    """
+    A manager process that holds one MemoryDatabase for all processes of the server
+    (MemoryManager().MemoryDatabase() returns a proxy, every call is sent to the manager process)
+    """
+
+
+MemoryManager.register("MemoryDatabase", MemoryDatabase)
@@ -0,0 +1,261 @@
+"""
+In this file the profiler of the server is defined
+An admin can start a profiling window at runtime (PROFILE command), every process of the server
+profiles itself until the window is over and writes its profile to the profile directory
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import os
+import sys
+import time
+import cProfile
+import threading
+import collections
+import multiprocessing
+
+
+class Profiler:
+    """
+    A class to profile the processes of the server for a limited time
+
+    The window is shared by all processes, every process starts and stops its own profile at checkpoints
+    (cProfile only profiles the thread that enabled it, so it can't be stopped by another thread)
+
+    Modes
+    -----
+    deterministic : cProfile, writes <directory>/<window>-<label>-<pid>.pstats (open it with pstats or snakeviz)
+    sampling : samples the stack every sample_interval, writes <directory>/<window>-<label>-<pid>.folded
+        (collapsed stacks, one "frame;frame;frame count" per line for flamegraph.pl or speedscope)
+
+    ...
+
+    Constants
+    ---------
+    MODES : tuple[str, str] -> ("deterministic", "sampling")
+        The supported modes (the index is stored in the shared mode)
+
+    Attributes
+    ----------
+    directory : str
+        The directory the profiles are written to
+    sample_interval : float
+        The time between two samples in the sampling mode [s]
+    until : multiprocessing.Value
+        The end of the current window (shared by all processes) [time.time()]
+    window : multiprocessing.Value
+        The number of the current window (shared by all processes, 0 if there was no window)
+    mode : multiprocessing.Value
+        The index of the mode of the current window (shared by all processes)
+    active_window : int
+        The window this process is profiling (0 if it isn't profiling)
+    label : str
+        The name of the part of the server that is profiled (is used in the file name)
+    profile : cProfile.Profile | None
+        The profile of the deterministic mode
+    sampler : threading.Thread | None
+        The thread that takes the samples in the sampling mode
+    samples : collections.Counter
+        How often every stack was sampled
+    stop_sampling : threading.Event
+        Stops the sampler
+
+    Methods
+    -------
+    start_window(mode: str, duration: float) -> float
+        Starts a new profiling window for all processes
+    checkpoint(label: str) -> None
+        Starts or stops the profile of this process if the window started or ended
+    start(label: str) -> None
+        Starts profiling the calling thread
+    stop() -> str | None
+        Stops profiling and writes the profile
+    reset() -> None
+        Drops a profile that was inherited from the parent process
+    sample(thread_id: int, until: float) -> None
+        Samples the stack of a thread until the window is over
+    """
+
+    MODES = ("deterministic", "sampling")
+
+    def __init__(self, directory: str = "profiles", sample_interval: float = 0.005) -> None:
+        """
+        Initialize a new Profiler (has to be created before the processes are started)
+
+        Parameters
+        ----------
+        directory : str (default: "profiles")
+            The directory the profiles are written to
+        sample_interval : float (default: 0.005)
+            The time between two samples in the sampling mode [s]
+
+        Returns
+        -------
+        None
+        """
+        self.directory: str = directory
+        self.sample_interval: float = sample_interval
+        self.until: multiprocessing.Value = multiprocessing.Value("d", 0)
+        self.window: multiprocessing.Value = multiprocessing.Value("i", 0)
+        self.mode: multiprocessing.Value = multiprocessing.Value("i", 0)
+
+        self.active_window: int = 0
+        self.label: str = ""
+        self.profile: cProfile.Profile | None = None
+        self.sampler: threading.Thread | None = None
+        self.samples: collections.Counter = collections.Counter()
+        self.stop_sampling: threading.Event = threading.Event()
+
+
+    def start_window(self, mode: str, duration: float) -> float:
+        """
+        Starts a new profiling window for all processes
+
+        Parameters
+        ----------
+        mode : str
+            "deterministic" or "sampling"
+        duration : float
+            The length of the window [s]
+
+        Returns
+        -------
+        : float
+            The end of the window [time.time()]
+        """
+        with self.window.get_lock():
+            self.mode.value = self.MODES.index(mode)
+            self.until.value = time.time() + duration
+            self.window.value += 1
+        return self.until.value
+
+
+    def checkpoint(self, label: str) -> None:
+        """
+        Starts or stops the profile of this process if the window started or ended
+        Is called by every profiled loop (a blocked process stops profiling at its next checkpoint)
+
+        Parameters
+        ----------
+        label : str
+            The name of the part of the server that is profiled
+
+        Returns
+        -------
+        None
+        """
+        now = time.time()
+        if self.active_window and (now >= self.until.value or self.active_window != self.window.value):
+            self.stop()
+
+        if not self.active_window and now < self.until.value:
+            self.start(label)
+
+
+    def start(self, label: str) -> None:
+        """
+        Starts profiling the calling thread
+
+        Parameters
+        ----------
+        label : str
+            The name of the part of the server that is profiled
+
+        Returns
+        -------
+        None
+        """
+        self.active_window = self.window.value
+        self.label = label
+        if self.MODES[self.mode.value] == "deterministic":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            self.samples = collections.Counter()
+            self.stop_sampling.clear()
+            self.sampler = threading.Thread(target=self.sample, args=(threading.get_ident(), self.until.value), daemon=True)
+            self.sampler.start()
+        print(f"[{'PROFILE':<10}] Profiling {label} ({self.MODES[self.mode.value]}, window {self.active_window})")
+
+
+    def stop(self) -> str | None:
+        """
+        Stops profiling and writes the profile
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        path : str | None
+            The path of the written profile (None if nothing was profiled)
+        """
+        if not self.active_window:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.active_window}-{self.label}-{os.getpid()}")
+        if self.profile:
+            self.profile.disable()
+            path += ".pstats"
+            self.profile.dump_stats(path)
+        else:
+            self.stop_sampling.set()
+            self.sampler.join()
+            path += ".folded"
+            with open(path, "w") as file:
+                for stack, count in self.samples.items():
+                    file.write(f"{stack} {count}\n")
+
+        print(f"[{'PROFILE':<10}] Wrote the profile of {self.label} to {path}")
+        self.active_window = 0
+        self.profile = None
+        self.sampler = None
+        return path
+
+
+    def reset(self) -> None:
+        """
+        Drops a profile that was inherited from the parent process (is called when a process starts)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.profile:
+            self.profile.disable()
+        #the sampler thread of the parent doesn't exist in the child
+        self.active_window = 0
+        self.profile = None
+        self.sampler = None
+
+
+    def sample(self, thread_id: int, until: float) -> None:
+        """
+        Samples the stack of a thread until the window is over
+
+        Parameters
+        ----------
+        thread_id : int
+            The id of the profiled thread
+        until : float
+            The end of the window [time.time()]
+
+        Returns
+        -------
+        None
+        """
+        while not self.stop_sampling.wait(self.sample_interval) and time.time() < until:
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                #collapsed stacks start with the outermost frame
+                self.samples[";".join(reversed(stack))] += 1
@@ -0,0 +1,136 @@
+"""
+In this file the rate limiting of the server is defined
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import time
+
+
+class TokenBucket:
+    """
+    A token bucket to limit how often something can happen
+
+    ...
+
+    Attributes
+    ----------
+    rate : float
+        The tokens that are added every second
+    capacity : float
+        The maximum number of tokens (allows short bursts)
+    tokens : float
+        The tokens that are left
+    last_update : float
+        The last time tokens were added
+
+    Methods
+    -------
+    take(amount: float = 1) -> float
+        Takes tokens from the bucket if there are enough
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Initialize a new full TokenBucket
+
+        Parameters
+        ----------
+        rate : float
+            The tokens that are added every second
+        capacity : float
+            The maximum number of tokens
+
+        Returns
+        -------
+        None
+        """
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self.tokens: float = capacity
+        self.last_update: float = time.monotonic()
+
+
+    def take(self, amount: float = 1) -> float:
+        """
+        Takes tokens from the bucket if there are enough
+
+        Parameters
+        ----------
+        amount : float (default: 1)
+            The number of tokens to take
+
+        Returns
+        -------
+        : float
+            0 if the tokens were taken, else the time until there are enough tokens [s]
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_update) * self.rate)
+        self.last_update = now
+
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0
+        return (amount - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    The rate limits of one connection
+    Every command has to pass the bucket of the connection and the bucket of its command type
+
+    ...
+
+    Attributes
+    ----------
+    connection_bucket : TokenBucket
+        Limits all commands of the connection
+    command_buckets : dict[str, TokenBucket]
+        Limits the commands of one type (commands without a bucket are only limited by the connection bucket)
+
+    Methods
+    -------
+    allow(command: str) -> float
+        Checks if the command is allowed
+    """
+
+    def __init__(self, connection_limit: tuple[float, float], command_limits: dict[str, tuple[float, float]]) -> None:
+        """
+        Initialize a new RateLimiter
+
+        Parameters
+        ----------
+        connection_limit : tuple[float, float]
+            The rate and the capacity of the connection bucket
+        command_limits : dict[str, tuple[float, float]]
+            The rate and the capacity of the bucket of every limited command
+
+        Returns
+        -------
+        None
+        """
+        self.connection_bucket: TokenBucket = TokenBucket(*connection_limit)
+        self.command_buckets: dict[str, TokenBucket] = {command: TokenBucket(*limit) for command, limit in command_limits.items()}
+
+
+    def allow(self, command: str) -> float:
+        """
+        Checks if the command is allowed
+
+        Parameters
+        ----------
+        command : str
+            The name of the command
+
+        Returns
+        -------
+        retry_after : float
+            0 if the command is allowed, else the time until it would be allowed [s]
+        """
+        command_bucket = self.command_buckets.get(command)
+        if command_bucket:
+            retry_after = command_bucket.take()
+            if retry_after:
+                return retry_after
+
+        return self.connection_bucket.take()
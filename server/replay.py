@@ -0,0 +1,355 @@
+"""
+The replay tool of the server
+Sends the frames of a capture log (see capture.py) to a server with their original timing
+and reports the latency of every command, so changes to the server can be compared under the same traffic
+
+Usage: python replay.py capture.log [--host 127.0.0.2] [--port 3333] [--speed 1] [--login] [--password pwd] [--credentials users.json]
+                                  [--output report.json] [--compare baseline.json]
+The capture log has no passwords, LOGIN and REGISTER are sent with --password or the password of the user in --credentials
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import json
+import time
+import zlib
+import socket
+import argparse
+import threading
+
+from capture import CaptureLog
+from server_network import COMPRESSION_DICTIONARY
+
+
+class Replay:
+    """
+    A class to replay a capture log against a server
+
+    ...
+
+    Constants
+    ---------
+    ENCODING : str -> "utf-8"
+        The encoding of the frames
+    COMPRESSED_FLAG : int -> 1 << 127
+        The bit of the length header that marks a compressed frame
+    PERCENTILES : tuple[int, ...] -> (50, 95, 99)
+        The percentiles of the latency in the report
+    NO_RESPONSE : tuple[str, ...] -> ("GAME_FINISHED", "CLOSE_CONNECTION")
+        The commands the server doesn't answer
+
+    Attributes
+    ----------
+    host : str
+        The host of the server
+    port : int
+        The port of the server
+    speed : float
+        How much faster than captured the frames are sent
+    login : bool
+        If REGISTER is replayed as LOGIN (the accounts already exist on the server)
+    password : str
+        The password LOGIN and REGISTER are sent with (the capture log has no passwords)
+    credentials : dict[str, str]
+        The passwords of single users (replace password for them)
+    connections : dict[int, list[tuple[float, bytes]]]
+        The frames of every captured connection with the time they were received
+    latencies : dict[str, list[float]]
+        The measured latencies of every command [ms]
+    busy : dict[str, int]
+        How often every command was rejected with BUSY
+    lost : int
+        The number of requests that got no response
+    refused : int
+        The number of connections the server refused
+    lock : threading.Lock
+        Locks latencies, busy, lost and refused
+
+    Methods
+    -------
+    run() -> dict[str, dict[str, float]]
+        Replays all connections and returns the report
+    replay_connection(frames: list[tuple[float, bytes]], start: float) -> None
+        Replays the frames of one connection
+    receive_responses(conn: socket.socket, pending: dict[int, tuple[str, float]], pending_lock: threading.Lock) -> None
+        Receives the responses of one connection and measures the latency of the requests
+    report() -> dict[str, dict[str, float]]
+        Creates the latency report
+    """
+
+    ENCODING = "utf-8"
+    COMPRESSED_FLAG = 1 << 127
+    PERCENTILES = (50, 95, 99)
+    NO_RESPONSE = ("GAME_FINISHED", "CLOSE_CONNECTION")
+
+    def __init__(self, path: str, host: str = "127.0.0.2", port: int = 3333, speed: float = 1, login: bool = False, \
+                 password: str = "replay", credentials: dict[str, str] = None) -> None:
+        """
+        Initialize a new Replay
+
+        Parameters
+        ----------
+        path : str
+            The path of the capture log
+        host : str (default: "127.0.0.2")
+            The host of the server
+        port : int (default: 3333)
+            The port of the server
+        speed : float (default: 1)
+            How much faster than captured the frames are sent
+        login : bool (default: False)
+            If REGISTER is replayed as LOGIN (the accounts already exist on the server)
+        password : str (default: "replay")
+            The password LOGIN and REGISTER are sent with
+        credentials : dict[str, str] (default: None)
+            The passwords of single users (replace password for them)
+
+        Returns
+        -------
+        None
+        """
+        self.host: str = host
+        self.port: int = port
+        self.speed: float = speed
+        self.login: bool = login
+        self.password: str = password
+        self.credentials: dict[str, str] = credentials or {}
+
+        self.connections: dict[int, list[tuple[float, bytes]]] = {}
+        for timestamp, connection_id, frame in CaptureLog.read(path):
+            self.connections.setdefault(connection_id, []).append((timestamp, frame))
+
+        self.latencies: dict[str, list[float]] = {}
+        self.busy: dict[str, int] = {}
+        self.lost: int = 0
+        self.refused: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+
+    def run(self) -> dict[str, dict[str, float]]:
+        """
+        Replays all connections and returns the report
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : dict[str, dict[str, float]]
+            The report (see report)
+        """
+        if not self.connections:
+            return {}
+
+        #the first captured frame is sent right away, all others keep their distance to it
+        first = min(frames[0][0] for frames in self.connections.values())
+        start = time.perf_counter()
+        threads = []
+        for frames in self.connections.values():
+            shifted = [((timestamp - first) / self.speed, frame) for timestamp, frame in frames]
+            thread = threading.Thread(target=self.replay_connection, args=(shifted, start), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+        return self.report()
+
+
+    def replay_connection(self, frames: list[tuple[float, bytes]], start: float) -> None:
+        """
+        Replays the frames of one connection
+
+        Parameters
+        ----------
+        frames : list[tuple[float, bytes]]
+            The frames with the time they are sent at (relative to start) [s]
+        start : float
+            The time the replay started (time.perf_counter)
+
+        Returns
+        -------
+        None
+        """
+        pending: dict[int, tuple[str, float]] = {}
+        pending_lock = threading.Lock()
+
+        conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        conn.connect((self.host, self.port))
+        receiver = threading.Thread(target=self.receive_responses, args=(conn, pending, pending_lock), daemon=True)
+        receiver.start()
+
+        for offset, frame in frames:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            data = json.loads(frame.decode(self.ENCODING))
+            if isinstance(data, dict) and data.get("command") in ("LOGIN", "REGISTER"):
+                if self.login:
+                    data["command"] = "LOGIN"
+                #the server doesn't capture the passwords
+                data["password"] = self.credentials.get(data.get("from"), self.password)
+                frame = json.dumps(data).encode(self.ENCODING)
+            with pending_lock:
+                for request in data if isinstance(data, list) else [data]:
+                    if request.get("id") is not None and request.get("command") not in self.NO_RESPONSE:
+                        pending[request["id"]] = (request.get("command"), time.perf_counter())
+            try:
+                conn.sendall(len(frame).to_bytes(16, "big") + frame)
+            except OSError:
+                break
+
+        #the last responses get some time before the connection is closed
+        deadline = time.perf_counter() + 5
+        while pending and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+        try:
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        conn.close()
+        receiver.join()
+
+        with self.lock:
+            self.lost += len(pending)
+
+
+    def receive_responses(self, conn: socket.socket, pending: dict[int, tuple[str, float]], pending_lock: threading.Lock) -> None:
+        """
+        Receives the responses of one connection and measures the latency of the requests
+
+        Parameters
+        ----------
+        conn : socket.socket
+            The connection to the server
+        pending : dict[int, tuple[str, float]]
+            The command and the send time of every request without response
+        pending_lock : threading.Lock
+            Locks pending
+
+        Returns
+        -------
+        None
+        """
+        def recv_exact(length: int) -> bytes:
+            data = b""
+            while len(data) < length:
+                chunk = conn.recv(length - len(data))
+                if not chunk:
+                    raise ConnectionResetError
+                data += chunk
+            return data
+
+        while True:
+            try:
+                header = int.from_bytes(recv_exact(16), "big")
+                data = recv_exact(header & (self.COMPRESSED_FLAG - 1))
+            except OSError:
+                return
+            received = time.perf_counter()
+
+            if header & self.COMPRESSED_FLAG:
+                decompressor = zlib.decompressobj(zdict=COMPRESSION_DICTIONARY)
+                data = decompressor.decompress(data) + decompressor.flush()
+            response = json.loads(data.decode(self.ENCODING))
+
+            with pending_lock:
+                request = pending.pop(response.get("id"), None)
+            if request is None:
+                continue
+
+            command, sent = request
+            with self.lock:
+                if response.get("command") == "CONNECTION_REFUSED":
+                    self.refused += 1
+                elif response.get("command") == "BUSY":
+                    self.busy[command] = self.busy.get(command, 0) + 1
+                else:
+                    self.latencies.setdefault(command, []).append((received - sent) * 1000)
+
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """
+        Creates the latency report
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        report : dict[str, dict[str, float]]
+            The count, busy replies, percentiles and maximum of the latency of every command [ms]
+            and the number of lost responses and refused connections (under "lost" and "refused")
+        """
+        report = {}
+        for command in sorted(set(self.latencies) | set(self.busy)):
+            latencies = sorted(self.latencies.get(command, []))
+            stats = {"count": len(latencies), "busy": self.busy.get(command, 0)}
+            for percentile in self.PERCENTILES:
+                #nearest-rank percentile
+                stats[f"p{percentile}"] = round(latencies[max(0, -(-percentile * len(latencies) // 100) - 1)], 3) if latencies else None
+            stats["max"] = round(latencies[-1], 3) if latencies else None
+            report[command] = stats
+
+        report["lost"] = {"count": self.lost}
+        report["refused"] = {"count": self.refused}
+        return report
+
+
+def print_report(report: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]] = None) -> None:
+    """
+    Prints a latency report (with the difference to the baseline if it is given)
+
+    Parameters
+    ----------
+    report : dict[str, dict[str, float]]
+        The report of the replay
+    baseline : dict[str, dict[str, float]] (default: None)
+        The report of an earlier replay
+
+    Returns
+    -------
+    None
+    """
+    for command, stats in report.items():
+        columns = []
+        for key, value in stats.items():
+            column = f"{key}={value}"
+            old = (baseline or {}).get(command, {}).get(key)
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)):
+                column += f" ({value - old:+.3f})"
+            columns.append(column)
+        print(f"[{'REPLAY':<10}] {command:<26} {' '.join(columns)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replays a capture log against a server")
+    parser.add_argument("capture", help="the capture log (written with NetworkServer(capture_path=...))")
+    parser.add_argument("--host", default="127.0.0.2")
+    parser.add_argument("--port", type=int, default=3333)
+    parser.add_argument("--speed", type=float, default=1, help="how much faster than captured the frames are sent")
+    parser.add_argument("--login", action="store_true", help="replays REGISTER as LOGIN (the accounts already exist)")
+    parser.add_argument("--password", default="replay", help="the password of every LOGIN and REGISTER (the capture log has none)")
+    parser.add_argument("--credentials", help="a json file with the password of every user ({\"name\": \"password\"}, replaces --password)")
+    parser.add_argument("--output", help="writes the report to this json file")
+    parser.add_argument("--compare", help="a report of an earlier replay to compare with")
+    args = parser.parse_args()
+
+    credentials = None
+    if args.credentials:
+        with open(args.credentials) as file:
+            credentials = json.load(file)
+    report = Replay(args.capture, args.host, args.port, args.speed, args.login, args.password, credentials).run()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
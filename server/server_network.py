@@ -3,12 +3,35 @@ In this file the Network part of the server is defined
 ~ Hartl Lorenz, Hell Andreas, Holas Christoph
 """
 
+import os
 import json
+import math
+import zlib
+import time
+import queue
 import socket
 import database
+import threading
 import multiprocessing
 
 from typing import Any
+from timer_wheel import TimerWheel
+from rate_limit import RateLimiter
+from snapshot import LeaderboardSnapshot
+from capture import CaptureLog
+from validation import ScoreValidator
+from profiler import Profiler
+from sharding import ShardedDatabase
+from memory_database import MemoryDatabase, MemoryManager
+
+#the preset dictionary for the compression (has to be the same in the client (client_network.py))
+#the most common parts of the messages are at the end because zlib prefers close matches
+COMPRESSION_DICTIONARY = (b'"reason": "retry_after": "request": "rate_limited", "overloaded", "page_size": "limit": '
+                          b'"missed": "highscore": "averages": "percentiles": "games": [[, "after": null, "after": [, "rank": '
+                          b'{"command": "HEARTBEAT", "from": "id": {"command": "REQUEST_HIGHSCORE_PAGE", "from": '
+                          b'{"command": "GAME_HISTORY", "to": {"command": "OWN_HIGHSCORE", "to": "rating": "score": '
+                          b'"accuracy": "time": 10}{"command": "HIGHSCORE_PAGE", "to": '
+                          b'{"command": "UPDATE_HIGHSCORE_TABLE", "to": "", "id": , "highscores": [["", 100.0, 10], ["')
 
 class NetworkServer:
     """
@@ -20,6 +43,36 @@ class NetworkServer:
     ---------
     ENCODING : str -> "utf-8"
         The encoding when sending/receiving data
+    COMPRESSION : str -> "zlib-1"
+        The compression the server supports (the number is the version of the preset dictionary)
+    COMPRESSION_THRESHOLD : int -> 512
+        Messages with less bytes are never compressed
+    COMPRESSED_FLAG : int -> 1 << 127
+        The bit in the length header that marks a compressed message
+    MAX_MESSAGE_SIZE : int -> 4 MiB
+        The maximum size of a received message (compressed and decompressed), larger messages close the connection
+    MAX_PAGE_SIZE : int -> 100
+        The maximum number of clients on one page of the leaderboard
+    MAX_SUBMITTED_GAMES : int -> 100
+        The maximum number of games in one SUBMIT_GAMES (the client sends the rest in the next one)
+    MAX_GAME_ID_LENGTH : int -> 64
+        The maximum length of the id of a submitted game
+    CONNECTION_RATE_LIMIT : tuple[float, float] -> (20, 40)
+        The commands per second and the burst every connection is allowed to send
+    COMMAND_RATE_LIMITS : dict[str, tuple[float, float]]
+        The commands per second and the burst of the limited command types (per connection)
+    SNAPSHOT_SIZE : int -> 100
+        The number of clients of the leaderboard that are stored in the snapshot
+    MAX_PROFILE_DURATION : float -> 60
+        The maximum length of a profiling window [s]
+    KEPT_WINDOWS : int -> 8
+        The number of days and weeks that can be requested from the leaderboard windows (including the current one)
+    STORAGES : tuple[str, str] -> ("sqlite", "memory")
+        The supported storage backends
+    MAX_GROUP_SIZE : int -> 100
+        The maximum number of members of a group
+    MAX_GROUP_NAME_LENGTH : int -> 32
+        The maximum length of the name of a group
 
     Attributes
     ----------
@@ -28,32 +81,113 @@ class NetworkServer:
     server_socket : socket.socket
         A TCP/IPv4 connection to allow clients to connect to the server
     remove_client_queue : multiprocessing.Queue
-        A que to remove clients from the clients dictionary
+        A que to remove clients from the clients dictionary (the name and the id of the closed connection)
+    clients_lock : threading.Lock
+        Protects the clients dictionary and the idle timers (the reaper thread changes them too)
+    heartbeat_interval : float
+        The time between two heartbeats of a client [s]
+    idle_timeout : float
+        The time after which a client that didn't send anything is disconnected [s]
+    activity_queue : multiprocessing.Queue
+        A que the listeners put the name of their client in when the client sent something
+    idle_timers : TimerWheel
+        The deadlines of all clients (the client is disconnected when the deadline passed)
+    max_connections : int
+        The maximum number of clients that can be logged in at the same time
+    inflight : multiprocessing.BoundedSemaphore
+        Limits the commands that are processed at the same time by all listeners
+    counters : dict[str, multiprocessing.Value]
+        Counters of the rejected work (shared by all processes)
+    snapshot_path : str
+        The path of the leaderboard snapshot file
+    snapshot_interval : float
+        The time between two checks if the snapshot has to be written again [s]
+    snapshot : LeaderboardSnapshot | None
+        The memory-mapped leaderboard snapshot
+    capture : CaptureLog | None
+        Every received frame is written to the capture log if it is given
+    next_connection_id : int
+        The id the next accepted connection gets (is used to tell the connections apart in the capture log)
+    admins : tuple[str, ...]
+        The clients that are allowed to use admin commands (PROFILE)
+    profiler : Profiler
+        Profiles the accept loop and the listeners while a profiling window is open
+    validator : ScoreValidator
+        Checks if the submitted games are plausible (games that fail are flagged instead of stored)
+        and issues the daily challenge (validator.challenge)
+    shards : int
+        The number of database files the accounts are spread over (1 if the database isn't sharded)
+    database_path : str
+        The path of the database file (the shards are stored next to it)
+    memory_manager : MemoryManager | None
+        The process that holds the in-memory database (None if the database is stored in SQLite)
+    memory_database : MemoryDatabase | None
+        The proxy of the in-memory database (shared by all processes)
 
     Methods
     -------
-    accept_clients(db: database.Database) -> None
+    open_database() -> database.Database | ShardedDatabase | MemoryDatabase
+        Opens the database of the server
+    accept_clients(db: database.Database | ShardedDatabase | MemoryDatabase) -> None
         Allow clients to connect to the Server
-    send(conn: socket.socket, data: bytes) -> None
+    start_session(name: str, conn: socket.socket, addr: tuple[str, int], request_id: int, compression: list[str], connection_id: int) -> None
+        Stores the new client and starts the process that receives his commands
+    remove_disconnected_clients() -> None
+        Removes the clients that closed the connection from the clients dictionary
+    reap_idle_clients() -> None
+        Closes the sessions of clients that didn't send anything for longer than the idle timeout
+    close_session(client: ClientData) -> None
+        Closes the connection of a removed client and stops its listener
+    write_snapshots() -> None
+        Writes a new leaderboard snapshot whenever the leaderboard changed
+    get_snapshot(data_version: int) -> LeaderboardSnapshot | None
+        Gets the leaderboard snapshot if it is up to date
+    count(counter: str) -> int
+        Increases a counter of the rejected work
+    shed(recv: dict, reason: str, retry_after: float) -> None
+        Rejects a command with a BUSY reply
+    clamp(value: object, default: int, maximum: int, minimum: int = 1) -> int
+        Converts a submitted count to an int between minimum and maximum
+    stamp(command: dict, stage: str) -> None
+        Adds the time a traced command reached a stage to its trace
+    not_modified(recv: dict, name: str, data_version: int) -> bool
+        Answers a conditional request with NOT_MODIFIED if the leaderboard didn't change
+    reject_scores(rejected: list[tuple[dict, list[str]]], process_db: database.Database | ShardedDatabase | MemoryDatabase, notify: bool = True) -> None
+        Flags submitted games that failed the plausibility checks and tells the clients
+    send(conn: socket.socket, data: bytes, compress: bool = False) -> None
         Send data to the client (first length then data)
-    send_to(command: str, username: str, conn: socket.socket=None, **data: Any) -> None
+    compress(data: bytes) -> bytes
+        Compress data with the preset dictionary
+    decompress(data: bytes) -> bytes
+        Decompress data that was compressed with the preset dictionary
+    send_to(command: str, username: str, conn: socket.socket=None, request_id: int=None, trace: dict=None, **data: Any) -> None
         Send a command to a client
-    recv(conn: socket.socket) -> bytes
+    recv(conn: socket.socket, compression: bool = False) -> bytes
         Function to receive the exact amount of bytes
         First the length will be received than the data
-    receive(conn: socket.socket) -> str | None
+    recv_exact(conn: socket.socket, length: int) -> bytes
+        Receive exactly the given amount of bytes
+    receive(conn: socket.socket, compression: bool = False) -> str | None
         Receive data from the client
-    receive_from_client(conn: socket.socket) -> list[dict] | dict
+    redact(data: str) -> str | None
+        Removes the passwords from received data before it is logged
+    receive_from_client(conn: socket.socket, connection_id: int = None, compression: bool = False) -> list[dict] | dict
         Convert the received data to a command or list of commands
-    recv_in_process(conn: socket.socket, running: bool) -> None
+    recv_in_process(conn: socket.socket, name: str, running: bool) -> None
         Receive data from a client in a process
-    process_commands(to_process: list) -> None
+    process_commands(to_process: list, limiter: RateLimiter, name: str) -> list | bool
         Process the commands 
+    process_command(recv: dict, name: str) -> None
+        Process one command
     send_to_all(command: str, **data: Any) -> None
         Send a command to all clients
     """
 
-    def __init__(self, host: str = "127.0.0.2", port: int = 3333) -> None:
+    def __init__(self, host: str = "127.0.0.2", port: int = 3333, heartbeat_interval: float = 10, idle_timeout: float = 30, \
+                 max_connections: int = 1000, max_inflight: int = 32, snapshot_path: str = "leaderboard.snapshot", \
+                 snapshot_interval: float = 5, capture_path: str = None, admins: tuple[str, ...] = (), \
+                 profile_dir: str = "profiles", shards: int = 1, storage: str = "sqlite", \
+                 database_path: str = "useless_gui.db", challenge_secret: str = "") -> None:
         """
         Initialize a new NetworkServer to handle the network
 
@@ -63,6 +197,35 @@ class NetworkServer:
             The IP-Address the server will be bind to
         port : int
             The Port the server will be bind to
+        heartbeat_interval : float (default: 10)
+            The time between two heartbeats of a client [s] (is sent to the client when it connects)
+        idle_timeout : float (default: 30)
+            The time after which a client that didn't send anything is disconnected [s]
+        max_connections : int (default: 1000)
+            The maximum number of clients that can be logged in at the same time
+        max_inflight : int (default: 32)
+            The maximum number of commands that are processed at the same time (more commands are answered with BUSY)
+        snapshot_path : str (default: "leaderboard.snapshot")
+            The path of the leaderboard snapshot file
+        snapshot_interval : float (default: 5)
+            The time between two checks if the snapshot has to be written again [s]
+        capture_path : str (default: None)
+            Every received frame is written to this capture log (no capture if None)
+        admins : tuple[str, ...] (default: ())
+            The clients that are allowed to use admin commands (PROFILE)
+        profile_dir : str (default: "profiles")
+            The directory the profiles are written to
+        shards : int (default: 1)
+            The number of database files the accounts are spread over by the hash of the username
+            (the writes of different shards don't wait for each other, see sharding.py)
+        storage : str (default: "sqlite")
+            "sqlite" stores the accounts in database_path, "memory" keeps everything in RAM until the server stops
+            (for load tests and benchmarks, shards are ignored)
+        database_path : str (default: "useless_gui.db")
+            The path of the database file
+        challenge_secret : str (default: "")
+            Is mixed into the seeds of the daily challenge, so the seeds of the next days can't be calculated in advance
+            (has to stay the same after a restart, see challenge.py)
         
         Returns
         -------
@@ -70,10 +233,88 @@ class NetworkServer:
         """
         self.clients: dict[str, ClientData] = {}
         self.ENCODING = "utf-8"
+        self.COMPRESSION = "zlib-1"
+        self.COMPRESSION_THRESHOLD = 512
+        self.COMPRESSED_FLAG = 1 << 127
+        self.MAX_MESSAGE_SIZE = 4 * 1024 * 1024
+        self.MAX_PAGE_SIZE = 100
+        self.MAX_SUBMITTED_GAMES = 100
+        self.MAX_GAME_ID_LENGTH = 64
+        self.CONNECTION_RATE_LIMIT = (20, 40)
+        #every command needs a database access, so clients can't request them as fast as they want
+        self.COMMAND_RATE_LIMITS = {"REQUEST_HIGHSCORE_TABLE": (0.5, 3),
+                                    "REQUEST_HIGHSCORE_PAGE": (5, 10),
+                                    "REQUEST_OWN_HIGHSCORE": (1, 3),
+                                    "REQUEST_SYNC": (0.5, 3),
+                                    "REQUEST_CHALLENGE": (0.5, 3),
+                                    "REQUEST_GAME_HISTORY": (0.5, 3),
+                                    "REQUEST_WINDOW_LEADERBOARD": (1, 5),
+                                    "REQUEST_MODE_LEADERBOARD": (1, 5),
+                                    "REQUEST_GROUP_LEADERBOARD": (1, 5),
+                                    "JOIN_GROUP": (0.2, 3),
+                                    "LEAVE_GROUP": (0.2, 3),
+                                    "NEW_HIGHSCORE": (1, 3),
+                                    "GAME_FINISHED": (1, 5),
+                                    "SUBMIT_GAMES": (0.5, 3)}
+        self.SNAPSHOT_SIZE = 100
+        self.MAX_PROFILE_DURATION = 60
+        self.KEPT_WINDOWS = 8
+        self.STORAGES = ("sqlite", "memory")
+        self.MAX_GROUP_SIZE = 100
+        self.MAX_GROUP_NAME_LENGTH = 32
         #allows communication between client and server
         self.server_socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        #a restarted server can bind the port again while connections of the last run are still in TIME_WAIT
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         #is used to remove clients from the clients dictionary
         self.remove_client_queue: multiprocessing.Queue = multiprocessing.Queue()
+        self.clients_lock: threading.Lock = threading.Lock()
+
+        #clients have to send something (at least a heartbeat) before the idle timeout is over
+        self.heartbeat_interval: float = heartbeat_interval
+        self.idle_timeout: float = idle_timeout
+        self.activity_queue: multiprocessing.Queue = multiprocessing.Queue()
+        #one wheel for all clients instead of one timer per client
+        self.idle_timers: TimerWheel = TimerWheel(tick=1, size=64)
+
+        #admission control (the semaphore and the counters are shared by all listeners)
+        self.max_connections: int = max_connections
+        self.inflight: multiprocessing.BoundedSemaphore = multiprocessing.BoundedSemaphore(max_inflight)
+        self.counters: dict[str, multiprocessing.Value] = {"rate_limited": multiprocessing.Value("i", 0),
+                                                           "overloaded": multiprocessing.Value("i", 0),
+                                                           "refused_connections": multiprocessing.Value("i", 0)}
+
+        #the snapshot is loaded when the server starts accepting clients
+        self.snapshot_path: str = snapshot_path
+        self.snapshot_interval: float = snapshot_interval
+        self.snapshot: LeaderboardSnapshot | None = None
+
+        #the capture log records the traffic so it can be replayed with replay.py
+        self.capture: CaptureLog | None = CaptureLog(capture_path) if capture_path else None
+        self.next_connection_id: int = 1
+        if self.capture:
+            print(f"[{'CAPTURE':<10}] Writing every received frame to {capture_path}")
+
+        #admins can profile the running server without restarting it
+        self.admins: tuple[str, ...] = tuple(admins)
+        self.profiler: Profiler = Profiler(profile_dir)
+
+        #submitted scores are only stored if a human could have played the game (seeded games are played again)
+        self.validator: ScoreValidator = ScoreValidator(challenge_secret)
+
+        #every process opens the database on its own (see open_database)
+        if storage not in self.STORAGES:
+            raise ValueError(f"Unknown storage {storage} (use one of {self.STORAGES})")
+        self.shards: int = shards
+        self.database_path: str = database_path
+        self.memory_manager: MemoryManager | None = None
+        self.memory_database: MemoryDatabase | None = None
+        if storage == "memory":
+            #the listeners are separate processes, so the data is held by a manager process and every call is sent to it
+            self.memory_manager = MemoryManager()
+            self.memory_manager.start()
+            self.memory_database = self.memory_manager.MemoryDatabase()
+            print(f"[{'STORAGE':<10}] Keeping the database in memory (nothing is stored when the server stops)")
 
         print(f"[{'LISTENING':<10}] Bound to the port: {host}:{port}")
         self.server_socket.bind((host, port))
@@ -81,84 +322,483 @@ class NetworkServer:
 
 #-------------------------CONNECT-------------------------#
 
-    def accept_clients(self, db: database.Database) -> None:
+    def open_database(self) -> database.Database | ShardedDatabase | MemoryDatabase:
+        """
+        Opens the database of the server (every process opens its own connection)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : database.Database | ShardedDatabase | MemoryDatabase
+            The database (sharded if the server has more than one shard, the shared proxy if it is in memory)
+        """
+        if self.memory_database is not None:
+            return self.memory_database
+        return ShardedDatabase(self.shards, self.database_path) if self.shards > 1 else database.Database(self.database_path)
+
+
+    def accept_clients(self, db: database.Database | ShardedDatabase | MemoryDatabase) -> None:
         """
         Allow clients to connect to the Server
 
         Parameters
         ----------
-        db: database.Databse
-            The Database in which the accounts are stored
+        db: database.Database | ShardedDatabase | MemoryDatabase
+            The Database in which the accounts are stored (see open_database)
 
         Returns
         -------
         None
         """
+        #leaderboard reads are served from the snapshot of the last run if the database didn't change since then
+        self.snapshot = LeaderboardSnapshot.load(self.snapshot_path)
+        if self.get_snapshot(db.get_data_version()):
+            print(f"[{'SNAPSHOT':<10}] Loaded the leaderboard snapshot (data version {self.snapshot.data_version})")
+        else:
+            print(f"[{'SNAPSHOT':<10}] No valid leaderboard snapshot, it is rebuilt in the background")
+
+        #days and weeks that can't be requested anymore are deleted
+        db.prune_windows(time.time(), self.KEPT_WINDOWS)
+
+        #the snapshot writer rebuilds the snapshot whenever the leaderboard changed
+        snapshot_writer = threading.Thread(target=self.write_snapshots, daemon=True)
+        snapshot_writer.start()
+
         self.server_socket.listen()
 
+        #the reaper closes the sessions of clients that stopped sending heartbeats
+        reaper = threading.Thread(target=self.reap_idle_clients, daemon=True)
+        reaper.start()
+
         while True:
             name = ""
             conn, addr = self.server_socket.accept()
+            self.profiler.checkpoint("accept")
+            connection_id = self.next_connection_id
+            self.next_connection_id += 1
+
+            #a client that doesn't log in in time is disconnected (an invalid message closes the connection too)
+            conn.settimeout(self.idle_timeout)
+            try:
+                data = self.receive_from_client(conn=conn, connection_id=connection_id)
+            except OSError:
+                conn.close()
+                continue
+            conn.settimeout(None)
 
-            data = self.receive_from_client(conn=conn)
+            if not isinstance(data, dict):
+                conn.close()
+                continue
 
             name = data.get("from")
 
-            while not self.remove_client_queue.empty():
-                #if client disconnected the name of the client will be in the queue
-                name_to_remove: str = self.remove_client_queue.get()
-                self.clients.pop(name_to_remove)
+            self.remove_disconnected_clients()
 
-            if name in self.clients:
+            #a client that lost its connection can log in again with the session token of the old connection
+            resume = data.get("command") == "LOGIN" and name in self.clients and data.get("session") == self.clients[name].session
+            if name in self.clients and not resume:
                 #there is already a client with that name
-                self.send_to("CONNECTION_REFUSED", name, conn, reason="Already loged in!")
+                self.send_to("CONNECTION_REFUSED", name, conn, request_id=data.get("id"), reason="Already loged in!")
+                conn.close()
+                continue
+
+            if len(self.clients) >= self.max_connections:
+                #the client is refused before checking the password (bcrypt is the most expensive part of the login)
+                refused = self.count("refused_connections")
+                print(f"[{'BUSY':<10}] {name} was refused, the server is full ({refused} refused connections)")
+                self.send_to("CONNECTION_REFUSED", name, conn, request_id=data.get("id"), reason="The server is full!")
                 conn.close()
                 continue
 
             if data.get("command") == "LOGIN":
                 #checking if the user exists and if the password is correct
                 if db.verify_user(name, data.get("password")):
-                    self.clients[name] = ClientData.new_conn(name, conn, addr)
-
-                    print(f"[{'CONNECTION':<10}] {name} connected to the server ({addr[0]}:{addr[1]})")
-                    self.send_to("CONNECTED", name)
-
-                    #starting a new process to receive data from the client
-                    listener = multiprocessing.Process(target=self.recv_in_process, args=(conn, True))
-                    listener.start()
+                    if resume:
+                        #the old connection is dead (the client wouldn't log in again otherwise)
+                        with self.clients_lock:
+                            old_client = self.clients.pop(name, None)
+                            self.idle_timers.cancel(name)
+                        if old_client:
+                            print(f"[{'RESUME':<10}] {name} resumed the session of connection {old_client.connection_id}")
+                            self.close_session(old_client)
+                    self.start_session(name, conn, addr, data.get("id"), data.get("compression") or [], connection_id)
 
                 else:
                     #The login credentials were wrong
-                    self.send_to("CONNECTION_REFUSED", name, conn, reason="Wrong username or password!")
+                    self.send_to("CONNECTION_REFUSED", name, conn, request_id=data.get("id"), reason="Wrong username or password!")
                     conn.close()
 
             elif data.get("command") == "REGISTER":
                 #tries to register new user 
                 if db.register_user(name, data.get("password")):
-                    self.clients[name] = ClientData.new_conn(name, conn, addr)
-
-                    print(f"[{'CONNECTION':<10}] {name} connected to the server ({addr[0]}:{addr[1]})")
-                    self.send_to("CONNECTED", name)
-
-                    #starting a new process to receive data from the client
-                    listener = multiprocessing.Process(target=self.recv_in_process, args=(conn, True))
-                    listener.start()
+                    self.start_session(name, conn, addr, data.get("id"), data.get("compression") or [], connection_id)
 
                 else:
                     #The username is already taken
-                    self.send_to("CONNECTION_REFUSED", name, conn, reason="Username not available!")
+                    self.send_to("CONNECTION_REFUSED", name, conn, request_id=data.get("id"), reason="Username not available!")
                     conn.close()
 
             else:
+                conn.close()
                 continue
 
+
+    def start_session(self, name: str, conn: socket.socket, addr: tuple[str, int], request_id: int, compression: list[str], \
+                      connection_id: int) -> None:
+        """
+        Stores the new client, tells him that he is connected and starts the process that receives his commands
+
+        Parameters
+        ----------
+        name : str
+            The name of the client
+        conn : socket.socket
+            The connection to the client
+        addr : tuple[str, int]
+            The address of the client
+        request_id : int
+            The id of the login/register request
+        compression : list[str]
+            The compressions the client supports
+        connection_id : int
+            The id of the connection
+
+        Returns
+        -------
+        None
+        """
+        client = ClientData.new_conn(name, conn, addr)
+        #the client tells the server which compressions it supports when logging in
+        client.compression = self.COMPRESSION in compression
+        client.connection_id = connection_id
+        #the token lets the client resume the session after losing the connection
+        client.session = os.urandom(16).hex()
+        with self.clients_lock:
+            self.clients[name] = client
+            self.idle_timers.touch(name, time.time() + self.idle_timeout)
+
+        print(f"[{'CONNECTION':<10}] {name} connected to the server ({addr[0]}:{addr[1]})")
+        self.send_to("CONNECTED", name, request_id=request_id, heartbeat_interval=self.heartbeat_interval, \
+                     compression=self.COMPRESSION if client.compression else None, session=client.session)
+
+        #starting a new process to receive data from the client
+        client.listener = multiprocessing.Process(target=self.recv_in_process, args=(conn, name, True))
+        client.listener.start()
+
+
+    def remove_disconnected_clients(self) -> None:
+        """
+        Removes the clients that closed the connection from the clients dictionary
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        while True:
+            #if client disconnected the name of the client and the id of the connection will be in the queue
+            #the accept loop and the reaper thread both drain the queue, so it is never read with a blocking get
+            try:
+                name_to_remove, connection_id = self.remove_client_queue.get_nowait()
+            except queue.Empty:
+                break
+            with self.clients_lock:
+                #the listener of a resumed session only reports its own (old) connection
+                if name_to_remove not in self.clients or self.clients[name_to_remove].connection_id != connection_id:
+                    continue
+                client = self.clients.pop(name_to_remove)
+                self.idle_timers.cancel(name_to_remove)
+            if client:
+                client.conn.close()
+                #the listener stopped itself, join it so it doesn't stay a zombie process
+                client.listener.join(1)
+
+
+    def reap_idle_clients(self) -> None:
+        """
+        Closes the sessions of clients that didn't send anything for longer than the idle timeout
+        Runs in a thread of the main process
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        while True:
+            time.sleep(self.idle_timers.tick)
+            self.remove_disconnected_clients()
+
+            now = time.time()
+            with self.clients_lock:
+                #every listener reports when its client was active
+                while True:
+                    try:
+                        name: str = self.activity_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if name in self.clients:
+                        self.idle_timers.touch(name, now + self.idle_timeout)
+
+                expired = [self.clients.pop(name) for name in self.idle_timers.advance(now) if name in self.clients]
+
+            for client in expired:
+                print(f"[{'TIMEOUT':<10}] {client.name} didn't send a heartbeat for {self.idle_timeout}s")
+                self.close_session(client)
+
+
+    def close_session(self, client: "ClientData") -> None:
+        """
+        Closes the connection of a client that was removed from the clients dictionary and stops its listener
+
+        Parameters
+        ----------
+        client : ClientData
+            The removed client
+
+        Returns
+        -------
+        None
+        """
+        #unblocks the listener and frees the connection
+        try:
+            client.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        client.conn.close()
+        client.listener.terminate()
+        client.listener.join(1)
+
+
+    def write_snapshots(self) -> None:
+        """
+        Writes a new leaderboard snapshot whenever the leaderboard changed
+        Runs in a thread of the main process (with its own database connection)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        snapshot_db = self.open_database()
+        while True:
+            data_version = snapshot_db.get_data_version()
+            if not self.get_snapshot(data_version):
+                start = time.perf_counter()
+                highscores, _ = snapshot_db.get_highscore_page(self.SNAPSHOT_SIZE)
+                LeaderboardSnapshot.write(self.snapshot_path, data_version, highscores, snapshot_db.get_rating_tree())
+                self.get_snapshot(data_version)
+                print(f"[{'SNAPSHOT':<10}] Wrote the leaderboard snapshot (data version {data_version}) in {time.perf_counter()-start:.3f}s")
+
+            time.sleep(self.snapshot_interval)
+
+
+    def get_snapshot(self, data_version: int) -> LeaderboardSnapshot | None:
+        """
+        Gets the leaderboard snapshot if it is up to date
+        A snapshot file that was replaced since it was loaded is loaded again
+
+        Parameters
+        ----------
+        data_version : int
+            The current data version of the database
+
+        Returns
+        -------
+        : LeaderboardSnapshot
+            The snapshot if it was written from the current data version
+        : None
+            If there is no snapshot or the leaderboard changed since it was written
+        """
+        try:
+            mtime = os.stat(self.snapshot_path).st_mtime
+        except OSError:
+            return None
+
+        if self.snapshot is None or self.snapshot.mtime != mtime:
+            if self.snapshot:
+                self.snapshot.close()
+            self.snapshot = LeaderboardSnapshot.load(self.snapshot_path)
+
+        if self.snapshot and self.snapshot.data_version == data_version:
+            return self.snapshot
+        return None
+
+
+    def count(self, counter: str) -> int:
+        """
+        Increases a counter of the rejected work
+
+        Parameters
+        ----------
+        counter : str
+            The name of the counter
+
+        Returns
+        -------
+        : int
+            The new value of the counter
+        """
+        with self.counters[counter].get_lock():
+            self.counters[counter].value += 1
+            return self.counters[counter].value
+
+
+    @staticmethod
+    def clamp(value: object, default: int, maximum: int, minimum: int = 1) -> int:
+        """
+        Converts a submitted count (page size, limit, offset, ...) to an int between minimum and maximum
+        (a negative LIMIT means no limit in SQLite, so a count is never passed on unchecked)
+
+        Parameters
+        ----------
+        value : object
+            The submitted value
+        default : int
+            The count if the value isn't a number
+        maximum : int
+            The largest allowed count
+        minimum : int (default: 1)
+            The smallest allowed count
+
+        Returns
+        -------
+        : int
+            The count
+        """
+        try:
+            count = int(value)
+        except (TypeError, ValueError, OverflowError):
+            count = default
+        return min(max(count, minimum), maximum)
+
+
+    def shed(self, recv: dict, reason: str, retry_after: float) -> None:
+        """
+        Rejects a command with a BUSY reply
+
+        Parameters
+        ----------
+        recv : dict
+            The rejected command
+        reason : str
+            Why the command was rejected ("rate_limited" or "overloaded")
+        retry_after : float
+            The time after which the client can send the command again [s]
+
+        Returns
+        -------
+        None
+        """
+        rejected = self.count(reason)
+        print(f"[{'BUSY':<10}] {recv.get('command')} of {recv.get('from')} was rejected: {reason} ({rejected} in total)")
+        self.send_to("BUSY", recv.get("from"), request_id = recv.get("id"), trace = recv.get("trace"), request = recv.get("command"), \
+                     reason = reason, retry_after = round(retry_after, 3))
+
+
+    def stamp(self, command: dict, stage: str) -> None:
+        """
+        Adds the time a traced command reached a stage to its trace
+        (the client adds a trace to its commands if tracing is enabled, the trace is sent back with the response)
+
+        Parameters
+        ----------
+        command : dict
+            The received command or the data of the response
+        stage : str
+            The name of the stage ("server_receive", "dispatch", "db" or "encode")
+
+        Returns
+        -------
+        None
+        """
+        trace = command.get("trace")
+        if isinstance(trace, dict) and isinstance(trace.get("stamps"), list):
+            trace["stamps"].append([stage, time.time()])
+
+
+    def not_modified(self, recv: dict, name: str, data_version: int) -> bool:
+        """
+        Answers a conditional request with NOT_MODIFIED if the leaderboard didn't change since the version the client has cached
+        (every change of a rating changes the data version, so the top 10 and the own highscore can't have changed)
+
+        Parameters
+        ----------
+        recv : dict
+            The command with the cached version as if_version
+        name : str
+            The name of the client
+        data_version : int
+            The current data version of the database
+
+        Returns
+        -------
+        : bool
+            If NOT_MODIFIED was sent (the command doesn't have to be processed)
+        """
+        if recv.get("if_version") is None or recv.get("if_version") != data_version:
+            return False
+
+        self.stamp(recv, "db")
+        self.send_to("NOT_MODIFIED", name, request_id = recv.get("id"), trace = recv.get("trace"), request = recv.get("command"), \
+                     version = data_version)
+        return True
+
+
+    def reject_scores(self, rejected: list[tuple[dict, list[str]]], process_db: database.Database | ShardedDatabase | MemoryDatabase, \
+                      notify: bool = True) -> None:
+        """
+        Flags submitted games that failed the plausibility checks and tells the clients
+
+        Parameters
+        ----------
+        rejected : list[tuple[dict, list[str]]]
+            The rejected commands (GAME_FINISHED, NEW_HIGHSCORE or the games of SUBMIT_GAMES) with the reasons
+        process_db : database.Database | ShardedDatabase | MemoryDatabase
+            The database of the process
+        notify : bool (default: True)
+            If SCORE_REJECTED is sent for every game (SUBMIT_GAMES answers with all reasons at once)
+
+        Returns
+        -------
+        None
+        """
+        if not rejected:
+            return
+
+        flagged: list[tuple] = []
+        for recv, reasons in rejected:
+            #the values are unchecked client input, invalid ones are stored as NULL
+            values: list[float] = [self.validator.number(value) for value in (recv.get("score", recv.get("highscore")), \
+                                   recv.get("missed"), recv.get("accuracy"), recv.get("time"))]
+            score, missed, accuracy, game_time = [None if math.isnan(value) else value for value in values]
+            flagged.append((recv.get("from"), recv.get("command"), score, missed, accuracy, game_time, reasons, \
+                            recv.get("clicks"), time.time()))
+        process_db.flag_scores(flagged)
+        for recv, reasons in rejected:
+            print(f"[{'FLAGGED':<10}] {recv.get('command')} of {recv.get('from')}: {', '.join(reasons)}")
+            if notify:
+                self.send_to("SCORE_REJECTED", recv.get("from"), request_id = recv.get("id"), trace = recv.get("trace"), \
+                             request = recv.get("command"), reasons = reasons)
+
 #-------------------------CONNECT-------------------------#
 
 
 
 #--------------------------SEND---------------------------#
 
-    def send(self, conn: socket.socket, data: bytes) -> None:
+    def send(self, conn: socket.socket, data: bytes, compress: bool = False) -> None:
         """
         Send data to the client (first length then data)
 
@@ -168,17 +808,72 @@ class NetworkServer:
             The connection to the client
         data : bytes
             The data to send to the client
+        compress : bool (default: False)
+            If the client supports compression (only data above the threshold is compressed)
 
         Returns
         -------
         None
         """
-        length = len(data)
-        conn.send(length.to_bytes(16, "big"))
-        conn.send(data)
+        header = 0
+        if compress and len(data) >= self.COMPRESSION_THRESHOLD:
+            data = self.compress(data)
+            header = self.COMPRESSED_FLAG
+
+        header |= len(data)
+        #length and data are sent in one write
+        conn.sendall(header.to_bytes(16, "big") + data)
+
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compress data with the preset dictionary
+
+        Parameters
+        ----------
+        data : bytes
+            The data to compress
+
+        Returns
+        -------
+        : bytes
+            The compressed data
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY, COMPRESSION_DICTIONARY)
+        return compressor.compress(data) + compressor.flush()
+
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Decompress data that was compressed with the preset dictionary
+
+        Parameters
+        ----------
+        data : bytes
+            The compressed data
+
+        Returns
+        -------
+        : bytes
+            The decompressed data
+
+        Raises
+        ------
+        ConnectionAbortedError
+            If the data isn't valid or is larger than MAX_MESSAGE_SIZE when it is decompressed
+        """
+        decompressor = zlib.decompressobj(zdict=COMPRESSION_DICTIONARY)
+        try:
+            #a small message can decompress to gigabytes, the output is capped
+            decompressed = decompressor.decompress(data, self.MAX_MESSAGE_SIZE)
+        except zlib.error as error:
+            raise ConnectionAbortedError(f"Invalid compressed message: {error}")
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            raise ConnectionAbortedError("The compressed message is too large or incomplete")
+        return decompressed
 
 
-    def send_to(self, command: str, username: str, conn: socket.socket=None, **data: Any) -> None:
+    def send_to(self, command: str, username: str, conn: socket.socket=None, request_id: int=None, trace: dict=None, **data: Any) -> None:
         """
         Send a command to a client
 
@@ -190,6 +885,10 @@ class NetworkServer:
             The username the command should be sent to
         conn : socket.socket
             Uses this connection to send data if given
+        request_id : int
+            The id of the request the command answers (the client uses it to match the response)
+        trace : dict
+            The trace of the request the command answers (is stamped and sent back if given)
         data : any
             Additional data the client needs
         
@@ -201,6 +900,14 @@ class NetworkServer:
         to_send = {"command": command,
                    "to": username}
 
+        if request_id is not None:
+            to_send["id"] = request_id
+
+        if trace is not None:
+            #the trace is stamped right before the response is encoded
+            to_send["trace"] = trace
+            self.stamp(to_send, "encode")
+
         if data:
             #add kwargs to the dict
             for key, value in data.items():
@@ -214,7 +921,8 @@ class NetworkServer:
         if conn:
             self.send(conn, string_data.encode(self.ENCODING))
         else:
-            self.send(self.clients[username].conn, string_data.encode(self.ENCODING))
+            client = self.clients[username]
+            self.send(client.conn, string_data.encode(self.ENCODING), client.compression)
 
 
     def send_to_all(self, command: str, **data: Any) -> None:
@@ -241,7 +949,7 @@ class NetworkServer:
 
 #-------------------------RECEIVE-------------------------#
 
-    def recv(self, conn: socket.socket) -> bytes:
+    def recv(self, conn: socket.socket, compression: bool = False) -> bytes:
         """
         Function to receive the exact amount of bytes
         First the length will be received than the data
@@ -250,19 +958,65 @@ class NetworkServer:
         ----------
         conn : socket.socket
             The connection to the client
+        compression : bool (default: False)
+            If the client negotiated the compression (compressed messages are only accepted after the login)
 
         Returns
         -------
         data : bytes
             The data received
+
+        Raises
+        ------
+        ConnectionAbortedError
+            If the message is larger than MAX_MESSAGE_SIZE, compressed without the compression or can't be decompressed
         """
-        byte_length = conn.recv(16)
-        length = int.from_bytes(byte_length, "big")
-        data = conn.recv(length)
+        byte_length = self.recv_exact(conn, 16)
+        header = int.from_bytes(byte_length, "big")
+        length = header & (self.COMPRESSED_FLAG - 1)
+        #the length is checked before anything is received (a client could announce a message of any size)
+        if length > self.MAX_MESSAGE_SIZE:
+            raise ConnectionAbortedError(f"The message is too large ({length} bytes)")
+        if header & self.COMPRESSED_FLAG and not compression:
+            raise ConnectionAbortedError("The message is compressed but the compression wasn't negotiated")
+        data = self.recv_exact(conn, length)
+        if header & self.COMPRESSED_FLAG:
+            data = self.decompress(data)
         return data
 
 
-    def receive(self, conn: socket.socket) -> str | None:
+    def recv_exact(self, conn: socket.socket, length: int) -> bytes:
+        """
+        Receive exactly the given amount of bytes
+        (a single recv can return less when multiple messages arrive at once)
+
+        Parameters
+        ----------
+        conn : socket.socket
+            The connection to the client
+        length : int
+            The amount of bytes to receive
+
+        Returns
+        -------
+        data : bytes
+            The data received
+
+        Raises
+        ------
+        ConnectionResetError
+            If the client closed the connection
+        """
+        data = b""
+        while len(data) < length:
+            chunk = conn.recv(length - len(data))
+            if not chunk:
+                raise ConnectionResetError("The client closed the connection")
+            data += chunk
+        return data
+
+
+    def receive(self, conn: socket.socket, compression: bool = False) -> str | None:
         """
         Receive data from a client
 
@@ -270,19 +1024,58 @@ class NetworkServer:
         ----------
         conn : socket.socket
             The connection to the client
+        compression : bool (default: False)
+            If the client negotiated the compression
         
         Returns
         -------
         received : str | None
             The data received
             None if couldnt receive data
+
+        Raises
+        ------
+        ConnectionAbortedError
+            If the message isn't valid (see recv) or can't be decoded
         """
-        
-        received = self.recv(conn).decode(self.ENCODING)
+        try:
+            received = self.recv(conn, compression).decode(self.ENCODING)
+        except UnicodeDecodeError as error:
+            raise ConnectionAbortedError(f"Invalid message: {error}")
         return received
 
 
-    def receive_from_client(self, conn: socket.socket) -> list[dict] | dict:
+    @staticmethod
+    def redact(data: str) -> str | None:
+        """
+        Removes the passwords of LOGIN and REGISTER from received data before it is printed or captured
+        (only data with a password is parsed, replay.py fills in the passwords again)
+
+        Parameters
+        ----------
+        data : str
+            The received data
+
+        Returns
+        -------
+        : str
+            The data without passwords
+        : None
+            If the data has a password but can't be parsed (it isn't logged at all)
+        """
+        if '"password"' not in data:
+            return data
+        try:
+            commands = json.loads(data)
+        except json.decoder.JSONDecodeError:
+            return None
+        for command in commands if isinstance(commands, list) else [commands]:
+            if isinstance(command, dict) and "password" in command:
+                command["password"] = ""
+        return json.dumps(commands)
+
+
+    def receive_from_client(self, conn: socket.socket, connection_id: int = None, compression: bool = False) -> list[dict] | dict:
         """
         Convert the received data to a command or list of commands
 
@@ -290,6 +1083,10 @@ class NetworkServer:
         ----------
         conn: socket.socket
             The client to receive the command(s) from
+        connection_id: int (default: None)
+            The id of the connection (the data is written to the capture log if the id and the log are given)
+        compression: bool (default: False)
+            If the client negotiated the compression (False before the login)
 
         Returns
         -------
@@ -297,9 +1094,17 @@ class NetworkServer:
             One Command
         commands : list[dict]
             Multiple Commands
+
+        Raises
+        ------
+        ConnectionAbortedError
+            If the message isn't valid (the connection is closed like a lost connection, see accept_clients and recv_in_process)
         """
-        data = self.receive(conn)
-        print(f"[{'RECEIVED':<10}] {data}")
+        data = self.receive(conn, compression)
+        logged = self.redact(data)
+        print(f"[{'RECEIVED':<10}] {logged}")
+        if self.capture and connection_id is not None and logged is not None:
+            self.capture.write(connection_id, logged.encode(self.ENCODING))
         try:
             return json.loads(data)
         except json.decoder.JSONDecodeError:
@@ -310,11 +1115,14 @@ class NetworkServer:
             if len(partial_commands) == commands_len:
                 for command in partial_commands:
                     # Add the {, } to the command again to make sure it is json loadable
-                    commands.append(json.loads("{" + command + "}"))
+                    try:
+                        commands.append(json.loads("{" + command + "}"))
+                    except json.decoder.JSONDecodeError as error:
+                        raise ConnectionAbortedError(f"Invalid command: {error}")
             return commands
         
 
-    def recv_in_process(self, conn: socket.socket, running: bool) -> None:
+    def recv_in_process(self, conn: socket.socket, name: str, running: bool) -> None:
         """
         Receive data from a client in a process
 
@@ -332,27 +1140,55 @@ class NetworkServer:
         None
         """
         to_process = []
+        last_activity_report = 0
+        connection_id = self.clients[name].connection_id
+        compression = self.clients[name].compression
+        #a profile of the accept loop is copied into the process when it is forked
+        self.profiler.reset()
+        #the rate limits of this connection
+        limiter = RateLimiter(self.CONNECTION_RATE_LIMIT, self.COMMAND_RATE_LIMITS)
         while running:
-            recv = self.receive_from_client(conn)
+            try:
+                recv = self.receive_from_client(conn, connection_id, compression)
+            except OSError:
+                #the client closed the connection without CLOSE_CONNECTION, the session was reaped or the message wasn't valid
+                self.remove_client_queue.put((name, connection_id))
+                break
+
+            #the main process only needs to know about the activity once per half heartbeat interval
+            if last_activity_report + self.heartbeat_interval/2 <= time.time():
+                self.activity_queue.put(name)
+                last_activity_report = time.time()
+
             if recv:
-                if isinstance(recv, list):
-                    for com in recv:
+                for com in recv if isinstance(recv, list) else [recv]:
+                    #the commands are always from the client that logged in on this connection, "from" is set by the client
+                    #and can't be trusted (admin checks, group membership and stored games use the name)
+                    if isinstance(com, dict):
+                        com["from"] = name
+                        self.stamp(com, "server_receive")
                         to_process.append(com)
-                        
-                else:
-                    to_process.append(recv)
         
-            to_process, running = self.process_commands(to_process)
+            self.profiler.checkpoint("listener")
+            to_process, running = self.process_commands(to_process, limiter, name)
 
+        #the profile of a closed connection is written right away
+        self.profiler.stop()
 
-    def process_commands(self, to_process: list) -> list | bool:
+
+    def process_commands(self, to_process: list, limiter: RateLimiter, name: str) -> list | bool:
         """
         Process the commands
+        Commands over the rate limit or above the inflight limit are answered with BUSY
 
         Parameters
         ----------
         to_process : list
             The commands to process
+        limiter : RateLimiter
+            The rate limits of the connection the commands come from
+        name : str
+            The name the client logged in with (the commands are processed for this client, not for their "from")
 
         Returns
         -------
@@ -363,47 +1199,301 @@ class NetworkServer:
         """
         running = True
 
+        #commands over the rate limit are rejected before doing any work
+        admitted = []
+        for recv in to_process:
+            #closing the connection is always allowed
+            retry_after = limiter.allow(recv.get("command")) if recv.get("command") != "CLOSE_CONNECTION" else 0
+            if retry_after:
+                self.shed(recv, "rate_limited", retry_after)
+            else:
+                admitted.append(recv)
+        to_process = admitted
+
+        #every finished game in the received commands is stored with one insert
+        finished_games = [recv for recv in to_process if recv.get("command") == "GAME_FINISHED"]
+        if finished_games:
+            to_process = [recv for recv in to_process if recv.get("command") != "GAME_FINISHED"]
+            if self.inflight.acquire(block=False):
+                try:
+                    #all games of the burst are checked at once
+                    reasons = self.validator.validate_batch(finished_games)
+                    process_db = self.open_database()
+                    process_db.add_games([(name, recv.get("score"), recv.get("missed"), recv.get("accuracy"), \
+                                           recv.get("time"), time.time()) for recv, failed in zip(finished_games, reasons) if not failed])
+                    self.reject_scores([(recv, failed) for recv, failed in zip(finished_games, reasons) if failed], process_db)
+                    process_db.close_conn()
+                finally:
+                    self.inflight.release()
+            else:
+                for recv in finished_games:
+                    self.shed(recv, "overloaded", 1)
+
         while to_process:
             recv: dict = to_process[0]
-            name = recv.get("from")
 
-            match recv.get("command"):
+            if recv.get("command") == "CLOSE_CONNECTION":
+                running = False
+                self.remove_client_queue.put((name, self.clients.pop(name).connection_id))
+                break
 
-                case "CLOSE_CONNECTION":
-                    running = False
-                    self.clients.pop(name)
-                    self.remove_client_queue.put(name)
-                    break
-                
-                case "NEW_HIGHSCORE":
-                    score: int = recv.get("highscore")
-                    accuracy: float = recv.get("accuracy")
-                    time: int = recv.get("time")
-                    process_db = database.Database()
-                    process_db.updat_highscore(name, score, accuracy, time)
+            if not self.inflight.acquire(block=False):
+                #the server is overloaded, the client can try again later
+                self.shed(recv, "overloaded", 1)
+                to_process.pop(0)
+                continue
 
-                    highscores = process_db.get_highscores()
+            try:
+                self.stamp(recv, "dispatch")
+                self.process_command(recv, name)
+            finally:
+                self.inflight.release()
 
-                    process_db.close_conn()
-                    self.send_to("UPDATE_HIGHSCORE_TABLE", name, highscores = highscores)
+            to_process.pop(0)
+        return to_process, running
 
-                case "REQUEST_HIGHSCORE_TABLE":
-                    process_db = database.Database()
-                    highscores = process_db.get_highscores()
-                    process_db.close_conn()
-                    
-                    self.send_to("UPDATE_HIGHSCORE_TABLE", name, highscores = highscores)
 
-                case "REQUEST_OWN_HIGHSCORE":
-                    process_db = database.Database()
-                    highscore = process_db.get_user_highscore(name)
-                    process_db.close_conn()
+    def process_command(self, recv: dict, name: str) -> None:
+        """
+        Process one command (CLOSE_CONNECTION is handled by process_commands)
 
-                    self.send_to("OWN_HIGHSCORE", name, rating = highscore[0], score = highscore[1], \
-                                 accuracy = highscore[2], time = highscore[3])
+        Parameters
+        ----------
+        recv : dict
+            The command to process
+        name : str
+            The name of the client the command comes from
 
-            to_process.pop(0)   
-        return to_process, running
+        Returns
+        -------
+        None
+        """
+        match recv.get("command"):
+
+            case "NEW_HIGHSCORE":
+                score: int = recv.get("highscore")
+                accuracy: float = recv.get("accuracy")
+                duration: int = recv.get("time")
+                process_db = self.open_database()
+                reasons = self.validator.validate(recv)
+                if reasons:
+                    self.reject_scores([(recv, reasons)], process_db)
+                    process_db.close_conn()
+                    return
+                process_db.updat_highscore(name, score, accuracy, duration)
+
+                #the version is read first, a change in between only makes the next conditional request send the table again
+                data_version = process_db.get_data_version()
+                highscores = process_db.get_highscores()
+
+                process_db.close_conn()
+                self.stamp(recv, "db")
+                self.send_to("UPDATE_HIGHSCORE_TABLE", name, request_id = recv.get("id"), trace = recv.get("trace"), highscores = highscores, \
+                             version = data_version)
+
+            case "REQUEST_HIGHSCORE_TABLE":
+                process_db = self.open_database()
+                data_version = process_db.get_data_version()
+                if self.not_modified(recv, name, data_version):
+                    process_db.close_conn()
+                    return
+                snapshot = self.get_snapshot(data_version)
+                highscores = snapshot.get_highscores(10) if snapshot else process_db.get_highscores()
+                process_db.close_conn()
+                self.stamp(recv, "db")
+                
+                self.send_to("UPDATE_HIGHSCORE_TABLE", name, request_id = recv.get("id"), trace = recv.get("trace"), highscores = highscores, \
+                             version = data_version)
+
+            case "HEARTBEAT":
+                self.send_to("HEARTBEAT", name, request_id = recv.get("id"), trace = recv.get("trace"))
+
+            case "REQUEST_HIGHSCORE_PAGE":
+                page_size: int = self.clamp(recv.get("page_size", 20), 20, self.MAX_PAGE_SIZE)
+                #a malformed cursor starts at the first page
+                after = recv.get("after")
+                if not (isinstance(after, list) and len(after) == 2 and isinstance(after[0], (int, float)) and isinstance(after[1], str)):
+                    after = None
+                process_db = self.open_database()
+                highscores, cursor = process_db.get_highscore_page(page_size, after)
+                process_db.close_conn()
+                self.stamp(recv, "db")
+
+                self.send_to("HIGHSCORE_PAGE", name, request_id = recv.get("id"), trace = recv.get("trace"), highscores = highscores, after = cursor)
+
+            case "REQUEST_OWN_HIGHSCORE":
+                process_db = self.open_database()
+                data_version = process_db.get_data_version()
+                if self.not_modified(recv, name, data_version):
+                    process_db.close_conn()
+                    return
+                #the rank is read from the snapshot if it is up to date
+                snapshot = self.get_snapshot(data_version)
+                highscore = process_db.get_user_highscore(name, with_rank = snapshot is None)
+                process_db.close_conn()
+                self.stamp(recv, "db")
+                if snapshot:
+                    highscore[4] = snapshot.get_rank(highscore[0])
+
+                self.send_to("OWN_HIGHSCORE", name, request_id = recv.get("id"), trace = recv.get("trace"), rating = highscore[0], score = highscore[1], \
+                             accuracy = highscore[2], time = highscore[3], rank = highscore[4], version = data_version)
+
+            case "SUBMIT_GAMES":
+                #the games the client played offline, they are stored with the time they were played
+                games = [game for game in recv.get("games") or [] if isinstance(game, dict)][:self.MAX_SUBMITTED_GAMES]
+                reasons = self.validator.validate_batch(games)
+                #the games are deduplicated by the id of their journal entry
+                for game, failed in zip(games, reasons):
+                    if not (isinstance(game.get("id"), str) and 0 < len(game["id"]) <= self.MAX_GAME_ID_LENGTH):
+                        failed.append("invalid game id")
+                now = time.time()
+                played_at = [self.validator.number(game.get("played_at")) for game in games]
+                #a client clock that runs ahead moves the whole batch back, so the games keep their order and their own time
+                ahead = max([timestamp - now for timestamp in played_at if timestamp > now], default=0)
+                accepted = []
+                for game, failed, timestamp in zip(games, reasons, played_at):
+                    if not failed:
+                        timestamp -= ahead
+                        accepted.append((game.get("score"), game.get("missed"), game.get("accuracy"), game.get("time"), \
+                                         timestamp if 0 < timestamp <= now else now, game["id"]))
+
+                process_db = self.open_database()
+                stored = process_db.submit_games(name, accepted)
+                self.reject_scores([({**game, "from": name, "command": "SUBMIT_GAMES"}, failed) for game, failed in zip(games, reasons) if failed], \
+                                   process_db, notify = False)
+                process_db.close_conn()
+                self.stamp(recv, "db")
+
+                #the client removes every game that was processed from its journal (stored, already stored before or rejected)
+                self.send_to("GAMES_SUBMITTED", name, request_id = recv.get("id"), trace = recv.get("trace"), ids = [game.get("id") for game in games], \
+                             stored = stored, rejected = {str(game.get("id")): failed for game, failed in zip(games, reasons) if failed})
+
+            case "REQUEST_SYNC":
+                #the leaderboard and the own highscore at once (the client requests them after it reconnected)
+                process_db = self.open_database()
+                data_version = process_db.get_data_version()
+                if self.not_modified(recv, name, data_version):
+                    process_db.close_conn()
+                    return
+                snapshot = self.get_snapshot(data_version)
+                highscores = snapshot.get_highscores(10) if snapshot else process_db.get_highscores()
+                highscore = process_db.get_user_highscore(name, with_rank = snapshot is None)
+                process_db.close_conn()
+                self.stamp(recv, "db")
+                if snapshot:
+                    highscore[4] = snapshot.get_rank(highscore[0])
+
+                self.send_to("SYNC", name, request_id = recv.get("id"), trace = recv.get("trace"), highscores = highscores, own = highscore, \
+                             version = data_version)
+
+            case "REQUEST_CHALLENGE":
+                #every player gets the same seed on one day, the games are checked against it when they are submitted
+                self.send_to("CHALLENGE", name, request_id = recv.get("id"), trace = recv.get("trace"), **self.validator.challenge.current())
+
+            case "REQUEST_GAME_HISTORY":
+                process_db = self.open_database()
+                games = process_db.get_recent_games(name, self.clamp(recv.get("limit", 10), 10, self.MAX_PAGE_SIZE))
+                averages = process_db.get_game_averages(name)
+                percentiles = process_db.get_score_percentiles(name)
+                process_db.close_conn()
+                self.stamp(recv, "db")
+
+                self.send_to("GAME_HISTORY", name, request_id = recv.get("id"), trace = recv.get("trace"), games = games, averages = averages, percentiles = percentiles)
+
+            case "REQUEST_WINDOW_LEADERBOARD":
+                window: str = recv.get("window", "daily")
+                offset: int = self.clamp(recv.get("offset", 0), 0, self.KEPT_WINDOWS - 1, minimum = 0)
+                count: int = self.clamp(recv.get("count", 10), 10, self.MAX_PAGE_SIZE)
+                if not isinstance(window, str) or window not in database.Database.WINDOWS:
+                    self.send_to("WINDOW_LEADERBOARD", name, request_id = recv.get("id"), trace = recv.get("trace"), window = window, \
+                                 highscores = [], reason = f"Unknown window {window}!")
+                    return
+
+                length, shift = database.Database.WINDOWS[window]
+                bucket = database.Database.window_bucket(window, time.time()) - offset
+                process_db = self.open_database()
+                highscores = process_db.get_window_highscores(window, bucket, count)
+                process_db.close_conn()
+                self.stamp(recv, "db")
+
+                self.send_to("WINDOW_LEADERBOARD", name, request_id = recv.get("id"), trace = recv.get("trace"), window = window, \
+                             offset = offset, start = bucket*length - shift, end = (bucket + 1)*length - shift, highscores = highscores)
+
+            case "REQUEST_MODE_LEADERBOARD":
+                duration: int = recv.get("duration", 10)
+                count: int = self.clamp(recv.get("count", 10), 10, self.MAX_PAGE_SIZE)
+                if duration not in database.Database.MODES:
+                    self.send_to("MODE_LEADERBOARD", name, request_id = recv.get("id"), trace = recv.get("trace"), duration = duration, \
+                                 highscores = [], own = None, reason = f"Unknown game duration {duration}!")
+                    return
+
+                process_db = self.open_database()
+                highscores = process_db.get_mode_highscores(duration, count)
+                own = process_db.get_mode_highscore(name, duration)
+                process_db.close_conn()
+                self.stamp(recv, "db")
+
+                self.send_to("MODE_LEADERBOARD", name, request_id = recv.get("id"), trace = recv.get("trace"), duration = duration, \
+                             highscores = highscores, own = own)
+
+            case "JOIN_GROUP" | "LEAVE_GROUP" | "REQUEST_GROUPS":
+                group = recv.get("group")
+                reason = None
+                process_db = self.open_database()
+                if recv["command"] != "REQUEST_GROUPS" and (not isinstance(group, str) or not group.strip() \
+                                                             or len(group) > self.MAX_GROUP_NAME_LENGTH):
+                    reason = f"A group name needs 1 to {self.MAX_GROUP_NAME_LENGTH} characters!"
+                elif recv["command"] == "JOIN_GROUP":
+                    code = recv.get("code")
+                    reason = process_db.join_group(group.strip(), name, self.MAX_GROUP_SIZE, code if isinstance(code, str) else None)
+                elif recv["command"] == "LEAVE_GROUP":
+                    process_db.leave_group(group.strip(), name)
+                groups = process_db.get_user_groups(name)
+                process_db.close_conn()
+                self.stamp(recv, "db")
+
+                if reason:
+                    self.send_to("GROUPS", name, request_id = recv.get("id"), trace = recv.get("trace"), groups = list(groups), codes = groups, \
+                                 reason = reason)
+                else:
+                    self.send_to("GROUPS", name, request_id = recv.get("id"), trace = recv.get("trace"), groups = list(groups), codes = groups)
+
+            case "REQUEST_GROUP_LEADERBOARD":
+                group = recv.get("group")
+                process_db = self.open_database()
+                highscores = process_db.get_group_highscores(group) if isinstance(group, str) else None
+                process_db.close_conn()
+                self.stamp(recv, "db")
+
+                #only members can see the leaderboard of a group
+                members = [entry[0] for entry in highscores or []]
+                if name not in members:
+                    self.send_to("GROUP_LEADERBOARD", name, request_id = recv.get("id"), trace = recv.get("trace"), group = group, \
+                                 highscores = [], rank = None, reason = f"You are not a member of {group}!")
+                    return
+
+                #members with the same rating share a rank (like the global rank)
+                rating = highscores[members.index(name)][1]
+                self.send_to("GROUP_LEADERBOARD", name, request_id = recv.get("id"), trace = recv.get("trace"), group = group, \
+                             highscores = highscores, rank = sum(entry[1] > rating for entry in highscores) + 1)
+
+            case "PROFILE":
+                mode: str = recv.get("mode", "sampling")
+                #invalid durations become NaN
+                duration: float = self.validator.number(recv.get("duration", 10))
+                if name not in self.admins:
+                    self.send_to("PROFILING", name, request_id = recv.get("id"), trace = recv.get("trace"), enabled = False, reason = "Not an admin!")
+                elif mode not in Profiler.MODES:
+                    self.send_to("PROFILING", name, request_id = recv.get("id"), trace = recv.get("trace"), enabled = False, reason = f"Unknown mode {mode}!")
+                elif not duration > 0:
+                    self.send_to("PROFILING", name, request_id = recv.get("id"), trace = recv.get("trace"), enabled = False, \
+                                 reason = f"The duration has to be a number above 0 (got {recv.get('duration')})!")
+                else:
+                    duration = min(duration, self.MAX_PROFILE_DURATION)
+                    until = self.profiler.start_window(mode, duration)
+                    print(f"[{'PROFILE':<10}] {name} started a {mode} profiling window of {duration}s")
+                    self.send_to("PROFILING", name, request_id = recv.get("id"), trace = recv.get("trace"), enabled = True, mode = mode, \
+                                 duration = duration, until = until, directory = self.profiler.directory)
 
 #-------------------------RECEIVE-------------------------#
 
@@ -423,6 +1513,14 @@ class ClientData:
         The connection to the Client
     addr : tuple[str, int] (default: None)
         The address the connection was established to (client side)
+    listener : multiprocessing.Process | None
+        The process that receives the commands of the client
+    compression : bool
+        If large messages to the client are compressed
+    connection_id : int
+        The id of the connection (is used in the capture log)
+    session : str
+        The token the client can resume the session with after losing the connection
 
     ClassMethod
     -----------
@@ -449,6 +1547,10 @@ class ClientData:
         self.name: str = name
         self.conn: socket.socket | None = conn
         self.addr: tuple[str, int] | None = addr
+        self.listener: multiprocessing.Process | None = None
+        self.compression: bool = False
+        self.connection_id: int = 0
+        self.session: str = ""
 
     @classmethod
     def new_conn(cls, name: str, conn: socket.socket, addr: tuple[str, int]) -> "ClientData":
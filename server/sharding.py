@@ -0,0 +1,825 @@
+"""
+In this file the sharded database is defined
+The accounts are spread over multiple SQLite files by the hash of the username, so writes of different users
+don't wait for the same writer lock, the leaderboards are merged from the top of every shard
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import os
+import heapq
+import zlib
+import array
+import itertools
+
+from typing import Iterable, Iterator
+
+import database
+
+
+class ShardedDatabase:
+    """
+    A class to spread the accounts over multiple database files (has the same methods as database.Database)
+
+    Every shard is a complete database file with the accounts, games and leaderboards of its users,
+    the account ids are unique in all shards (the id of an account tells its shard)
+    The groups and the flagged games aren't sharded, they are stored in the first shard (the directory)
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        The path of the database without shards (the shards are <name>.shard<index>of<count><extension>)
+    shard_count : int
+        The number of shards
+    shards : dict[int, database.Database]
+        The opened shards (a shard is opened when it is used first)
+
+    Methods
+    -------
+    shard_path(index: int) -> str
+        Gets the path of the file of a shard
+    shard(index: int) -> database.Database
+        Gets a shard (opens it if it isn't opened yet)
+    shard_of(username: str) -> int
+        Gets the index of the shard the account of the user is stored in
+    all_shards() -> list[database.Database]
+        Gets all shards
+    register_user(username: str, password: str) -> bool
+        Registers the user in his shard
+    verify_user(username: str, password: str) -> bool
+        Checks the password in the shard of the user
+    updat_highscore(uesrname: str, highscore: int, accuracy: float, time: int) -> None
+        Updates the highscore in the shard of the user
+    get_highscores() -> list[list[str, float, int, float, int]]
+        Gets the top 10 of all shards
+    get_highscore_page(page_size: int, after: list[float, str] = None) -> tuple[list[list[str, float, int, float, int]], list[float, str] | None]
+        Gets one page of the leaderboard merged from the pages of all shards
+    get_user_highscore(username: str, with_rank: bool = True) -> list[float, int, float, int, int | None]
+        Gets the highscore of the user and his rank in all shards
+    get_rank(rating: float) -> int
+        Gets the global rank a rating has in all shards
+    get_rating_tree() -> array.array
+        Gets the rating tree of all shards
+    get_data_version() -> int
+        Gets the data version of all shards
+    add_games(games: list[tuple[str, int, int, float, int, float]]) -> int
+        Stores finished games in the shards of their users
+    submit_games(username: str, games: list[tuple[int, int, float, int, float, str]]) -> int
+        Stores the games the user played offline in his shard
+    get_recent_games(username: str, limit: int = 10) -> list[list[int, int, float, int, float, float]]
+        Gets the last games of the user from his shard
+    get_game_averages(username: str) -> list[int, float, float, float] | None
+        Gets the averages of the user from his shard
+    get_score_percentiles(username: str, percentiles: tuple[int] = (50, 90, 99)) -> list[int]
+        Gets the score percentiles of the user from his shard
+    get_window_highscores(window: str, bucket: int, count: int = 10) -> list[list[str, float, int, float, int]]
+        Gets the best games of one bucket of a leaderboard window from all shards
+    prune_windows(now: float, keep: int = 8) -> None
+        Deletes the old buckets of the leaderboard windows in all shards
+    get_mode_highscores(duration: int, count: int = 10) -> list[list[str, float, int, float, int]]
+        Gets the best games of one game duration from all shards
+    get_mode_highscore(username: str, duration: int) -> list[float, int, float, int, int] | None
+        Gets the best game of the user and his rank in all shards in one game duration
+    flag_scores(flagged: list[tuple[str, str, int, int, float, int, list[str], dict, float]]) -> None
+        Stores flagged games in the directory
+    get_flagged_scores(limit: int = 50) -> list[list]
+        Gets the last flagged games from the directory
+    join_group(group: str, username: str, max_members: int = 100, code: str = None) -> str | None
+        Adds the user to a group in the directory with its invite code
+    leave_group(group: str, username: str) -> None
+        Removes the user from a group in the directory
+    get_user_groups(username: str) -> dict[str, str]
+        Gets the groups of the user with their invite codes from the directory
+    get_group_highscores(group: str) -> list[list[str, float, int, float, int]] | None
+        Gets the leaderboard of a group with one query per shard
+    export_accounts(batch_size: int = 10000) -> Iterator[tuple[str, str, int, float, int]]
+        Streams the accounts of all shards
+    export_games(batch_size: int = 10000) -> Iterator[tuple[str, int, int, float, int, float]]
+        Streams the games of all shards
+    import_accounts(accounts: Iterable[tuple[str, bytes, int, float, int]]) -> int
+        Stores accounts in their shards
+    finish_import() -> None
+        Rebuilds the rating trees of all shards
+    close_conn() -> None
+        Closes the connections to all opened shards
+    """
+
+    def __init__(self, shard_count: int, path: str = "useless_gui.db") -> None:
+        """
+        Initialize a new ShardedDatabase
+
+        Parameters
+        ----------
+        shard_count : int
+            The number of shards (can't be changed without moving the accounts, see bulk.py)
+        path : str (default: "useless_gui.db")
+            The path of the database without shards
+
+        Returns
+        -------
+        None
+        """
+        self.path: str = path
+        self.shard_count: int = shard_count
+        self.shards: dict[int, database.Database] = {}
+
+
+    def shard_path(self, index: int) -> str:
+        """
+        Gets the path of the file of a shard
+
+        Parameters
+        ----------
+        index : int
+            The index of the shard
+
+        Returns
+        -------
+        : str
+            The path of the file
+        """
+        name, extension = os.path.splitext(self.path)
+        return f"{name}.shard{index}of{self.shard_count}{extension}"
+
+
+    def shard(self, index: int) -> database.Database:
+        """
+        Gets a shard (opens it if it isn't opened yet, commands that only need one shard only open one file)
+
+        Parameters
+        ----------
+        index : int
+            The index of the shard
+
+        Returns
+        -------
+        : database.Database
+            The shard
+        """
+        if index not in self.shards:
+            self.shards[index] = database.Database(self.shard_path(index), index, self.shard_count)
+        return self.shards[index]
+
+
+    def shard_of(self, username: str) -> int:
+        """
+        Gets the index of the shard the account of the user is stored in
+        (crc32 is stable between processes and runs, the built in hash of strings isn't)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        : int
+            The index of the shard
+        """
+        return zlib.crc32(str(username).encode()) % self.shard_count
+
+
+    def all_shards(self) -> list[database.Database]:
+        """
+        Gets all shards
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : list[database.Database]
+            The shards in the order of their index
+        """
+        return [self.shard(index) for index in range(self.shard_count)]
+
+#------------------------ACCOUNTS-------------------------#
+
+    def register_user(self, username: str, password: str) -> bool:
+        """
+        Registers the user in his shard (see database.Database.register_user)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user who is trying to register
+        password : str
+            The password the user entered
+
+        Returns
+        -------
+        : bool
+            Returns if the registration was successful
+        """
+        return self.shard(self.shard_of(username)).register_user(username, password)
+
+
+    def verify_user(self, username: str, password: str) -> bool:
+        """
+        Checks the password in the shard of the user (see database.Database.verify_user)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user who is trying to log in
+        password : str
+            The password the user entered
+
+        Returns
+        -------
+        : bool
+            Returns if the password was correct
+        """
+        return self.shard(self.shard_of(username)).verify_user(username, password)
+
+
+    def updat_highscore(self, uesrname: str, highscore: int, accuracy: float, time: int) -> None:
+        """
+        Updates the highscore in the shard of the user (see database.Database.updat_highscore)
+        The cached leaderboards of his groups in the directory are deleted
+
+        Parameters
+        ----------
+        uesrname : str
+            The name of the user
+        highscore : int
+            The new highscore of the user
+        accuracy : float
+            The accuracy the user had at his highscore
+        time : int
+            The time the user had to reach the highscore
+
+        Returns
+        -------
+        None
+        """
+        shard = self.shard(self.shard_of(uesrname))
+        shard.updat_highscore(uesrname, highscore, accuracy, time)
+
+        account_id = shard.get_account_id(uesrname)
+        if shard.shard != 0 and account_id is not None:
+            directory = self.shard(0)
+            directory.invalidate_group_caches(account_id)
+            directory.conn.commit()
+
+
+    def get_highscores(self) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the top 10 of all shards
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The top 10 clients in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        """
+        highscores, _ = self.get_highscore_page(10)
+        return highscores
+
+
+    def get_highscore_page(self, page_size: int, after: list[float, str] = None) -> tuple[list[list[str, float, int, float, int]], list[float, str] | None]:
+        """
+        Gets one page of the leaderboard
+        Every shard reads one page from its index, the sorted pages are merged (k-way) and the best page_size are kept
+
+        Parameters
+        ----------
+        page_size : int
+            The maximum number of clients on the page (less than 1 is read as 1)
+        after : list[float, str] (default: None)
+            The rating and name of the last client of the previous page (None for the first page)
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients on the page in a sorted list with their name, rating, score, accuracy and time
+        cursor : list[float, str] | None
+            The cursor of the next page or None if there are no more clients
+        """
+        page_size = max(int(page_size), 1)
+        pages = [shard.get_highscore_page(page_size, after)[0] for shard in self.all_shards()]
+        highscores = list(itertools.islice(heapq.merge(*pages, key=lambda entry: (entry[1], entry[0]), reverse=True), page_size))
+
+        cursor = None
+        if len(highscores) == page_size:
+            cursor = [highscores[-1][1], highscores[-1][0]]
+        return highscores, cursor
+
+
+    def get_user_highscore(self, username: str, with_rank: bool = True) -> list[float, int, float, int, int | None]:
+        """
+        Gets the highscore of the user and his rank in all shards
+
+        Parameters
+        ----------
+        username : str
+            The name of the user who requests his highscore
+        with_rank : bool (default: True)
+            If the rank should be read from the rating trees (else the rank is None)
+
+        Returns
+        -------
+        highscore : list[float, int, float, int, int | None]
+            The rating, score, accuracy, time and global rank of the user
+        """
+        highscore = self.shard(self.shard_of(username)).get_user_highscore(username, with_rank = False)
+        if highscore and with_rank:
+            highscore[4] = self.get_rank(highscore[0])
+        return highscore
+
+
+    def get_rank(self, rating: float) -> int:
+        """
+        Gets the global rank a rating has in all shards (1 is the best)
+
+        Parameters
+        ----------
+        rating : float
+            The rating to get the rank of
+
+        Returns
+        -------
+        : int
+            The rank of the rating
+        """
+        #every shard counts its better accounts + 1
+        return sum(shard.get_rank(rating) for shard in self.all_shards()) - self.shard_count + 1
+
+
+    def get_rating_tree(self) -> array.array:
+        """
+        Gets the rating tree of all shards (the nodes of fenwick trees can be added up)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tree : array.array
+            The count of every node (index 0 is unused)
+        """
+        tree = array.array("I", bytes(4 * (database.Database.RATING_BUCKETS + 1)))
+        for shard in self.all_shards():
+            for node, count in enumerate(shard.get_rating_tree()):
+                if count:
+                    tree[node] += count
+        return tree
+
+
+    def get_data_version(self) -> int:
+        """
+        Gets the data version of all shards (changes whenever the leaderboard of a shard changes)
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        : int
+            The sum of the data versions of the shards (only grows)
+        """
+        return sum(shard.get_data_version() for shard in self.all_shards())
+
+#------------------------ACCOUNTS-------------------------#
+
+
+#-------------------------GAMES---------------------------#
+
+    def add_games(self, games: list[tuple[str, int, int, float, int, float]]) -> int:
+        """
+        Stores finished games in the shards of their users (one transaction per shard)
+
+        Parameters
+        ----------
+        games : list[tuple[str, int, int, float, int, float]]
+            The username, score, missed clicks, accuracy, time and timestamp of every game
+
+        Returns
+        -------
+        : int
+            The number of stored games (games of unknown users are skipped)
+        """
+        shard_games: dict[int, list] = {}
+        for game in games:
+            shard_games.setdefault(self.shard_of(game[0]), []).append(game)
+        return sum(self.shard(index).add_games(games) for index, games in shard_games.items())
+
+
+    def submit_games(self, username: str, games: list[tuple[int, int, float, int, float, str]]) -> int:
+        """
+        Stores the games the user played offline in his shard (see database.Database.submit_games)
+        The cached leaderboards of his groups in the directory are deleted if his highscore changed
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        games : list[tuple[int, int, float, int, float, str]]
+            The score, missed clicks, accuracy, time, timestamp and id (of the journal entry) of every game
+
+        Returns
+        -------
+        : int
+            The number of stored games
+        """
+        shard = self.shard(self.shard_of(username))
+        data_version = shard.get_data_version()
+        stored = shard.submit_games(username, games)
+
+        account_id = shard.get_account_id(username)
+        if shard.shard != 0 and account_id is not None and shard.get_data_version() != data_version:
+            directory = self.shard(0)
+            directory.invalidate_group_caches(account_id)
+            directory.conn.commit()
+        return stored
+
+
+    def get_recent_games(self, username: str, limit: int = 10) -> list[list[int, int, float, int, float, float]]:
+        """
+        Gets the last games of the user from his shard (see database.Database.get_recent_games)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        limit : int (default: 10)
+            The maximum number of games
+
+        Returns
+        -------
+        : list[list[int, int, float, int, float, float]]
+            The score, missed clicks, accuracy, time, rating and timestamp of every game
+        """
+        return self.shard(self.shard_of(username)).get_recent_games(username, limit)
+
+
+    def get_game_averages(self, username: str) -> list[int, float, float, float] | None:
+        """
+        Gets the averages of the user from his shard (see database.Database.get_game_averages)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        : list[int, float, float, float] | None
+            The number of games and the average score, missed clicks and accuracy (None if there are no games)
+        """
+        return self.shard(self.shard_of(username)).get_game_averages(username)
+
+
+    def get_score_percentiles(self, username: str, percentiles: tuple[int] = (50, 90, 99)) -> list[int]:
+        """
+        Gets the score percentiles of the user from his shard (see database.Database.get_score_percentiles)
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        percentiles : tuple[int] (default: (50, 90, 99))
+            The percentiles
+
+        Returns
+        -------
+        : list[int]
+            The score of every percentile (empty if there are no games)
+        """
+        return self.shard(self.shard_of(username)).get_score_percentiles(username, percentiles)
+
+
+    def get_window_highscores(self, window: str, bucket: int, count: int = 10) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the best games of one bucket of a leaderboard window (merged from the best count of every shard)
+
+        Parameters
+        ----------
+        window : str
+            "daily" or "weekly"
+        bucket : int
+            The bucket of the window (see database.Database.window_bucket)
+        count : int (default: 10)
+            The maximum number of clients
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        """
+        tops = [shard.get_window_highscores(window, bucket, count) for shard in self.all_shards()]
+        return list(itertools.islice(heapq.merge(*tops, key=lambda entry: entry[1], reverse=True), count))
+
+
+    def prune_windows(self, now: float, keep: int = 8) -> None:
+        """
+        Deletes the old buckets of the leaderboard windows in all shards
+
+        Parameters
+        ----------
+        now : float
+            The current unix time
+        keep : int (default: 8)
+            The number of buckets of every window that are kept (including the current one)
+
+        Returns
+        -------
+        None
+        """
+        for shard in self.all_shards():
+            shard.prune_windows(now, keep)
+
+
+    def get_mode_highscores(self, duration: int, count: int = 10) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the best games of one game duration (merged from the best count of every shard)
+
+        Parameters
+        ----------
+        duration : int
+            The game duration (one of database.Database.MODES) [s]
+        count : int (default: 10)
+            The maximum number of clients
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        """
+        tops = [shard.get_mode_highscores(duration, count) for shard in self.all_shards()]
+        return list(itertools.islice(heapq.merge(*tops, key=lambda entry: entry[1], reverse=True), count))
+
+
+    def get_mode_highscore(self, username: str, duration: int) -> list[float, int, float, int, int] | None:
+        """
+        Gets the best game of the user and his rank in all shards in one game duration
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+        duration : int
+            The game duration (one of database.Database.MODES) [s]
+
+        Returns
+        -------
+        : list[float, int, float, int, int]
+            The rating, score, accuracy, duration and rank of the user
+        : None
+            If the user has not finished a game with this duration yet
+        """
+        index = self.shard_of(username)
+        highscore = self.shard(index).get_mode_highscore(username, duration)
+        if highscore:
+            #the own shard already counted its better users
+            highscore[4] += sum(shard.count_mode_ratings_above(duration, highscore[0]) for shard in self.all_shards() \
+                                if shard.shard != index)
+        return highscore
+
+#-------------------------GAMES---------------------------#
+
+
+#------------------------DIRECTORY------------------------#
+
+    def flag_scores(self, flagged: list[tuple[str, str, int, int, float, int, list[str], dict, float]]) -> None:
+        """
+        Stores flagged games in the directory (see database.Database.flag_scores)
+
+        Parameters
+        ----------
+        flagged : list[tuple[str, str, int, int, float, int, list[str], dict, float]]
+            The username, command, score, missed clicks, accuracy, time, reasons, clicks and timestamp of every game
+
+        Returns
+        -------
+        None
+        """
+        self.shard(0).flag_scores(flagged)
+
+
+    def get_flagged_scores(self, limit: int = 50) -> list[list]:
+        """
+        Gets the last flagged games from the directory (see database.Database.get_flagged_scores)
+
+        Parameters
+        ----------
+        limit : int (default: 50)
+            The maximum number of games
+
+        Returns
+        -------
+        : list[list]
+            The flagged games (newest is index 0)
+        """
+        return self.shard(0).get_flagged_scores(limit)
+
+
+    def join_group(self, group: str, username: str, max_members: int = 100, code: str = None) -> str | None:
+        """
+        Adds the user to a group in the directory with its invite code (the account stays in its shard)
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+        username : str
+            The name of the user
+        max_members : int (default: 100)
+            The maximum number of members of a group
+        code : str (default: None)
+            The invite code of the group (not needed to create a group)
+
+        Returns
+        -------
+        : str
+            Why the user couldn't join the group
+        : None
+            If the user is a member of the group now
+        """
+        account_id = self.shard(self.shard_of(username)).get_account_id(username)
+        if account_id is None:
+            return "Unknown user!"
+        return self.shard(0).add_group_member(group, account_id, max_members, code)
+
+
+    def leave_group(self, group: str, username: str) -> None:
+        """
+        Removes the user from a group in the directory
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        None
+        """
+        account_id = self.shard(self.shard_of(username)).get_account_id(username)
+        if account_id is not None:
+            self.shard(0).remove_group_member(group, account_id)
+
+
+    def get_user_groups(self, username: str) -> dict[str, str]:
+        """
+        Gets the groups of the user with their invite codes from the directory
+
+        Parameters
+        ----------
+        username : str
+            The name of the user
+
+        Returns
+        -------
+        : dict[str, str]
+            The invite code of every group (sorted by the names)
+        """
+        account_id = self.shard(self.shard_of(username)).get_account_id(username)
+        return self.shard(0).get_account_groups(account_id) if account_id is not None else {}
+
+
+    def get_group_highscores(self, group: str) -> list[list[str, float, int, float, int]] | None:
+        """
+        Gets the leaderboard of a group
+        The members are read from the directory and every shard reads its members with one query,
+        the result is cached in the directory like in database.Database.get_group_highscores
+
+        Parameters
+        ----------
+        group : str
+            The name of the group
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The members in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        : None
+            If the group doesn't exist
+        """
+        directory = self.shard(0)
+        db_entry = directory.get_group(group)
+        if db_entry and db_entry[1] is not None:
+            return db_entry[1]
+
+        #the directory is locked until the leaderboard is stored, the invalidation of a new rating runs after the commit of its shard
+        #and waits for the lock, so it deletes a leaderboard that was read before the new rating
+        directory.cursor.execute("BEGIN IMMEDIATE")
+        db_entry = directory.get_group(group)
+        if not db_entry or db_entry[1] is not None:
+            directory.conn.rollback()
+            return db_entry[1] if db_entry else None
+
+        group_id = db_entry[0]
+        #the ids of a shard are shard + 1, shard + 1 + shard_count, ...
+        shard_members: dict[int, list[int]] = {}
+        for account_id in directory.get_group_members(group_id):
+            shard_members.setdefault((account_id - 1) % self.shard_count, []).append(account_id)
+        tops = [self.shard(index).get_accounts(account_ids) for index, account_ids in shard_members.items()]
+        highscores = list(heapq.merge(*tops, key=lambda entry: (entry[1], entry[0]), reverse=True))
+
+        directory.cache_group_highscores(group_id, highscores)
+        return highscores
+
+#------------------------DIRECTORY------------------------#
+
+
+#--------------------------BULK---------------------------#
+
+    def export_accounts(self, batch_size: int = 10000) -> Iterator[tuple[str, str, int, float, int]]:
+        """
+        Streams the accounts of all shards (shard by shard)
+
+        Parameters
+        ----------
+        batch_size : int (default: 10000)
+            The number of rows that are fetched at once
+
+        Returns
+        -------
+        : Iterator[tuple[str, str, int, float, int]]
+            The username, bcrypt hash, highscore, accuracy and time of every account
+        """
+        for shard in self.all_shards():
+            yield from shard.export_accounts(batch_size)
+
+
+    def export_games(self, batch_size: int = 10000) -> Iterator[tuple[str, int, int, float, int, float]]:
+        """
+        Streams the games of all shards (shard by shard)
+
+        Parameters
+        ----------
+        batch_size : int (default: 10000)
+            The number of rows that are fetched at once
+
+        Returns
+        -------
+        : Iterator[tuple[str, int, int, float, int, float]]
+            The username, score, missed clicks, accuracy, time and timestamp of every game
+        """
+        for shard in self.all_shards():
+            yield from shard.export_games(batch_size)
+
+
+    def import_accounts(self, accounts: Iterable[tuple[str, bytes, int, float, int]]) -> int:
+        """
+        Stores accounts in their shards (one transaction per shard, see database.Database.import_accounts)
+
+        Parameters
+        ----------
+        accounts : Iterable[tuple[str, bytes, int, float, int]]
+            The username, bcrypt hash, highscore, accuracy and time of every account
+
+        Returns
+        -------
+        : int
+            The number of stored accounts
+        """
+        shard_accounts: dict[int, list] = {}
+        for account in accounts:
+            shard_accounts.setdefault(self.shard_of(account[0]), []).append(account)
+        return sum(self.shard(index).import_accounts(accounts) for index, accounts in shard_accounts.items())
+
+
+    def finish_import(self) -> None:
+        """
+        Rebuilds the rating trees of all shards
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        for shard in self.all_shards():
+            shard.finish_import()
+
+#--------------------------BULK---------------------------#
+
+
+    def close_conn(self) -> None:
+        """
+        Closes the connections to all opened shards
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        for shard in self.shards.values():
+            shard.close_conn()
+        self.shards = {}
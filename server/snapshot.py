@@ -0,0 +1,233 @@
+"""
+In this file the leaderboard snapshot is defined
+The snapshot is a compact binary file with the top of the leaderboard and the rating tree,
+it is memory-mapped when the server starts so leaderboard reads don't need the database
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import os
+import sys
+import mmap
+import array
+import struct
+import database
+
+
+class LeaderboardSnapshot:
+    """
+    A class to read a leaderboard snapshot
+
+    File format (big endian)
+    ------------------------
+    header : magic (4s), format version (H), data version (Q), number of rows (I), number of tree nodes (I)
+    tree : one count (I) per node of the rating tree (node 0 is unused)
+    rows : rating (d), score (I), accuracy (d), time (I), length of the name (H), name (utf-8)
+
+    ...
+
+    Constants
+    ---------
+    MAGIC : bytes -> b"UGLS"
+        The first bytes of every snapshot file
+    FORMAT_VERSION : int -> 1
+        The version of the file format
+    HEADER : struct.Struct
+        The layout of the header
+    ROW : struct.Struct
+        The layout of a row (without the name)
+
+    Attributes
+    ----------
+    path : str
+        The path of the snapshot file
+    mtime : float
+        The modification time of the file when it was loaded
+    data_version : int
+        The data version of the database the snapshot was written from
+    rows_count : int
+        The number of rows in the snapshot
+    tree_nodes : int
+        The number of nodes of the rating tree
+    file : mmap.mmap
+        The memory-mapped file
+
+    Methods
+    -------
+    load(path: str) -> LeaderboardSnapshot | None
+        Memory-maps a snapshot file if it exists and is valid
+    write(path: str, data_version: int, highscores: list[list[str, float, int, float, int]], tree: array.array) -> None
+        Writes a new snapshot file
+    get_highscores(count: int = 10) -> list[list[str, float, int, float, int]]
+        Gets the top of the leaderboard
+    get_rank(rating: float) -> int
+        Gets the global rank a rating has (1 is the best)
+    close() -> None
+        Closes the memory-mapped file
+    """
+
+    MAGIC = b"UGLS"
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct(">4sHQII")
+    ROW = struct.Struct(">dIdIH")
+
+    def __init__(self, path: str, file: mmap.mmap, mtime: float) -> None:
+        """
+        Initialize a new LeaderboardSnapshot (use load to open a file)
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file
+        file : mmap.mmap
+            The memory-mapped file
+        mtime : float
+            The modification time of the file
+
+        Returns
+        -------
+        None
+        """
+        self.path: str = path
+        self.file: mmap.mmap = file
+        self.mtime: float = mtime
+        _, _, self.data_version, self.rows_count, self.tree_nodes = self.HEADER.unpack_from(file, 0)
+
+
+    @classmethod
+    def load(cls, path: str) -> "LeaderboardSnapshot | None":
+        """
+        Memory-maps a snapshot file if it exists and is valid
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file
+
+        Returns
+        -------
+        : LeaderboardSnapshot
+            The snapshot
+        : None
+            If there is no valid snapshot
+        """
+        try:
+            with open(path, "rb") as file:
+                mtime = os.fstat(file.fileno()).st_mtime
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(mapped) < cls.HEADER.size:
+            mapped.close()
+            return None
+        magic, format_version, _, _, tree_nodes = cls.HEADER.unpack_from(mapped, 0)
+        if magic != cls.MAGIC or format_version != cls.FORMAT_VERSION or tree_nodes != database.Database.RATING_BUCKETS + 1:
+            mapped.close()
+            return None
+
+        return cls(path, mapped, mtime)
+
+
+    @classmethod
+    def write(cls, path: str, data_version: int, highscores: list[list[str, float, int, float, int]], tree: array.array) -> None:
+        """
+        Writes a new snapshot file
+        The file is written next to the old one and replaces it at once, so readers never see half a file
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file
+        data_version : int
+            The data version of the database the data comes from
+        highscores : list[list[str, float, int, float, int]]
+            The top of the leaderboard with name, rating, score, accuracy and time
+        tree : array.array
+            The counts of all nodes of the rating tree (typecode "I")
+
+        Returns
+        -------
+        None
+        """
+        tree = array.array("I", tree)
+        if sys.byteorder == "little":
+            tree.byteswap()
+
+        rows = []
+        for name, rating, score, accuracy, time in highscores:
+            encoded_name = name.encode("utf-8")
+            rows.append(cls.ROW.pack(rating, score, accuracy, time, len(encoded_name)) + encoded_name)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, cls.FORMAT_VERSION, data_version, len(rows), len(tree)))
+            file.write(tree.tobytes())
+            file.write(b"".join(rows))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+
+    def get_highscores(self, count: int = 10) -> list[list[str, float, int, float, int]]:
+        """
+        Gets the top of the leaderboard
+
+        Parameters
+        ----------
+        count : int (default: 10)
+            The maximum number of clients
+
+        Returns
+        -------
+        highscores : list[list[str, float, int, float, int]]
+            The clients in a sorted list (best is index 0) with their name, rating, score, accuracy and time
+        """
+        highscores = []
+        offset = self.HEADER.size + 4 * self.tree_nodes
+        for _ in range(min(count, self.rows_count)):
+            rating, score, accuracy, time, name_length = self.ROW.unpack_from(self.file, offset)
+            offset += self.ROW.size
+            name = self.file[offset:offset + name_length].decode("utf-8")
+            offset += name_length
+            highscores.append([name, rating, score, accuracy, time])
+        return highscores
+
+
+    def get_rank(self, rating: float) -> int:
+        """
+        Gets the global rank a rating has (1 is the best)
+        Works like Database.get_rank but reads the nodes from the file
+
+        Parameters
+        ----------
+        rating : float
+            The rating to get the rank of
+
+        Returns
+        -------
+        : int
+            The rank of the rating
+        """
+        def count_up_to(node: int) -> int:
+            count = 0
+            while node > 0:
+                count += struct.unpack_from(">I", self.file, self.HEADER.size + 4 * node)[0]
+                node -= node & -node
+            return count
+
+        return count_up_to(self.tree_nodes - 1) - count_up_to(database.Database.rating_bucket(rating)) + 1
+
+
+    def close(self) -> None:
+        """
+        Closes the memory-mapped file
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        self.file.close()
@@ -0,0 +1,154 @@
+"""
+In this file the timer wheel of the server is defined
+It is used to find idle connections without one timer per connection
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+from typing import Hashable
+
+
+class TimerWheel:
+    """
+    A hashed timer wheel
+    Every key is stored in the slot of its deadline, so touching a key and
+    advancing the wheel don't depend on the number of keys
+
+    ...
+
+    Attributes
+    ----------
+    tick : float
+        The time one slot covers [s]
+    slots : list[set[Hashable]]
+        The keys in every slot
+    deadlines : dict[Hashable, float]
+        The current deadline of every key
+    current_tick : int | None
+        The last tick whose slot was visited
+
+    Methods
+    -------
+    touch(key: Hashable, deadline: float) -> None
+        Sets the deadline of a key (adds the key if it isn't in the wheel)
+    cancel(key: Hashable) -> None
+        Removes a key from the wheel
+    advance(now: float) -> list[Hashable]
+        Advances the wheel to the given time and returns the expired keys
+    """
+
+    def __init__(self, tick: float = 1, size: int = 64) -> None:
+        """
+        Initialize a new TimerWheel
+
+        Parameters
+        ----------
+        tick : float (default: 1)
+            The time one slot covers [s]
+        size : int (default: 64)
+            The number of slots (deadlines further away than size*tick wrap around)
+
+        Returns
+        -------
+        None
+        """
+        self.tick: float = tick
+        self.slots: list[set[Hashable]] = [set() for _ in range(size)]
+        self.deadlines: dict[Hashable, float] = {}
+        self.current_tick: int | None = None
+
+
+    def slot_of(self, deadline: float) -> set[Hashable]:
+        """
+        Gets the slot a deadline belongs to
+
+        Parameters
+        ----------
+        deadline : float
+            The deadline
+
+        Returns
+        -------
+        : set[Hashable]
+            The slot
+        """
+        return self.slots[int(deadline // self.tick) % len(self.slots)]
+
+
+    def touch(self, key: Hashable, deadline: float) -> None:
+        """
+        Sets the deadline of a key (adds the key if it isn't in the wheel)
+        A key that is already in the wheel isn't moved, it is moved when its old slot is reached
+
+        Parameters
+        ----------
+        key : Hashable
+            The key
+        deadline : float
+            The time the key expires
+
+        Returns
+        -------
+        None
+        """
+        if key not in self.deadlines:
+            self.slot_of(deadline).add(key)
+        self.deadlines[key] = deadline
+
+
+    def cancel(self, key: Hashable) -> None:
+        """
+        Removes a key from the wheel
+
+        Parameters
+        ----------
+        key : Hashable
+            The key
+
+        Returns
+        -------
+        None
+        """
+        #the key stays in its slot until the slot is reached
+        self.deadlines.pop(key, None)
+
+
+    def advance(self, now: float) -> list[Hashable]:
+        """
+        Advances the wheel to the given time and returns the expired keys
+        Only slots whose time is over are visited, so keys expire up to one tick late
+        Keys whose deadline was moved are put into the slot of their new deadline
+
+        Parameters
+        ----------
+        now : float
+            The current time
+
+        Returns
+        -------
+        expired : list[Hashable]
+            The keys whose deadline passed (they are removed from the wheel)
+        """
+        now_tick = int(now // self.tick)
+        if self.current_tick is None:
+            self.current_tick = now_tick - 1
+
+        expired = []
+        #every slot is visited at most once per call
+        first_tick = max(self.current_tick + 1, now_tick - len(self.slots))
+        for tick in range(first_tick, now_tick):
+            slot = self.slots[tick % len(self.slots)]
+            keys = list(slot)
+            slot.clear()
+            for key in keys:
+                deadline = self.deadlines.get(key)
+                if deadline is None:
+                    #the key was cancelled
+                    continue
+                if deadline <= now:
+                    expired.append(key)
+                    self.deadlines.pop(key)
+                else:
+                    self.slot_of(deadline).add(key)
+
+        self.current_tick = now_tick - 1
+        return expired
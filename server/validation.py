@@ -0,0 +1,287 @@
+"""
+In this file the plausibility checks of the submitted scores are defined
+The client sends the timing of every click of a game, the server checks if a human could have played it
+All checks work on numpy arrays of all submissions at once, so a burst of games costs about as much as one game
+Games with a seed are also played again from their clicks (see challenge.py), the hits and misses have to be the same
+~ Hartl Lorenz, Hell Andreas, Holas Christoph
+"""
+
+import numpy as np
+
+from challenge import DailyChallenge, replay
+
+
+class ScoreValidator:
+    """
+    A class to check if submitted games are plausible
+
+    Clicks (sent by the client as "clicks")
+    ---------------------------------------
+    hits : list[list[float, float]]
+        The time every target was shown and the time it was hit [s since the start of the game]
+    misses : list[float]
+        The time of every click on a button that wasn't highlighted [s since the start of the game]
+    seed : int (optional)
+        The seed of the target sequence of the game
+    targets : int (only with seed)
+        The number of targets of the game (has to be RANKED_TARGETS)
+    inputs : list[list[float, int]] (only with seed)
+        The time and the clicked target of every click in order
+    challenge : str (optional)
+        The date of the daily challenge the game was played in (YYYY-MM-DD)
+
+    ...
+
+    Constants
+    ---------
+    MIN_REACTION_TIME : float -> 0.1
+        Faster reactions are counted as suspicious [s]
+    IMPOSSIBLE_REACTION_TIME : float -> 0.03
+        A single faster reaction flags the game [s]
+    MAX_FAST_SHARE : float -> 0.1
+        The maximum share of suspicious reactions
+    MIN_INTERVAL_VARIATION : float -> 0.05
+        The minimum coefficient of variation of the time between two hits (humans aren't evenly timed)
+    MIN_HITS_FOR_VARIATION : int -> 10
+        The variation is only checked if the game has at least this many hits
+    TIME_TOLERANCE : float -> 0.5
+        How much later than the duration a click can be (the end of the game is checked between two frames) [s]
+    REPLAY_TOLERANCE : float -> 0.001
+        How much the times of the replayed game can differ from the submitted times (they are rounded by the client) [s]
+    MAX_INPUTS : int -> 10000
+        The maximum number of clicks of a game that is played again
+    RANKED_TARGETS : int -> 9
+        The number of targets of a ranked game (the 3x3 grid, the leaderboards don't know the grid size)
+
+    Attributes
+    ----------
+    challenge : DailyChallenge
+        The daily challenge the games with a challenge date are checked against
+
+    Methods
+    -------
+    validate(game: dict) -> list[str]
+        Checks one submitted game
+    validate_batch(games: list[dict]) -> list[list[str]]
+        Checks multiple submitted games at once
+    check_replay(clicks: dict, hits: np.ndarray, misses: np.ndarray) -> list[str]
+        Plays a seeded game again and compares it with the submitted clicks
+    number(value: object) -> float
+        Converts a submitted value to a number
+    """
+
+    MIN_REACTION_TIME = 0.1
+    IMPOSSIBLE_REACTION_TIME = 0.03
+    MAX_FAST_SHARE = 0.1
+    MIN_INTERVAL_VARIATION = 0.05
+    MIN_HITS_FOR_VARIATION = 10
+    TIME_TOLERANCE = 0.5
+    REPLAY_TOLERANCE = 0.001
+    MAX_INPUTS = 10000
+    RANKED_TARGETS = 9
+
+    def __init__(self, challenge_secret: str = "") -> None:
+        """
+        Initialize a new ScoreValidator
+
+        Parameters
+        ----------
+        challenge_secret : str (default: "")
+            Is mixed into the seeds of the daily challenge (see DailyChallenge)
+
+        Returns
+        -------
+        None
+        """
+        self.challenge: DailyChallenge = DailyChallenge(challenge_secret)
+
+
+    def validate(self, game: dict) -> list[str]:
+        """
+        Checks one submitted game
+
+        Parameters
+        ----------
+        game : dict
+            The submitted game with score, missed, accuracy, time and clicks
+
+        Returns
+        -------
+        reasons : list[str]
+            Why the game is not plausible (empty if the game is plausible)
+        """
+        return self.validate_batch([game])[0]
+
+
+    def validate_batch(self, games: list[dict]) -> list[list[str]]:
+        """
+        Checks multiple submitted games at once
+        The clicks of all games are concatenated into one array, the per game results are summed up with bincount
+
+        Parameters
+        ----------
+        games : list[dict]
+            The submitted games with score, missed, accuracy, time and clicks
+            (NEW_HIGHSCORE sends the score as "highscore", both are accepted)
+
+        Returns
+        -------
+        reasons : list[list[str]]
+            Why every game is not plausible (empty if the game is plausible)
+        """
+        reasons: list[list[str]] = [[] for _ in games]
+        hits: list[np.ndarray] = []
+        misses: list[np.ndarray] = []
+        checked: list[int] = []
+
+        for index, game in enumerate(games):
+            clicks = game.get("clicks")
+            if not isinstance(clicks, dict):
+                reasons[index].append("no clicks")
+                continue
+            try:
+                game_hits = np.asarray(clicks.get("hits", []), dtype=np.float64).reshape(-1, 2)
+                game_misses = np.asarray(clicks.get("misses", []), dtype=np.float64).reshape(-1)
+            except (TypeError, ValueError):
+                reasons[index].append("malformed clicks")
+                continue
+            #NaN and inf pass every comparison of the checks (json.loads accepts NaN and Infinity)
+            if not (np.isfinite(game_hits).all() and np.isfinite(game_misses).all()):
+                reasons[index].append("malformed clicks")
+                continue
+            hits.append(game_hits)
+            misses.append(game_misses)
+            checked.append(index)
+
+            #a smaller grid makes every game easier (a 1x1 grid can't be missed), so the other grids aren't ranked
+            if "targets" in clicks and clicks["targets"] != self.RANKED_TARGETS:
+                reasons[index].append("grid size isn't ranked")
+            #the seeded games are played again, the other checks still run on the submitted clicks
+            if "seed" in clicks:
+                reasons[index] += self.check_replay(clicks, game_hits, game_misses)
+            if "challenge" in clicks:
+                reasons[index] += self.challenge.check(game)
+
+        if not checked:
+            return reasons
+
+        count = len(checked)
+        score = np.array([self.number(games[index].get("score", games[index].get("highscore"))) for index in checked])
+        missed = np.array([self.number(games[index].get("missed", 0)) for index in checked])
+        accuracy = np.array([self.number(games[index].get("accuracy")) for index in checked])
+        duration = np.array([self.number(games[index].get("time")) for index in checked])
+        hit_counts = np.array([len(game_hits) for game_hits in hits])
+        miss_counts = np.array([len(game_misses) for game_misses in misses])
+
+        #the score, missed clicks and accuracy have to match the clicks
+        wrong_counts = (hit_counts != score) | (miss_counts != missed)
+        clicks_total = np.maximum(score + missed, 1)
+        wrong_accuracy = ~(np.abs(np.round(score / clicks_total * 100, 2) - accuracy) <= 0.011)
+        wrong_duration = ~(duration > 0)
+
+        #every hit belongs to the game at the same index of game_of_hit
+        game_of_hit = np.repeat(np.arange(count), hit_counts)
+        all_hits = np.concatenate(hits) if hit_counts.sum() else np.empty((0, 2))
+        shown, clicked = all_hits[:, 0], all_hits[:, 1]
+        reaction = clicked - shown
+        limit = duration[game_of_hit] + self.TIME_TOLERANCE
+
+        out_of_time = np.bincount(game_of_hit, (shown < 0) | (clicked > limit) | (reaction < 0), count) > 0
+        game_of_miss = np.repeat(np.arange(count), miss_counts)
+        all_misses = np.concatenate(misses) if miss_counts.sum() else np.empty(0)
+        out_of_time |= np.bincount(game_of_miss, (all_misses < 0) | (all_misses > duration[game_of_miss] + self.TIME_TOLERANCE), count) > 0
+
+        #reaction times no human can reach
+        impossible = np.bincount(game_of_hit, reaction < self.IMPOSSIBLE_REACTION_TIME, count) > 0
+        fast_share = np.bincount(game_of_hit, reaction < self.MIN_REACTION_TIME, count) / np.maximum(hit_counts, 1)
+        too_fast = fast_share > self.MAX_FAST_SHARE
+
+        #a target is shown after the last one was hit, the pairs at the borders of two games are masked
+        same_game = game_of_hit[1:] == game_of_hit[:-1]
+        overlapping = same_game & (shown[1:] < clicked[:-1] - 1e-3)
+        out_of_order = np.bincount(game_of_hit[1:], overlapping, count) > 0
+
+        #the time between two hits of a human varies (mean and standard deviation per game from the sums)
+        intervals = np.where(same_game, clicked[1:] - clicked[:-1], 0)
+        interval_games = game_of_hit[1:]
+        interval_counts = np.bincount(interval_games, same_game, count)
+        interval_sums = np.bincount(interval_games, intervals, count)
+        interval_squares = np.bincount(interval_games, intervals**2, count)
+        safe_counts = np.maximum(interval_counts, 1)
+        mean = interval_sums / safe_counts
+        std = np.sqrt(np.maximum(interval_squares / safe_counts - mean**2, 0))
+        too_regular = (hit_counts >= self.MIN_HITS_FOR_VARIATION) & (std < self.MIN_INTERVAL_VARIATION * np.maximum(mean, 1e-9))
+
+        checks = {"score, missed clicks and clicks don't match": wrong_counts,
+                  "accuracy doesn't match the clicks": wrong_accuracy,
+                  "invalid game duration": wrong_duration,
+                  "clicks outside of the game": out_of_time,
+                  "impossible reaction time": impossible,
+                  "too many fast reactions": too_fast,
+                  "targets overlap": out_of_order,
+                  "clicks are too regular": too_regular}
+        for reason, failed in checks.items():
+            for position in np.flatnonzero(failed):
+                reasons[checked[position]].append(reason)
+        return reasons
+
+
+    def check_replay(self, clicks: dict, hits: np.ndarray, misses: np.ndarray) -> list[str]:
+        """
+        Plays a seeded game again from its inputs and compares the hits and misses with the submitted ones
+        (a game whose clicks don't fit the targets of its seed was changed after it was played)
+
+        Parameters
+        ----------
+        clicks : dict
+            The submitted clicks with seed, targets and inputs
+        hits : np.ndarray
+            The submitted hits (shape (n, 2))
+        misses : np.ndarray
+            The submitted misses
+
+        Returns
+        -------
+        reasons : list[str]
+            Why the replay failed (empty if the replay matches)
+        """
+        try:
+            seed = int(clicks["seed"])
+            targets = int(clicks["targets"])
+            inputs = [[float(clicked_at), int(target)] for clicked_at, target in clicks.get("inputs", [])]
+        #json.loads reads 1e999 as inf, int(inf) raises OverflowError
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return ["malformed replay"]
+        if targets < 1 or seed < 0 or len(inputs) > self.MAX_INPUTS:
+            return ["malformed replay"]
+
+        replayed_hits, replayed_misses = replay(seed, targets, inputs)
+        replayed_hits = np.asarray(replayed_hits, dtype=np.float64).reshape(-1, 2)
+        replayed_misses = np.asarray(replayed_misses, dtype=np.float64)
+        if replayed_hits.shape != hits.shape or replayed_misses.shape != misses.shape \
+           or not np.allclose(replayed_hits, hits, rtol=0, atol=self.REPLAY_TOLERANCE) \
+           or not np.allclose(replayed_misses, misses, rtol=0, atol=self.REPLAY_TOLERANCE):
+            return ["replay doesn't match the clicks"]
+        return []
+
+
+    @staticmethod
+    def number(value: object) -> float:
+        """
+        Converts a submitted value to a number (invalid and non-finite values become NaN and fail every check)
+
+        Parameters
+        ----------
+        value : object
+            The submitted value
+
+        Returns
+        -------
+        : float
+            The number
+        """
+        try:
+            number = float(value)
+        except (TypeError, ValueError, OverflowError):
+            return float("nan")
+        return number if np.isfinite(number) else float("nan")